@@ -1,173 +1,801 @@
 #!/usr/bin/env python3
 """Oracle RAG - Query Oracle/PeopleSoft documentation with MOS KB support"""
 
-import os, json, sys, re
+import os, json, sys, re, heapq, itertools, bisect, threading
+from array import array
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Optional
 
-DOCS_DIR = Path(__file__).parent
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # rag_common.py at the repository root
+from rag_common import (PASSAGE_CHARS, PDF_AVAILABLE, TOKEN_RE, QueryCache, Snapshot, atomic_write, file_sha1, kwic,
+                        load_pdf_pages, locate, make_passages, tokenize, write_snapshot)
+
+# Root of the source folders and caches; override to index another tree (e.g. a benchmark corpus)
+DOCS_DIR = Path(os.environ.get("ORACLE_RAG_DOCS_DIR") or Path(__file__).parent)
 PUBLIC_DIR = DOCS_DIR / "public"
 PRIVATE_DIR = DOCS_DIR / "private"
 PEOPLETOOLS_DIR = DOCS_DIR / "peopletools"
 INTEGRATION_DIR = DOCS_DIR / "integration"
 PATCHES_DIR = DOCS_DIR / "patches"
+PDF_CACHE_DIR = DOCS_DIR / "pdf_cache"
+INDEX_DIR = DOCS_DIR / "index"  # manifest.json plus one <category>.<generation>.snap shard per category
+QUERY_CACHE = INDEX_DIR / "query_cache.pkl"
+
+CATEGORIES = [
+    (PUBLIC_DIR, "public"),
+    (PRIVATE_DIR, "private"),
+    (PEOPLETOOLS_DIR, "peopletools"),
+    (INTEGRATION_DIR, "integration"),
+    (PATCHES_DIR, "patches")
+]
+SOURCE_TYPES = (".json", ".txt", ".pdf", ".html")
+SNAPSHOT_MAGIC = b"ORAGSNAP"
+
+# PDF page cut-off in characters (0 = whole pages), applied to the cached page text
+PDF_PAGE_CHARS = int(os.environ.get("ORACLE_RAG_PDF_PAGE_CHARS", "5000"))
+
+# Recent search results, reused until the index generation changes (ORACLE_RAG_QUERY_CACHE=0: memory only)
+QUERY_CACHE_SIZE = int(os.environ.get("ORACLE_RAG_QUERY_CACHE_SIZE", "256"))
+QUERY_CACHE_PERSIST = os.environ.get("ORACLE_RAG_QUERY_CACHE", "1") != "0"
+
+# Length of the keyword-in-context snippet shown for each result
+SNIPPET_CHARS = 500
+
+# MCP server (python oracle_rag.py --mcp): JSON-RPC over stdio, tool calls answered on parallel threads
+MCP_PROTOCOL_VERSION = "2024-11-05"
+MCP_WORKERS = int(os.environ.get("ORACLE_RAG_MCP_WORKERS", "8"))
+
+# MOS KB ids in a document header ("KB123456", "Doc ID: 1234567.1") and in file names
+# ("KB123456_title.txt", "doc_id_1234567.1.txt", "1234567.1.txt")
+KB_RE = re.compile(r'\b(KB\s*\d+|Doc\s*ID\s*:?\s*\d+(?:\.\d+)?)', re.I)
+KB_NAME_RE = re.compile(r'(?<![a-z0-9])(KB[ _-]?\d+|Doc[ _-]?ID[ _-]?\d+(?:\.\d+)?|\d{5,}\.\d+)(?![0-9])', re.I)
+
+def token_positions(tokens: List[str]) -> Dict[str, List[int]]:
+    positions = {}
+    for pos, t in enumerate(tokens):
+        positions.setdefault(t, []).append(pos)
+    return positions
+
+def has_phrase(tokens: List[str], positions: Dict[str, List[int]]) -> bool:
+    """True if tokens occur consecutively, given the positions of each distinct token"""
+    follow = [set(positions[t]) for t in tokens[1:]]
+    return any(all(p + k in s for k, s in enumerate(follow, 1)) for p in positions[tokens[0]])
+
+def min_span(positions: Dict[str, List[int]]) -> int:
+    """Width in tokens of the smallest window that contains every token at least once"""
+    events = sorted((p, t) for t, ps in positions.items() for p in ps)
+    best = len(events) and events[-1][0] - events[0][0]
+    counts = {}
+    left = 0
+    for p, t in events:
+        counts[t] = counts.get(t, 0) + 1
+        while len(counts) == len(positions):
+            best = min(best, p - events[left][0])
+            lt = events[left][1]
+            counts[lt] -= 1
+            if not counts[lt]:
+                del counts[lt]
+            left += 1
+    return best
+
+def normalize_kb_id(kb_id: str) -> Optional[str]:
+    """Lookup key for a KB id: 'KB123', 'kb 0123' and '123' map to '123'; a Doc ID keeps its
+    revision, so 'Doc ID: 123.1' and 'doc_id_123.1' map to '123.1' and 123.2 stays apart"""
+    m = re.search(r'(\d+)(\.\d+)?', kb_id)
+    return (m.group(1).lstrip("0") or "0") + (m.group(2) or "") if m else None
+
+def find_kb_ids(name: str, header: str = "") -> List[str]:
+    """KB ids embedded in a file name, plus the first one in the document header"""
+    labels = [m.group(1) for m in KB_NAME_RE.finditer(Path(name).stem)]
+    m = KB_RE.search(header)
+    if m:
+        labels.append(re.sub(r'\s+', ' ', m.group(1)))
+    unique = {}
+    for label in labels:
+        unique.setdefault(normalize_kb_id(label), label)
+    return list(unique.values())
+
+def scan_sources() -> Dict:
+    """Relative path -> (path, category, stat) of every indexable file, in load order"""
+    found = {}
+    for dir_path, category in CATEGORIES:
+        if not dir_path.exists():
+            continue
+        for suffix in SOURCE_TYPES:
+            for f in sorted(dir_path.glob(f"*{suffix}")):
+                found[f.relative_to(DOCS_DIR).as_posix()] = (f, category, f.stat())
+    return found
+
+class HTMLSectionParser(HTMLParser):
+    """Streaming HTML -> text sections keyed by heading hierarchy.
+
+    Text is buffered only until the next heading starts; the finished section is then
+    handed to on_section(path, text), where path lists the enclosing headings (h1, h2,
+    ...) and text starts with the section's own heading. Text before the first heading
+    has an empty path. script/style/nav (and noscript/template) content is skipped.
+    """
+    SKIP = {"script", "style", "nav", "noscript", "template"}
+    BREAKS = {"p", "div", "br", "li", "tr", "pre", "table", "ul", "ol", "dl", "dt", "dd",
+              "blockquote", "section", "article", "header", "footer", "hr", "caption"}
+    HEADINGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+
+    def __init__(self, on_section):
+        super().__init__(convert_charrefs=True)
+        self.on_section = on_section
+        self.skip = 0
+        self.path = []        # [(level, heading text)] enclosing the current section
+        self.heading = None   # (level, [text]) while inside <hN>
+        self.parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self.skip += 1
+        elif self.skip:
+            return
+        elif tag in self.HEADINGS:
+            self.end_heading()
+            self.flush()
+            self.heading = (int(tag[1]), [])
+        elif tag in self.BREAKS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self.skip = max(0, self.skip - 1)
+        elif self.skip:
+            return
+        elif tag in self.HEADINGS:
+            self.end_heading()
+        elif tag in self.BREAKS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.skip:
+            (self.heading[1] if self.heading else self.parts).append(data)
+
+    def end_heading(self):
+        if not self.heading:
+            return
+        level, parts = self.heading
+        self.heading = None
+        text = " ".join("".join(parts).split())
+        while self.path and self.path[-1][0] >= level:
+            self.path.pop()
+        if text:
+            self.path.append((level, text))
+            self.parts = [text, "\n"]
+
+    def flush(self):
+        lines = (" ".join(line.split()) for line in "".join(self.parts).splitlines())
+        text = "\n".join(line for line in lines if line)
+        self.parts = []
+        if text:
+            self.on_section([t for _, t in self.path], text)
+
+    def close(self):
+        super().close()
+        self.end_heading()
+        self.flush()
+
+def extract_html_sections(path: Path, on_section, chunk_chars: int = 1 << 16):
+    """Feed an HTML file to HTMLSectionParser in chunks, calling on_section per section"""
+    parser = HTMLSectionParser(on_section)
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for chunk in iter(lambda: f.read(chunk_chars), ""):
+            parser.feed(chunk)
+    parser.close()
+
+def to_array(view) -> array:
+    """Copy a snapshot view of unsigned ints into an editable array('I')"""
+    copy = array("I")
+    copy.frombytes(view.cast("B"))
+    return copy
+
+class MappedPassages:
+    """Passages of a shard snapshot as a read-only sequence of dicts, decoded on access"""
+    STRINGS = ("type", "category", "file", "title", "section")
+
+    def __init__(self, snap: Snapshot):
+        self.strings = [None] + snap.json("strings")
+        self.columns = {name: snap.section(name) for name in self.STRINGS + ("page", "offset", "passage", "start", "length")}
+        self.content = snap.section("content")
+
+    def __len__(self):
+        return len(self.columns["start"])
 
-PDF_AVAILABLE = False
-try:
-    import fitz  # PyMuPDF
-    PDF_AVAILABLE = True
-except ImportError:
-    pass
+    def field(self, i: int, name: str):
+        return self.strings[self.columns[name][i]]
+
+    def text(self, first: int, end: int, limit: int) -> str:
+        """The first limit characters of passages [first, end) run together. A file's passages
+        are contiguous in the content section, so this decodes one byte slice, not records."""
+        if first >= end:
+            return ""
+        c = self.columns
+        a, b = c["start"][first], c["start"][end - 1] + c["length"][end - 1]
+        return bytes(self.content[a:min(b, a + 4 * limit)]).decode("utf-8", "replace")[:limit]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        c = self.columns
+        start = c["start"][i]
+        return {"type": self.strings[c["type"][i]], "category": self.strings[c["category"][i]],
+                "file": self.strings[c["file"][i]], "title": self.strings[c["title"][i]],
+                "content": bytes(self.content[start:start + c["length"][i]]).decode("utf-8", "replace"),
+                "page": c["page"][i] or None, "section": self.strings[c["section"][i]],
+                "offset": c["offset"][i], "passage": c["passage"][i]}
+
+class MappedPostings:
+    """term -> posting list views over a shard snapshot (the read-only side of the dict API).
+
+    With positions, values are (ids, ends, positions, starts) like IndexShard
+    postings; otherwise just the ids.
+    """
+
+    def __init__(self, snap: Snapshot, prefix: str, positions: bool):
+        self.term_ids = {t: i for i, t in enumerate(snap.json(f"{prefix}_terms"))}
+        self.offsets = snap.section(f"{prefix}_offsets")
+        self.ids = snap.section(f"{prefix}_ids")
+        self.positioned = positions
+        if positions:
+            self.ends = snap.section(f"{prefix}_ends")
+            self.pos_offsets = snap.section(f"{prefix}_pos_offsets")
+            self.pos = snap.section(f"{prefix}_pos")
+            self.starts = snap.section(f"{prefix}_starts")
+
+    def __len__(self):
+        return len(self.term_ids)
+
+    def get(self, term: str, default=None):
+        i = self.term_ids.get(term)
+        if i is None:
+            return default
+        a, b = self.offsets[i], self.offsets[i + 1]
+        if not self.positioned:
+            return self.ids[a:b]
+        c, d = self.pos_offsets[i], self.pos_offsets[i + 1]
+        return self.ids[a:b], self.ends[a:b], self.pos[c:d], self.starts[c:d]
+
+    def items(self):
+        for term in self.term_ids:
+            yield term, self.get(term)
+
+class IndexShard:
+    """Passages and postings of one category.
+
+    postings maps term -> (passage ids, ends, positions, starts): the token positions
+    of the term in passage ids[i] are positions[ends[i-1]:ends[i]] and its character
+    offsets in the content the same slice of starts, all unsigned ints.
+    title_postings maps term -> ascending passage ids.
+
+    A saved shard is a binary snapshot, <category>.<generation>.snap, memory-mapped
+    on first use: passages decode one at a time and posting lists are zero-copy
+    views (MappedPassages / MappedPostings). The first add() or remove() copies it
+    into plain lists and arrays; save() writes a new snapshot.
+    """
+    VERSION = 7
+
+    def __init__(self, directory: Path, category: str, generation: int = 0):
+        self.directory = directory
+        self.category = category
+        self.generation = generation
+        self.dirty = False
+        self.snapshot = None
+        self._body = {"docs": [], "postings": {}, "title_postings": {}}
+
+    @property
+    def path(self) -> Path:
+        return self.directory / f"{self.category}.{self.generation}.snap"
+
+    @classmethod
+    def open(cls, directory: Path, category: str, generation: int) -> Optional["IndexShard"]:
+        """Persisted shard (only its header read), or None if missing or out of step with the manifest"""
+        shard = cls(directory, category, generation)
+        try:
+            shard.snapshot = Snapshot(shard.path, SNAPSHOT_MAGIC)
+            if shard.snapshot.meta["version"] != cls.VERSION or shard.snapshot.meta["generation"] != generation:
+                return None
+        except Exception:
+            return None
+        shard._body = None
+        return shard
+
+    def body(self) -> Dict:
+        if self._body is None:
+            self._body = {"docs": MappedPassages(self.snapshot),
+                          "postings": MappedPostings(self.snapshot, "content", positions=True),
+                          "title_postings": MappedPostings(self.snapshot, "title", positions=False)}
+        return self._body
+
+    def editable(self) -> Dict:
+        """The body as plain Python objects, copied out of the snapshot on first call"""
+        body = self.body()
+        if isinstance(body["docs"], MappedPassages):
+            body = self._body = {
+                "docs": list(body["docs"]),
+                "postings": {t: tuple(to_array(v) for v in lists) for t, lists in body["postings"].items()},
+                "title_postings": {t: list(ids) for t, ids in body["title_postings"].items()},
+            }
+        return body
+
+    @property
+    def docs(self) -> List[Dict]:
+        return self.body()["docs"]
+
+    def title(self, pid: int) -> str:
+        docs = self.docs
+        return docs.field(pid, "title") if isinstance(docs, MappedPassages) else docs[pid]["title"]
+
+    def text(self, first: int, end: int, limit: int) -> str:
+        """The first limit characters of passages [first, end) run together"""
+        docs = self.docs
+        if isinstance(docs, MappedPassages):
+            return docs.text(first, end, limit)
+        parts, size = [], 0
+        for pid in range(first, end):
+            if size >= limit:
+                break
+            parts.append(docs[pid]["content"])
+            size += len(parts[-1])
+        return "".join(parts)[:limit]
+
+    def save(self):
+        """Write the body as a new snapshot and remove older ones (best effort: another
+        process may still have them mapped)"""
+        body = self.editable()
+        strings, string_ids = [], {}
+        columns = {name: array("I") for name in MappedPassages.STRINGS + ("page", "passage", "length")}
+        columns.update(offset=array("Q"), start=array("Q"))
+        content = bytearray()
+        for doc in body["docs"]:
+            blob = doc["content"].encode("utf-8", "replace")
+            columns["start"].append(len(content))
+            columns["length"].append(len(blob))
+            content += blob
+            for name in MappedPassages.STRINGS:
+                value = doc.get(name)
+                if value is not None and value not in string_ids:
+                    strings.append(value)
+                    string_ids[value] = len(strings)
+                columns[name].append(0 if value is None else string_ids[value])
+            columns["page"].append(doc.get("page") or 0)
+            columns["offset"].append(doc.get("offset") or 0)
+            columns["passage"].append(doc.get("passage") or 0)
+        sections = dict(columns, strings=json.dumps(strings).encode("utf-8"), content=content)
+
+        terms = sorted(body["postings"])
+        offsets, pos_offsets = array("Q", [0]), array("Q", [0])
+        ids, ends, pos, starts = array("I"), array("I"), array("I"), array("I")
+        for t in terms:
+            t_ids, t_ends, t_pos, t_starts = body["postings"][t]
+            ids.extend(t_ids)
+            ends.extend(t_ends)
+            pos.extend(t_pos)
+            starts.extend(t_starts)
+            offsets.append(len(ids))
+            pos_offsets.append(len(pos))
+        sections.update(content_terms=json.dumps(terms).encode("utf-8"), content_offsets=offsets, content_ids=ids,
+                        content_ends=ends, content_pos_offsets=pos_offsets, content_pos=pos, content_starts=starts)
+
+        titles = sorted(body["title_postings"])
+        offsets, ids = array("Q", [0]), array("I")
+        for t in titles:
+            ids.extend(body["title_postings"][t])
+            offsets.append(len(ids))
+        sections.update(title_terms=json.dumps(titles).encode("utf-8"), title_offsets=offsets, title_ids=ids)
+
+        self.directory.mkdir(exist_ok=True)
+        write_snapshot(self.path, SNAPSHOT_MAGIC, {"version": self.VERSION, "generation": self.generation,
+                                                   "category": self.category, "docs": len(body["docs"])}, sections)
+        self.dirty = False
+        self.unlink(keep=self.path)
+
+    def unlink(self, keep: Path = None):
+        for old in self.directory.glob(f"{self.category}.*.snap"):  # not another writer's temp file
+            if old != keep:
+                try:
+                    old.unlink()
+                except OSError:
+                    pass  # still mapped by another process (Windows); removed on a later save
+
+    def add(self, passages: List[Dict]) -> List[int]:
+        """Append passages; returns their [start, end) id range"""
+        body = self.editable()
+        docs, postings, title_postings = body["docs"], body["postings"], body["title_postings"]
+        first = len(docs)
+        docs.extend(passages)
+        for pid in range(first, len(docs)):
+            occurrences = {}
+            for n, m in enumerate(TOKEN_RE.finditer(docs[pid]["content"].lower())):
+                occurrences.setdefault(m.group(), []).append((n, m.start()))
+            for t, occ in occurrences.items():
+                if t not in postings:
+                    postings[t] = (array("I"), array("I"), array("I"), array("I"))
+                ids, ends, pos, starts = postings[t]
+                ids.append(pid)
+                for n, start in occ:
+                    pos.append(n)
+                    starts.append(start)
+                ends.append(len(pos))
+            for t in set(tokenize(docs[pid]["title"])):
+                title_postings.setdefault(t, []).append(pid)
+        self.dirty = True
+        return [first, len(docs)]
+
+    def remove(self, dropped: set) -> List[int]:
+        """Drop these passage ids and renumber the rest; returns old id -> new id"""
+        body = self.editable()
+        docs = body["docs"]
+        terms, titles = set(), set()
+        for pid in dropped:
+            terms.update(tokenize(docs[pid]["content"]))
+            titles.update(tokenize(docs[pid]["title"]))
+        new_ids = []
+        kept = 0
+        for pid in range(len(docs)):
+            new_ids.append(kept)
+            kept += pid not in dropped
+        new_ids.append(kept)  # end of the last range
+        body["docs"] = [d for pid, d in enumerate(docs) if pid not in dropped]
+        first = min(dropped)
+        postings = body["postings"]
+        for t, (ids, ends, pos, starts) in list(postings.items()):
+            if t in terms:
+                kept_ids, kept_ends, kept_pos, kept_starts = array("I"), array("I"), array("I"), array("I")
+                start = 0
+                for pid, end in zip(ids, ends):
+                    if pid not in dropped:
+                        kept_ids.append(new_ids[pid])
+                        kept_pos.extend(pos[start:end])
+                        kept_starts.extend(starts[start:end])
+                        kept_ends.append(len(kept_pos))
+                    start = end
+                if kept_ids:
+                    postings[t] = (kept_ids, kept_ends, kept_pos, kept_starts)
+                else:
+                    del postings[t]
+            elif ids[-1] >= first:
+                postings[t] = (array("I", (new_ids[i] for i in ids)), ends, pos, starts)
+        title_postings = body["title_postings"]
+        for t, ids in list(title_postings.items()):
+            if t in titles:
+                ids = [new_ids[i] for i in ids if i not in dropped]
+            elif ids[-1] >= first:
+                ids = [new_ids[i] for i in ids]
+            if ids:
+                title_postings[t] = ids
+            else:
+                del title_postings[t]
+        self.dirty = True
+        return new_ids
+
+    def occurrences(self, term: str, pid: int) -> tuple:
+        """(token positions, character offsets) of term in passage pid (empty if absent)"""
+        ids, ends, pos, starts = self.body()["postings"].get(term, ((), (), (), ()))
+        i = bisect.bisect_left(ids, pid)
+        if i == len(ids) or ids[i] != pid:
+            return array("I"), array("I")
+        a, b = ends[i - 1] if i else 0, ends[i]
+        return pos[a:b], starts[a:b]
+
+    def positions(self, term: str, pid: int) -> array:
+        """Token positions of term in passage pid (empty if absent)"""
+        return self.occurrences(term, pid)[0]
+
+    def snippet(self, pid: int, query: str) -> str:
+        """Keyword-in-context snippet of passage pid, located through the postings"""
+        hits = [(start, start + len(t), t) for t in set(tokenize(query)) for start in self.occurrences(t, pid)[1]]
+        return kwic(self.docs[pid]["content"], hits, SNIPPET_CHARS)
+
+    def search(self, query: str, top_k: int = 5) -> List[tuple]:
+        """(-score, span, pid) of the best passages, best first: +3 per query term in the
+        title, +1 per term in the content, +10 for the exact query in the content and +5
+        in the title. Phrases are matched on token positions, and passages with equal
+        scores rank by span, the tightest window holding every query term (infinite,
+        so they rank last, for passages that lack one of the terms).
+        Only passages that share a term with the query are visited."""
+        if top_k < 1:
+            return []
+        body = self.body()
+        docs = body["docs"]
+        tokens = tokenize(query)
+        terms = set(tokens)
+        content_hits, title_hits = {}, {}
+        for t in terms:
+            for pid in body["postings"].get(t, ((),))[0]:
+                content_hits[pid] = content_hits.get(pid, 0) + 1
+            for pid in body["title_postings"].get(t, ()):
+                title_hits[pid] = title_hits.get(pid, 0) + 1
+        scored = []
+        for pid in content_hits.keys() | title_hits.keys():
+            c, t = content_hits.get(pid, 0), title_hits.get(pid, 0)
+            score = 3 * t + c
+            positions = None
+            # the exact query can only occur where every one of its terms does
+            if c == len(terms):
+                if len(tokens) == 1:
+                    score += 10
+                else:
+                    positions = {term: self.positions(term, pid) for term in terms}
+                    score += 10 if has_phrase(tokens, positions) else 0
+            if t == len(terms) and has_phrase(tokens, token_positions(tokenize(self.title(pid)))):
+                score += 5
+            scored.append((-score, pid, positions))
+        if not scored:
+            return []
+        # spans only matter among passages that can still make the cut
+        cutoff = heapq.nsmallest(top_k, scored)[-1][0]
+        return heapq.nsmallest(top_k, ((s, min_span(positions) if positions else float("inf"), pid)
+                                       for s, pid, positions in scored if s <= cutoff))
+
+class OracleIndex:
+    """Category-sharded passage index with a per-file manifest.
+
+    INDEX_DIR/manifest.json maps relative path -> size/mtime_ns/sha1/category/type/
+    title/kb and the [start, end) range of that file's passage ids in its category
+    shard, so a restart only re-ingests files whose content changed and drops the
+    passages of deleted ones. It also holds the KB index (normalized KB id ->
+    [[label, relative path]]) and the generation of every shard, which is checked
+    against each shard file's header so a torn write only re-ingests that category.
+    generation is bumped whenever any content changes.
+    """
+    VERSION = 5
+
+    def __init__(self, settings: Dict, directory: Path = INDEX_DIR):
+        self.settings = settings
+        self.directory = directory
+        self.manifest = {}
+        self.kb = {}
+        self.generation = 0
+        self.shards = {}
+
+    @classmethod
+    def load(cls, settings: Dict, directory: Path = INDEX_DIR, fresh: bool = False) -> "OracleIndex":
+        """Persisted index (shard bodies load on first use), or an empty one if fresh,
+        missing, unreadable or built with other settings. An empty index continues the
+        old generation count, so generations are never reused for other contents."""
+        index = cls(settings, directory)
+        try:
+            meta = json.load(open(directory / "manifest.json", encoding="utf-8"))
+            index.generation = meta["generation"]
+            if fresh or meta["version"] != cls.VERSION or meta["settings"] != settings:
+                return index
+        except Exception:
+            return index
+        index.manifest = meta["manifest"]
+        index.kb = meta["kb"]
+        for category, generation in meta["shards"].items():
+            shard = IndexShard.open(directory, category, generation)
+            if shard:
+                index.shards[category] = shard
+            else:  # forget the category; its files are re-ingested
+                index.remove([rel for rel, e in index.manifest.items() if e["category"] == category])
+        return index
+
+    def shard(self, category: str) -> IndexShard:
+        if category not in self.shards:
+            self.shards[category] = IndexShard(self.directory, category)
+        return self.shards[category]
+
+    @property
+    def passage_count(self) -> int:
+        return sum(end - start for start, end in (e["pids"] for e in self.manifest.values()))
+
+    def passages(self, relpath: str) -> List[Dict]:
+        entry = self.manifest[relpath]
+        return self.shards[entry["category"]].docs[slice(*entry["pids"])]
+
+    def text(self, relpath: str, limit: int) -> str:
+        """The first limit characters of a file's indexed text, read straight from its shard"""
+        entry = self.manifest[relpath]
+        shard = self.shards.get(entry["category"])
+        return shard.text(*entry["pids"], limit) if shard else ""
+
+    def save(self):
+        """Write the shards that changed and then the manifest, each atomically"""
+        self.directory.mkdir(exist_ok=True)
+        for shard in self.shards.values():
+            if shard.dirty:
+                shard.generation += 1
+                shard.save()
+        with atomic_write(self.directory / "manifest.json", "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "settings": self.settings, "generation": self.generation,
+                       "shards": {c: s.generation for c, s in self.shards.items()},
+                       "manifest": self.manifest, "kb": self.kb}, f, indent=1)
+
+    def add(self, relpath: str, entry: Dict, passages: List[Dict]):
+        entry["pids"] = self.shard(entry["category"]).add(passages)
+        self.manifest[relpath] = entry
+        for label in entry["kb"]:
+            self.kb.setdefault(normalize_kb_id(label), []).append([label, relpath])
+
+    def skip(self, relpath: str, entry: Dict):
+        """Record a file that yielded no text, so it is only retried once it changes"""
+        entry.update(kb=[], pids=[0, 0])  # an empty range is valid in any shard
+        self.manifest[relpath] = entry
+
+    def remove(self, relpaths: List[str]):
+        """Drop the passages of these files and renumber the rest of their shards"""
+        dropped = {}
+        for rel in relpaths:
+            entry = self.manifest.pop(rel)
+            dropped.setdefault(entry["category"], set()).update(range(*entry["pids"]))
+        gone = set(relpaths)
+        for key, refs in list(self.kb.items()):
+            refs = [r for r in refs if r[1] not in gone]
+            if refs:
+                self.kb[key] = refs
+            else:
+                del self.kb[key]
+        for category, pids in dropped.items():
+            if not pids or category not in self.shards:
+                continue
+            new_ids = self.shards[category].remove(pids)
+            if not new_ids[-1]:  # category emptied; its remaining (empty) entries map to [0, 0]
+                self.shards.pop(category).unlink()
+            for entry in self.manifest.values():
+                if entry["category"] == category:
+                    entry["pids"] = [new_ids[i] for i in entry["pids"]]
+
+    def search(self, query: str, top_k: int = 5, category: str = None) -> List[tuple]:
+        """(score, passage, snippet) of the best passages. A category search only opens that
+        shard; otherwise every shard is searched in its own thread and the per-shard
+        top-k lists are merged (ties go by span, then category and passage order)."""
+        if category:
+            names = [category] if category in self.shards else []
+        else:
+            names = [c for _, c in CATEGORIES if c in self.shards]
+        order = {c: i for i, (_, c) in enumerate(CATEGORIES)}
+
+        def search_shard(name):
+            return [(s, span, order[name], pid, name) for s, span, pid in self.shards[name].search(query, top_k)]
+
+        if len(names) > 1:
+            with ThreadPoolExecutor(max_workers=len(names)) as pool:
+                ranked = list(pool.map(search_shard, names))
+        else:
+            ranked = [search_shard(name) for name in names]
+        return [(-s, self.shards[name].docs[pid], self.shards[name].snippet(pid, query))
+                for s, _, _, pid, name in itertools.islice(heapq.merge(*ranked), top_k)]
 
 class OracleRAG:
-    def __init__(self):
-        self.docs = []
-        self.kb_articles = {}
+    def __init__(self, pdf_page_chars: int = PDF_PAGE_CHARS, rebuild_index: bool = False):
+        self.pdf_page_chars = pdf_page_chars
+        settings = {"passage_chars": PASSAGE_CHARS, "pdf_page_chars": pdf_page_chars}
+        self.index = OracleIndex.load(settings, fresh=rebuild_index)
+        self.cache = QueryCache(QUERY_CACHE_SIZE, QUERY_CACHE if QUERY_CACHE_PERSIST else None, version=2)
         self.load_docs()
-        print(f"Total: {len(self.docs)} documents")
+        print(f"Total: {self.index.passage_count} passages")
+
+    @property
+    def docs(self) -> List[Dict]:
+        """Every passage, category by category (loads all shards)"""
+        return [doc for _, c in CATEGORIES if c in self.index.shards for doc in self.index.shards[c].docs]
+
+    @property
+    def kb_articles(self) -> Dict[str, str]:
+        """KB id as written -> file name"""
+        return {label: Path(rel).name for refs in self.index.kb.values() for label, rel in refs}
 
     def load_docs(self):
-        """Load all document types"""
-        count = 0
-
-        # Load from all directories
-        for dir_path, doc_type in [
-            (PUBLIC_DIR, "public"),
-            (PRIVATE_DIR, "private"),
-            (PEOPLETOOLS_DIR, "peopletools"),
-            (INTEGRATION_DIR, "integration"),
-            (PATCHES_DIR, "patches")
-        ]:
-            if not dir_path.exists():
+        """Sync the persisted index with the source directories.
+
+        Files whose size/mtime match the manifest are trusted; otherwise the content
+        hash decides whether they are re-ingested. Deleted files are dropped.
+        """
+        index = self.index
+        sources = scan_sources()
+        todo, changed, touched = {}, [], False
+        for rel, (f, category, st) in sources.items():
+            entry = index.manifest.get(rel)
+            if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+                continue
+            sha1 = file_sha1(f)
+            if entry and entry["sha1"] == sha1:  # touched, not modified
+                entry.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+                touched = True
                 continue
+            if entry:
+                changed.append(rel)
+            todo[rel] = (f, category, {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": sha1, "category": category})
+        removed = [rel for rel in index.manifest if rel not in sources]
+        index.remove(changed + removed)
 
-            # JSON files (API specs, KB exports)
-            for f in dir_path.glob("*.json"):
-                try:
-                    data = json.load(open(f, encoding="utf-8"))
-                    if "info" in data:  # OpenAPI spec
-                        content = f"API: {data.get('info',{}).get('title','?')}\n"
-                        for path, methods in data.get("paths", {}).items():
-                            for m, d in methods.items():
-                                if m in ["get","post","put","patch","delete"]:
-                                    content += f"{m.upper()} {path} - {d.get('summary','')}\n"
-                        self.docs.append({
-                            "type": "openapi",
-                            "category": doc_type,
-                            "file": f.name,
-                            "title": data.get("info",{}).get("title", f.stem),
-                            "content": content
-                        })
-                    else:  # Generic JSON
-                        self.docs.append({
-                            "type": "json",
-                            "category": doc_type,
-                            "file": f.name,
-                            "title": f.stem.replace("_", " ").title(),
-                            "content": json.dumps(data, indent=2)[:10000]
-                        })
-                    count += 1
-                except Exception as e:
-                    pass
-
-            # Text files (KB articles, guides)
-            for f in dir_path.glob("*.txt"):
-                try:
-                    content = open(f, encoding="utf-8").read()
-                    title = f.stem.replace("_", " ").replace("-", " ").title()
-
-                    # Check for MOS KB article pattern
-                    kb_match = re.search(r'(KB\d+|Doc ID:\s*\d+\.?\d*)', content[:500], re.I)
-                    if kb_match:
-                        kb_id = kb_match.group(1)
-                        self.kb_articles[kb_id] = f.name
-
-                    self.docs.append({
-                        "type": "text",
-                        "category": doc_type,
-                        "file": f.name,
-                        "title": title,
-                        "content": content
-                    })
-                    count += 1
-                except:
-                    pass
-
-            # PDF files
-            if PDF_AVAILABLE:
-                for f in dir_path.glob("*.pdf"):
-                    try:
-                        doc = fitz.open(f)
-                        text = ""
-                        for page in doc:
-                            text += page.get_text()[:5000]
-                            if len(text) > 50000:
-                                break
-                        doc.close()
-                        title = f.stem.replace("-", " ").replace("_", " ").title()
-                        self.docs.append({
-                            "type": "pdf",
-                            "category": doc_type,
-                            "file": f.name,
-                            "title": title,
-                            "content": text[:50000]
-                        })
-                        count += 1
-                    except:
-                        pass
-
-            # HTML files
-            for f in dir_path.glob("*.html"):
-                try:
-                    content = open(f, encoding="utf-8").read()
-                    # Strip HTML tags for search
-                    text = re.sub(r'<[^>]+>', ' ', content)
-                    text = re.sub(r'\s+', ' ', text).strip()
-                    title = f.stem.replace("_", " ").replace("-", " ").title()
-                    self.docs.append({
-                        "type": "html",
-                        "category": doc_type,
-                        "file": f.name,
-                        "title": title,
-                        "content": text[:50000]
-                    })
-                    count += 1
-                except:
-                    pass
-
-        print(f"Loaded {count} docs from {len([d for d in [PUBLIC_DIR, PRIVATE_DIR, PEOPLETOOLS_DIR, INTEGRATION_DIR, PATCHES_DIR] if d.exists()])} directories")
-        if self.kb_articles:
-            print(f"Found {len(self.kb_articles)} MOS KB articles")
+        # PDF files (from the page cache; PyMuPDF only runs for new/changed files)
+        pdf_pages = load_pdf_pages([f for f, _, _ in todo.values() if f.suffix == ".pdf"], PDF_CACHE_DIR, DOCS_DIR) if todo else {}
+        added, failed = [], []
+        for rel, (f, category, entry) in todo.items():
+            ingested = self.ingest(f, category, pdf_pages)
+            if ingested is None:
+                if PDF_AVAILABLE:  # unreadable: not extracted again until it changes
+                    index.skip(rel, entry)
+                    failed.append(rel)
+                continue  # without PyMuPDF, retried on the next start
+            base, passages = ingested
+            # KB exports carry their id in the file name or the first lines (not PDFs: page headers cite KB ids)
+            header = passages[0]["content"][:1000] if passages and base["type"] != "pdf" else ""
+            entry.update(type=base["type"], title=base["title"], kb=find_kb_ids(f.name, header))
+            index.add(rel, entry, passages)
+            added.append(rel)
 
-    def search(self, query: str, top_k: int = 5, category: str = None) -> List[Dict]:
-        """Keyword search with optional category filter"""
-        terms = set(query.lower().split())
-        results = []
+        if failed:
+            print(f"No text extracted from {len(failed)} PDF files: {', '.join(failed[:5])}")
+        if added or changed or removed:
+            index.generation += 1
+            print(f"Indexed {len(set(added) - set(changed))} new, {len(changed)} changed, {len(removed)} removed files (generation {index.generation})")
+        if added or changed or removed or failed or touched:
+            index.save()
 
-        for doc in self.docs:
-            # Category filter
-            if category and doc.get("category") != category:
-                continue
+        print(f"Loaded {len(index.manifest)} docs ({index.passage_count} passages) from {len([d for d, _ in CATEGORIES if d.exists()])} directories")
+        if index.kb:
+            print(f"Found {len(index.kb)} MOS KB articles")
 
-            content = doc["content"].lower()
-            title = doc["title"].lower()
+    def ingest(self, f: Path, category: str, pdf_pages: Dict):
+        """(base record, passages) for one source file; a file that fails to parse yields
+        no passages, a PDF whose text is not available yet yields None"""
+        base = {"type": None, "category": category, "file": f.name,
+                "title": f.stem.replace("_", " ").replace("-", " ").title()}
+        try:
+            if f.suffix == ".json":  # API specs, KB exports
+                data = json.load(open(f, encoding="utf-8"))
+                if "info" in data:  # OpenAPI spec
+                    content = f"API: {data.get('info',{}).get('title','?')}\n"
+                    for path, methods in data.get("paths", {}).items():
+                        for m, d in methods.items():
+                            if m in ["get","post","put","patch","delete"]:
+                                content += f"{m.upper()} {path} - {d.get('summary','')}\n"
+                    base.update(type="openapi", title=data.get("info",{}).get("title", f.stem))
+                    return base, make_passages(base, content)
+                base.update(type="json", title=f.stem.replace("_", " ").title())
+                return base, make_passages(base, json.dumps(data, indent=2)[:10000])
 
-            # Scoring
-            score = 0
-            score += sum(3 for t in terms if t in title)  # Title matches worth more
-            score += sum(1 for t in terms if t in content)
-            score += 10 if query.lower() in content else 0  # Exact match bonus
-            score += 5 if query.lower() in title else 0
+            if f.suffix == ".txt":  # KB articles, guides
+                base["type"] = "text"
+                return base, make_passages(base, open(f, encoding="utf-8").read())
 
-            if score > 0:
-                results.append({"doc": doc, "score": score})
+            if f.suffix == ".pdf":
+                if f not in pdf_pages:
+                    return None
+                base.update(type="pdf", title=f.stem.replace("-", " ").replace("_", " ").title())
+                passages = []
+                for page_no, page in enumerate(pdf_pages[f], 1):
+                    text = page[:self.pdf_page_chars] if self.pdf_page_chars else page
+                    if text.strip():
+                        passages.extend(make_passages(base, text, page_no))
+                return base, passages
 
-        results.sort(key=lambda x: x["score"], reverse=True)
-        return results[:top_k]
+            # HTML: one run of passages per section, located by its heading path
+            base["type"] = "html"
+            passages = []
+            offset = 0
 
-    def query(self, q: str, category: str = None) -> str:
+            def add_section(path, text):
+                nonlocal offset
+                passages.extend(make_passages(base, text, section=" > ".join(path) or None, offset=offset))
+                offset += len(text.encode("utf-8", "replace")) + 1
+
+            extract_html_sections(f, add_section)
+            return base, passages
+        except Exception:
+            return base, []
+
+    def search(self, query: str, top_k: int = 5, category: str = None) -> List[Dict]:
+        """Keyword search with optional category filter (served from the query cache
+        while the index generation is unchanged)"""
+        key = QueryCache.key(query, category, top_k)
+        results = self.cache.get(key, self.index.generation)
+        if results is None:
+            results = [{"doc": doc, "score": score, "snippet": snippet}
+                       for score, doc, snippet in self.index.search(query, top_k, category)]
+            self.cache.put(key, self.index.generation, results)
+        return list(results)
+
+    def query(self, q: str, category: str = None, top_k: int = 5) -> str:
         """Query and format results"""
-        results = self.search(q, category=category)
+        results = self.search(q, top_k=top_k, category=category)
         if not results:
             return f"No results found for: {q}"
 
@@ -175,23 +803,26 @@ class OracleRAG:
         for i, r in enumerate(results, 1):
             doc = r["doc"]
             out.append(f"### {i}. {doc['title']} (score: {r['score']})")
-            out.append(f"Category: {doc['category']} | Type: {doc['type']} | File: {doc['file']}")
-            snippet = doc["content"][:500] + "..." if len(doc["content"]) > 500 else doc["content"]
-            out.append(f"```\n{snippet}\n```\n")
+            out.append(f"Category: {doc['category']} | Type: {doc['type']} | File: {locate(doc)}")
+            out.append(f"> {r['snippet']}\n")
         return "\n".join(out)
 
     def list_docs(self, category: str = None) -> str:
-        """List all indexed documents"""
+        """List all indexed documents (one line per source file, from the manifest)"""
         lines = ["## Oracle Documentation Index\n"]
 
         by_category = {}
-        for doc in self.docs:
-            cat = doc.get("category", "other")
+        total = 0
+        for rel, entry in self.index.manifest.items():
+            if entry["pids"][0] == entry["pids"][1]:  # unreadable or empty
+                continue
+            total += 1
+            cat = entry.get("category", "other")
             if category and cat != category:
                 continue
             if cat not in by_category:
                 by_category[cat] = []
-            by_category[cat].append(doc)
+            by_category[cat].append(dict(entry, file=Path(rel).name))
 
         for cat, docs in sorted(by_category.items()):
             lines.append(f"\n### {cat.title()} ({len(docs)} docs)")
@@ -200,34 +831,150 @@ class OracleRAG:
             if len(docs) > 20:
                 lines.append(f"  ... and {len(docs) - 20} more")
 
-        lines.append(f"\nTotal: {len(self.docs)} documents")
+        lines.append(f"\nTotal: {total} documents ({self.index.passage_count} passages)")
         return "\n".join(lines)
 
     def list_kb_articles(self) -> str:
         """List MOS KB articles"""
-        if not self.kb_articles:
+        if not self.index.kb:
             return "No MOS KB articles found. Add .txt files with KB IDs to private/"
 
         lines = ["## MOS KB Articles\n"]
         for kb_id, filename in sorted(self.kb_articles.items()):
             lines.append(f"  - {kb_id}: {filename}")
-        lines.append(f"\nTotal: {len(self.kb_articles)} KB articles")
+        lines.append(f"\nTotal: {len(self.index.kb)} KB articles")
         return "\n".join(lines)
 
     def get_kb(self, kb_id: str) -> str:
-        """Get specific KB article content"""
-        # Normalize KB ID
-        kb_id = kb_id.upper().replace(" ", "")
-        if not kb_id.startswith("KB"):
-            kb_id = f"KB{kb_id}"
+        """Get specific KB article content ('KB123', '123', 'Doc ID: 123.1'). Two dict lookups
+        and one slice of the shard's content; a bare number also finds its .1 revision."""
+        key = normalize_kb_id(kb_id) or ""
+        refs = self.index.kb.get(key) or ("." not in key and self.index.kb.get(f"{key}.1"))
+        if not refs:
+            return f"KB article '{kb_id}' not found. Use --list-kb to see available articles."
+
+        label, rel = refs[0]
+        entry = self.index.manifest[rel]
+        return f"## {entry['title']}\n\nFile: {Path(rel).name} ({label})\n\n{self.index.text(rel, 5000)}"
 
-        for doc in self.docs:
-            if kb_id in doc["file"].upper() or kb_id in doc["content"][:1000].upper():
-                return f"## {doc['title']}\n\nFile: {doc['file']}\n\n{doc['content'][:5000]}"
+MCP_TOOLS = [
+    {"name": "search",
+     "description": "Search Oracle/PeopleSoft documentation (PeopleBooks, MOS KB articles, API specs, patch notes). "
+                    "Returns ranked passages with file/page and a keyword-in-context snippet.",
+     "inputSchema": {"type": "object", "properties": {
+         "query": {"type": "string", "description": "Keywords or an exact phrase"},
+         "category": {"type": "string", "enum": [c for _, c in CATEGORIES], "description": "Only search this category"},
+         "top_k": {"type": "integer", "minimum": 1, "maximum": 50, "default": 5}},
+         "required": ["query"]}},
+    {"name": "get_kb",
+     "description": "Full text of a My Oracle Support KB article by id ('KB123456', 'Doc ID 1234567.1' or the bare number)",
+     "inputSchema": {"type": "object", "properties": {"kb_id": {"type": "string"}}, "required": ["kb_id"]}},
+    {"name": "list_docs",
+     "description": "List the indexed documents, grouped by category",
+     "inputSchema": {"type": "object", "properties": {
+         "category": {"type": "string", "enum": [c for _, c in CATEGORIES]}}}},
+    {"name": "list_kb",
+     "description": "List the indexed MOS KB article ids",
+     "inputSchema": {"type": "object", "properties": {}}},
+]
 
-        return f"KB article '{kb_id}' not found. Use --list-kb to see available articles."
+class RPCError(Exception):
+    """Answered as a JSON-RPC error object with this code"""
+    code = -32603
+
+class MethodNotFound(RPCError):
+    code = -32601
+
+class InvalidParams(RPCError):
+    code = -32602
+
+def serve_mcp(stdin=None, stdout=None):
+    """Model Context Protocol server over stdio with the index loaded once.
+
+    Reads newline-delimited JSON-RPC 2.0 messages and exposes MCP_TOOLS. The index
+    loads in the background, so initialize is answered at once and the first tool
+    call waits for it. Tool calls only read the loaded index, so they run on a
+    thread pool and answers are written (whole lines, under a lock) as they finish,
+    possibly out of order. Progress output goes to stderr.
+    """
+    stdin = stdin or sys.stdin.buffer
+    stdout = stdout or sys.stdout.buffer
+    sys.stdout = sys.stderr  # prints must not corrupt the protocol stream
+    pool = ThreadPoolExecutor(max_workers=MCP_WORKERS)
+    loading = pool.submit(OracleRAG)
+    lock = threading.Lock()
+
+    def send(message):
+        data = json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n"
+        with lock:
+            stdout.write(data)
+            stdout.flush()
+
+    def call_tool(name, args):
+        rag = loading.result()
+        if name == "search":
+            top_k = args.get("top_k", 5)
+            if not isinstance(top_k, int) or isinstance(top_k, bool) or not 1 <= top_k <= 50:
+                raise ValueError(f"top_k must be an integer from 1 to 50, got {top_k!r}")
+            return rag.query(str(args["query"]), args.get("category"), top_k)
+        if name == "get_kb":
+            return rag.get_kb(str(args["kb_id"]))
+        if name == "list_docs":
+            return rag.list_docs(args.get("category"))
+        return rag.list_kb_articles()
+
+    def handle(message):
+        method, params = message.get("method"), message.get("params") or {}
+        if method == "initialize":
+            return {"protocolVersion": params.get("protocolVersion", MCP_PROTOCOL_VERSION),
+                    "capabilities": {"tools": {}},
+                    "serverInfo": {"name": "oracle-docs", "version": "1.0"}}
+        if method == "ping":
+            return {}
+        if method == "tools/list":
+            return {"tools": MCP_TOOLS}
+        if method == "tools/call":
+            name = params.get("name")
+            if name not in {tool["name"] for tool in MCP_TOOLS}:
+                raise InvalidParams(f"Unknown tool: {name}")
+            try:
+                return {"content": [{"type": "text", "text": call_tool(name, params.get("arguments") or {})}]}
+            except Exception as e:  # reported to the model rather than as a protocol error
+                detail = f"missing argument {e}" if isinstance(e, KeyError) else e
+                return {"content": [{"type": "text", "text": f"{name} failed: {detail}"}], "isError": True}
+        raise MethodNotFound(f"Method not found: {method}")
+
+    def respond(message):
+        try:
+            send({"jsonrpc": "2.0", "id": message["id"], "result": handle(message)})
+        except Exception as e:
+            code = e.code if isinstance(e, RPCError) else RPCError.code
+            send({"jsonrpc": "2.0", "id": message["id"], "error": {"code": code, "message": str(e)}})
+
+    for line in stdin:
+        if not line.strip():
+            continue
+        try:
+            message = json.loads(line)
+        except ValueError:
+            send({"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}})
+            continue
+        if not isinstance(message, dict):  # e.g. a batch array or a bare value
+            send({"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}})
+            continue
+        if "id" not in message:  # notifications (initialized, cancelled) need no answer
+            continue
+        if message.get("method") == "tools/call":
+            pool.submit(respond, message)
+        else:
+            respond(message)
+    pool.shutdown(wait=True)
 
 def main():
+    if sys.argv[1:2] == ["--mcp"]:
+        serve_mcp()
+        return
+
     rag = OracleRAG()
 
     if len(sys.argv) < 2:
@@ -238,7 +985,9 @@ def main():
         print("  python oracle_rag.py --list-kb         # List MOS KB articles")
         print("  python oracle_rag.py --kb <id>         # Get specific KB article")
         print("  python oracle_rag.py --category <cat>  # Filter by category")
+        print("  python oracle_rag.py --stats           # Query cache hit/miss counters")
         print("  python oracle_rag.py --interactive     # Interactive mode")
+        print("  python oracle_rag.py --mcp             # MCP server on stdio (index kept loaded)")
         print("\nCategories: public, private, peopletools, integration, patches")
         return
 
@@ -249,6 +998,8 @@ def main():
         print(rag.list_docs(cat))
     elif arg == "--list-kb":
         print(rag.list_kb_articles())
+    elif arg == "--stats":
+        print(rag.cache.report())
     elif arg == "--kb":
         if len(sys.argv) > 2:
             print(rag.get_kb(sys.argv[2]))
@@ -273,6 +1024,8 @@ def main():
                         print(rag.list_kb_articles())
                     elif q.startswith("--kb "):
                         print(rag.get_kb(q[5:].strip()))
+                    elif q == "--stats":
+                        print(rag.cache.report())
                 elif q:
                     print(rag.query(q))
             except (KeyboardInterrupt, EOFError):
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""RAG common - helpers shared by workday_docs/workday_rag.py and oracle_docs/oracle_rag.py
+
+Both engines put the repository root on sys.path and import from here: tokenizing,
+passage splitting, PDF page extraction and its cache, binary snapshots, keyword-in-context
+snippets and the query-result cache.
+"""
+
+import os, json, re, hashlib, mmap, struct, threading, atexit, pickle, tempfile, contextlib, importlib.util
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Dict
+
+# Sources are indexed as passages of about this many characters (one PDF page never spans two sources)
+PASSAGE_CHARS = 1000
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens; underscores and punctuation split terms"""
+    return TOKEN_RE.findall(text.lower())
+
+def module_available(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+# PyMuPDF is only probed here: it is slow to import and only needed for new/changed PDFs
+PDF_AVAILABLE = module_available("fitz")
+
+def file_sha1(path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+# Process umask, read once (it can only be read by setting it): mkstemp files are private
+# (0600), so temp files are given the mode a plain open() would have created
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+def temp_path(path: Path, suffix: str = ".tmp") -> Path:
+    """A new, uniquely named empty file next to path, for writing what then replaces path"""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=suffix)
+    os.close(fd)
+    os.chmod(tmp, 0o666 & ~UMASK)
+    return Path(tmp)
+
+@contextlib.contextmanager
+def atomic_write(path: Path, mode: str = "wb", **kwargs):
+    """Write path through a temp_path() file that replaces it once the block completes,
+    so concurrent writers (a CLI rebuild next to the daemon) never share a temp file"""
+    tmp = temp_path(path)
+    try:
+        with open(tmp, mode, **kwargs) as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            tmp.unlink()
+        raise
+
+def extract_pdf_pages(path):
+    """Full text of every page of one PDF (runs inside a pool worker)"""
+    import fitz  # PyMuPDF
+    doc = fitz.open(path)
+    try:
+        return [page.get_text() for page in doc]
+    finally:
+        doc.close()
+
+def load_pdf_pages(pdf_files, cache_dir: Path, root: Path, workers: int = None) -> Dict:
+    """Per-page text for each PDF, served from a sidecar cache keyed by content hash.
+
+    cache_dir/<sha1>.json holds the pages of one PDF; cache_dir/files.json maps path
+    relative to root -> size/mtime/sha1 so unchanged files are not even re-hashed
+    (entries of files that no longer exist are dropped, and so are page files that no
+    entry refers to any more). Uncached PDFs are extracted
+    across a process pool. Returns {path: [page text]}; PDFs that are uncached while
+    PyMuPDF is missing, or that fail to open, are omitted.
+    """
+    cache_dir.mkdir(exist_ok=True)
+    stat_file = cache_dir / "files.json"
+    try:
+        known = json.load(open(stat_file, encoding="utf-8"))
+    except Exception:
+        known = {}
+    seen = {key: entry for key, entry in known.items() if (root / key).exists()}
+    pages = {}
+    todo = {}
+    for f in pdf_files:
+        key = f.relative_to(root).as_posix()
+        st = f.stat()
+        entry = known.get(key)
+        if not entry or entry["size"] != st.st_size or entry["mtime_ns"] != st.st_mtime_ns:
+            entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": file_sha1(f)}
+        seen[key] = entry
+        cached = cache_dir / f"{entry['sha1']}.json"
+        if cached.exists():
+            try:
+                pages[f] = json.load(open(cached, encoding="utf-8"))["pages"]
+                continue
+            except Exception:
+                pass
+        todo[f] = cached
+    if todo and PDF_AVAILABLE:
+        files = list(todo)
+        workers = workers or min(len(files), os.cpu_count() or 1)
+        extracted = {}
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {f: pool.submit(extract_pdf_pages, str(f)) for f in files}
+                for f, fut in futures.items():
+                    try:
+                        extracted[f] = fut.result()
+                    except Exception:
+                        pass
+        else:
+            for f in files:
+                try:
+                    extracted[f] = extract_pdf_pages(str(f))
+                except Exception:
+                    pass
+        for f, text in extracted.items():
+            pages[f] = text
+            with atomic_write(todo[f], "w", encoding="utf-8") as out:
+                json.dump({"file": f.name, "pages": text}, out)
+        print(f"Extracted {len(extracted)} PDFs with {workers} worker(s)")
+    if seen != known:
+        with atomic_write(stat_file, "w", encoding="utf-8") as out:
+            json.dump(seen, out, indent=1)
+        live = {entry["sha1"] for entry in seen.values()}
+        for cached in cache_dir.glob("*.json"):  # pages of PDFs that were changed or deleted
+            if cached != stat_file and cached.stem not in live:
+                with contextlib.suppress(OSError):
+                    cached.unlink()
+    return pages
+
+def split_passages(text: str, size: int = PASSAGE_CHARS) -> List[tuple]:
+    """Split text into (start, end, section) passages of about size characters.
+
+    Passages break on line boundaries and always start fresh at a markdown
+    heading; section is the heading in effect at the passage start.
+    """
+    passages = []
+    section = None
+    start = end = 0
+    start_section = None
+    for line in text.splitlines(keepends=True):
+        heading = line.startswith("#")
+        if end > start and (heading or end - start + len(line) > size):
+            passages.append((start, end, start_section))
+            start = end
+        if heading:
+            section = line.strip("# \r\n") or section
+        if end == start:
+            start_section = section
+        end += len(line)
+        while end - start > size:  # a single over-long line
+            cut = text.rfind(" ", start + size // 2, start + size)
+            cut = cut if cut > start else start + size
+            passages.append((start, cut, start_section))
+            start = cut
+    if end > start or not passages:
+        passages.append((start, end, start_section))
+    return passages
+
+def make_passages(base: Dict, text: str, page: int = None, section: str = None, offset: int = 0) -> List[Dict]:
+    """Passage records for one source text; offset is the UTF-8 byte offset of the passage
+    in that text (plus the given offset of the text itself). section is used where the
+    text has no markdown heading of its own."""
+    records = []
+    byte_pos = char_pos = 0
+    for i, (start, end, heading) in enumerate(split_passages(text)):
+        byte_pos += len(text[char_pos:start].encode("utf-8", "replace"))
+        char_pos = start
+        records.append(dict(base, content=text[start:end], page=page, section=heading or section,
+                            offset=offset + byte_pos, passage=i))
+    return records
+
+def locate(doc: Dict) -> str:
+    """File plus page/section/offset of a passage, e.g. 'guide.pdf (page 12)'"""
+    where = []
+    if doc.get("page"):
+        where.append(f"page {doc['page']}")
+    if doc.get("section"):
+        where.append(f"section: {doc['section']}")
+    if not where and doc.get("offset"):
+        where.append(f"byte {doc['offset']}")
+    return f"{doc['file']} ({', '.join(where)})" if where else doc["file"]
+
+def kwic(text: str, hits: List[tuple], width: int) -> str:
+    """Keyword-in-context snippet of about width characters of text.
+
+    hits are the (start, end, term) character spans of query terms, as recorded in
+    the index, so the text is never searched. The window holding the most distinct
+    terms (then the most hits) is shown with each hit marked as **term**; without
+    hits, the start of the text is.
+    """
+    hits = sorted(hits)
+    best, left, counts = None, 0, {}
+    for right, (_, end, term) in enumerate(hits):
+        counts[term] = counts.get(term, 0) + 1
+        while end - hits[left][0] > width:
+            counts[hits[left][2]] -= 1
+            if not counts[hits[left][2]]:
+                del counts[hits[left][2]]
+            left += 1
+        if best is None or (len(counts), right - left) > best[0]:
+            best = ((len(counts), right - left), hits[left][0], end)
+    if best is None:
+        a = lo = hi = 0
+    else:
+        _, lo, hi = best
+        a = max(0, min(lo - (width - (hi - lo)) // 2, len(text) - width))
+    b = min(len(text), a + width)
+    if a > 0:  # start and end on word boundaries
+        cut = text.find(" ", a, lo)
+        a = cut + 1 if cut != -1 else a
+    if b < len(text):
+        cut = text.rfind(" ", hi, b)
+        b = cut if cut != -1 else b
+    pieces, pos = [], a
+    for start, end, _ in hits:
+        if start >= pos and end <= b:
+            pieces += [text[pos:start], "**", text[start:end], "**"]
+            pos = end
+    pieces.append(text[pos:b])
+    return ("..." if a > 0 else "") + " ".join("".join(pieces).split()) + ("..." if b < len(text) else "")
+
+def write_snapshot(path: Path, magic: bytes, meta: Dict, sections: Dict):
+    """Atomically write a binary snapshot: magic, u32 header length, a JSON header (meta
+    plus name -> [offset, size, typecode] of each section), then the sections (arrays or
+    bytes), each 8-byte aligned so they can be cast in place once memory-mapped"""
+    layout, pos = {}, 0
+    for name, data in sections.items():
+        size = len(data) * data.itemsize if isinstance(data, array) else len(data)
+        layout[name] = [pos, size, data.typecode if isinstance(data, array) else "B"]
+        pos += size + (-size % 8)
+    header = json.dumps({"meta": meta, "sections": layout}).encode("utf-8")
+    head = magic + struct.pack("<I", len(header)) + header
+    head += b"\0" * (-len(head) % 8)
+    with atomic_write(path) as f:
+        f.write(head)
+        for name, data in sections.items():
+            if isinstance(data, array):
+                data.tofile(f)
+            else:
+                f.write(data)
+            f.write(b"\0" * (-layout[name][1] % 8))
+
+class Snapshot:
+    """Read-only, memory-mapped view of a file written by write_snapshot with this magic.
+
+    Opening only parses the header; section() returns zero-copy memoryviews, so
+    pages are read (and shared between processes through the OS page cache) only
+    as they are touched. text() reads passage text from the "content" section.
+    """
+
+    def __init__(self, path: Path, magic: bytes):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        n = len(magic)
+        if self.mm[:n] != magic:
+            raise ValueError(f"{path} is not a snapshot")
+        (size,) = struct.unpack_from("<I", self.mm, n)
+        header = json.loads(self.mm[n + 4:n + 4 + size])
+        self.meta = header["meta"]
+        self.layout = header["sections"]
+        self.base = n + 4 + size + (-(n + 4 + size) % 8)
+        self.view = memoryview(self.mm)
+        self.content = None
+
+    def section(self, name: str) -> memoryview:
+        offset, size, typecode = self.layout[name]
+        view = self.view[self.base + offset:self.base + offset + size]
+        return view if typecode == "B" else view.cast(typecode)
+
+    def json(self, name: str):
+        return json.loads(bytes(self.section(name)))
+
+    def text(self, start: int, length: int) -> str:
+        if self.content is None:
+            self.content = self.section("content")
+        return bytes(self.content[start:start + length]).decode("utf-8", "replace")
+
+class QueryCache:
+    """Bounded LRU of search results keyed by (normalized query, filter, top_k).
+
+    Entries belong to one index generation and are all dropped as soon as a lookup
+    sees another. With a path, entries and hit/miss counters are loaded on first use
+    and written back (atomically) at exit if the entries changed, so they survive
+    between runs. A file written with another version (result format) is ignored.
+    Thread-safe.
+    """
+
+    def __init__(self, size: int = 256, path: Path = None, version: int = 1):
+        self.size = size
+        self.path = path
+        self.version = version
+        self.entries = OrderedDict()
+        self.generation = None
+        self.hits = self.misses = self.invalidations = 0
+        self.lock = threading.Lock()
+        self.loaded = path is None
+        self.dirty = False
+        if path:
+            atexit.register(self.save)
+
+    @staticmethod
+    def key(query, *args):
+        return (" ".join(query.lower().split()),) + args
+
+    def load(self):
+        self.loaded = True
+        try:
+            with open(self.path, "rb") as f:
+                data = pickle.load(f)
+            if data["version"] == self.version:
+                self.entries = OrderedDict(data["entries"][-self.size:])
+                self.generation = data["generation"]
+                self.hits, self.misses, self.invalidations = data["hits"], data["misses"], data["invalidations"]
+        except Exception:
+            pass
+
+    def save(self):
+        """Best effort: a cache that cannot be written is simply not persisted"""
+        if not (self.path and self.dirty):
+            return
+        with self.lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with atomic_write(self.path) as f:
+                    pickle.dump({"version": self.version, "generation": self.generation,
+                                 "entries": list(self.entries.items()), "hits": self.hits, "misses": self.misses,
+                                 "invalidations": self.invalidations}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            except OSError:
+                return
+            self.dirty = False
+
+    def get(self, key, generation):
+        with self.lock:
+            if not self.loaded:
+                self.load()
+            if generation != self.generation:
+                if self.entries:
+                    self.invalidations += 1
+                self.entries.clear()
+                self.generation = generation
+                self.dirty = True
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, generation, value):
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+            self.dirty = True
+
+    def stats(self):
+        with self.lock:
+            if not self.loaded:
+                self.load()
+            lookups = self.hits + self.misses
+            return {"entries": len(self.entries), "size": self.size, "generation": self.generation,
+                    "hits": self.hits, "misses": self.misses, "invalidations": self.invalidations,
+                    "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                    "path": str(self.path) if self.path else None}
+
+    def report(self):
+        s = self.stats()
+        return "\n".join([
+            "## Query cache\n",
+            f"Entries: {s['entries']}/{s['size']} (generation {s['generation']})",
+            f"Hits: {s['hits']}  Misses: {s['misses']}  Hit rate: {s['hit_rate']:.1%}",
+            f"Invalidations: {s['invalidations']}",
+            f"File: {s['path'] or 'not persisted'}",
+        ])
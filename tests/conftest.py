@@ -0,0 +1,46 @@
+"""Fixtures shared by the RAG tests.
+
+The engines and tools read their directories and settings from the environment
+when they are imported, so every test gets freshly executed modules bound to a
+temporary tree (loading one again with the same environment is a new process
+start as far as its caches are concerned).
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))  # rag_common, as the engines import it
+
+
+def load_module(path: Path):
+    """Execute a source file as a new module object (tools/ scripts have hyphenated names)"""
+    spec = importlib.util.spec_from_file_location(path.stem.replace("-", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def load_workday(tmp_path, monkeypatch):
+    """Loader of workday_rag bound to an empty docs tree (hashing embeddings, in-memory query cache)"""
+    docs = tmp_path / "workday"
+    for folder in ("public", "private", "wsdl"):
+        (docs / folder).mkdir(parents=True)
+    monkeypatch.setenv("WORKDAY_RAG_DOCS_DIR", str(docs))
+    monkeypatch.setenv("WORKDAY_RAG_QUERY_CACHE", "0")
+    monkeypatch.setenv("WORKDAY_RAG_EMBED_MODEL", "hashing")
+    return lambda: load_module(REPO / "workday_docs" / "workday_rag.py")
+
+
+@pytest.fixture
+def load_oracle(tmp_path, monkeypatch):
+    """Loader of oracle_rag bound to an empty docs tree (in-memory query cache)"""
+    docs = tmp_path / "oracle"
+    docs.mkdir()
+    monkeypatch.setenv("ORACLE_RAG_DOCS_DIR", str(docs))
+    monkeypatch.setenv("ORACLE_RAG_QUERY_CACHE", "0")
+    return lambda: load_module(REPO / "oracle_docs" / "oracle_rag.py")
@@ -0,0 +1,174 @@
+"""tools/index-documents.py with LangChain replaced by in-memory stand-ins"""
+
+import os
+import sys
+import types
+
+import pytest
+
+from conftest import REPO, load_module
+
+
+class Document:
+    def __init__(self, page_content, metadata=None):
+        self.page_content, self.metadata = page_content, metadata or {}
+
+
+class Splitter:
+    """One chunk per paragraph"""
+
+    def __init__(self, **settings):
+        pass
+
+    def split_documents(self, docs):
+        return [Document(part, dict(doc.metadata)) for doc in docs for part in doc.page_content.split("\n\n")]
+
+
+class Embeddings:
+    loads = 0
+
+    def __init__(self, **settings):
+        Embeddings.loads += 1
+
+
+class Chroma:
+    """Chunks by id, shared by every instance like a persist_directory on disk"""
+    rows = {}
+
+    def __init__(self, persist_directory, embedding_function=None):
+        self.embeddings = embedding_function
+
+    def add_documents(self, docs, ids):
+        assert self.embeddings is not None
+        Chroma.rows.update(zip(ids, docs))
+
+    def delete(self, ids):
+        for cid in ids:
+            Chroma.rows.pop(cid, None)
+
+    def get(self, where, include):
+        return {"ids": [cid for cid, doc in Chroma.rows.items() if doc.metadata["source"] == where["source"]]}
+
+
+def fake_langchain(monkeypatch):
+    modules = {
+        "langchain": {},
+        "langchain.text_splitter": {"RecursiveCharacterTextSplitter": Splitter},
+        "langchain.docstore": {},
+        "langchain.docstore.document": {"Document": Document},
+        "langchain_community": {},
+        "langchain_community.vectorstores": {"Chroma": Chroma},
+        "langchain_community.embeddings": {"HuggingFaceEmbeddings": Embeddings},
+        "langchain_community.document_loaders": {"DirectoryLoader": None, "TextLoader": None},
+    }
+    for name, attrs in modules.items():
+        monkeypatch.setitem(sys.modules, name, types.SimpleNamespace(**attrs))
+
+
+@pytest.fixture
+def idx(tmp_path, monkeypatch):
+    """index-documents with its store and manifest under tmp_path and one docs folder"""
+    fake_langchain(monkeypatch)
+    monkeypatch.setattr(Chroma, "rows", {})
+    monkeypatch.setattr(Embeddings, "loads", 0)
+    module = load_module(REPO / "tools" / "index-documents.py")
+    monkeypatch.setattr(module, "VECTOR_STORE_PATH", tmp_path / "store")
+    monkeypatch.setattr(module, "MANIFEST_PATH", tmp_path / "store" / "index-manifest.json")
+    module.folder = tmp_path / "docs"
+    module.folder.mkdir()
+    return module
+
+
+def stored(idx):
+    """{filename: [chunk texts]} currently in the store"""
+    found = {}
+    for doc in Chroma.rows.values():
+        found.setdefault(doc.metadata["filename"], []).append(doc.page_content)
+    return {name: sorted(texts) for name, texts in found.items()}
+
+
+def touch(path):
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+# Incremental re-indexing via a per-source manifest
+
+def test_plan_changes_compares_with_the_manifest(idx):
+    for name in ("keep.md", "edit.md", "touch.md", "gone.md"):
+        (idx.folder / name).write_text(name)
+    idx.index_documents([idx.folder])
+    manifest = idx.load_manifest()
+
+    (idx.folder / "edit.md").write_text("edited")
+    touch(idx.folder / "touch.md")
+    (idx.folder / "gone.md").unlink()
+    (idx.folder / "new.txt").write_text("new")
+    new, changed, removed, unchanged, contents = idx.plan_changes([idx.folder], manifest)
+    assert [new, changed, removed] == [[str(idx.folder / "new.txt")], [str(idx.folder / "edit.md")],
+                                       [str(idx.folder / "gone.md")]]
+    assert sorted(unchanged) == [str(idx.folder / "keep.md"), str(idx.folder / "touch.md")]
+    assert set(contents) == {str(idx.folder / "new.txt"), str(idx.folder / "edit.md")}
+    assert contents[str(idx.folder / "new.txt")][:2] == ("text", "new")
+    # a touched file's new mtime is recorded so it is not read again
+    assert manifest[str(idx.folder / "touch.md")]["mtime_ns"] == (idx.folder / "touch.md").stat().st_mtime_ns
+
+
+def test_unchanged_tree_embeds_nothing(idx):
+    (idx.folder / "a.md").write_text("one\n\ntwo")
+    assert idx.index_documents([idx.folder]) is not None
+    assert Embeddings.loads == 1
+    touch(idx.folder / "a.md")
+    assert idx.index_documents([idx.folder]) is None
+    assert Embeddings.loads == 1  # the model is never loaded
+    assert stored(idx) == {"a.md": ["one", "two"]}
+
+
+def test_empty_first_run_writes_a_manifest(idx):
+    assert not idx.VECTOR_STORE_PATH.exists()
+    assert idx.index_documents([idx.folder]) is None
+    assert idx.load_manifest() == {} and Embeddings.loads == 0
+
+
+def test_changed_and_removed_files_replace_their_chunks(idx):
+    (idx.folder / "a.md").write_text("one\n\ntwo\n\nthree")
+    (idx.folder / "b.md").write_text("bee")
+    idx.index_documents([idx.folder])
+    (idx.folder / "a.md").write_text("uno")
+    (idx.folder / "b.md").unlink()
+    idx.index_documents([idx.folder])
+    assert stored(idx) == {"a.md": ["uno"]}
+    assert idx.load_manifest()[str(idx.folder / "a.md")]["chunk_ids"] == list(Chroma.rows)
+
+
+def test_settings_change_invalidates_the_manifest(idx, monkeypatch):
+    (idx.folder / "a.md").write_text("one\n\ntwo")
+    idx.index_documents([idx.folder])
+    assert idx.load_manifest()[str(idx.folder / "a.md")]["sha1"]
+    assert idx.load_manifest(full=True)[str(idx.folder / "a.md")]["sha1"] is None
+
+    monkeypatch.setattr(idx, "INDEX_SETTINGS", dict(idx.INDEX_SETTINGS, chunk_size=1000))
+    assert idx.load_manifest()[str(idx.folder / "a.md")]["sha1"] is None
+    idx.index_documents([idx.folder])
+    assert Embeddings.loads == 2 and stored(idx) == {"a.md": ["one", "two"]}  # re-embedded, not duplicated
+
+
+def test_store_without_a_manifest_is_not_duplicated(idx):
+    (idx.folder / "a.md").write_text("one\n\ntwo")
+    idx.index_documents([idx.folder])
+    idx.MANIFEST_PATH.unlink()
+    Chroma.rows["legacy-id"] = Document("old", {"source": str(idx.folder / "a.md"), "filename": "a.md"})
+    (idx.VECTOR_STORE_PATH / "chroma.sqlite3").write_bytes(b"")
+    idx.index_documents([idx.folder])
+    assert stored(idx) == {"a.md": ["one", "two"]}
+
+
+def test_manifest_is_written_atomically(idx, monkeypatch):
+    (idx.folder / "a.md").write_text("one")
+    idx.index_documents([idx.folder])
+    before = idx.MANIFEST_PATH.read_text()
+    monkeypatch.setattr(idx.json, "dump", lambda *a, **k: 1 / 0)  # crash mid-write
+    with pytest.raises(ZeroDivisionError):
+        idx.save_manifest({})
+    assert idx.MANIFEST_PATH.read_text() == before
+    assert [p.name for p in idx.VECTOR_STORE_PATH.iterdir()] == ["index-manifest.json"]
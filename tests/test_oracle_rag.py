@@ -0,0 +1,446 @@
+"""Behavior of oracle_docs/oracle_rag.py against small generated corpora"""
+
+import io
+import json
+import os
+import sys
+
+import pytest
+
+
+def write(docs_dir, relpath, text):
+    path = docs_dir / relpath
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+# Passages with offsets
+
+def test_text_sources_are_indexed_as_located_passages(load_oracle):
+    orag = load_oracle()
+    body = "# Setup\n" + "Configure the integration broker gateway. " * 30 + "\n# Tuning\nSet the queue size.\n"
+    write(orag.DOCS_DIR, "peopletools/broker_guide.txt", body)
+    rag = orag.OracleRAG()
+    passages = [d for d in rag.docs if d["file"] == "broker_guide.txt"]
+    assert len(passages) > 1 and "".join(p["content"] for p in passages) == body
+    data = body.encode("utf-8")
+    assert all(data[p["offset"]:].startswith(p["content"].encode("utf-8")) for p in passages)
+    tuning = rag.search("queue size")[0]["doc"]
+    assert (tuning["section"], tuning["category"]) == ("Tuning", "peopletools")
+    assert orag.locate(tuning) == "broker_guide.txt (section: Tuning)"
+
+
+def oracle_corpus(orag):
+    """One or two sources in each category directory"""
+    write(orag.DOCS_DIR, "public/hr_api.json", json.dumps(
+        {"info": {"title": "HR API"}, "paths": {"/employees": {"get": {"summary": "List employees"}}}}))
+    write(orag.DOCS_DIR, "private/KB1001_payroll_fix.txt",
+          "KB1001\nPayroll calculation fails after the tax update.\nApply the payroll patch and rerun.\n")
+    write(orag.DOCS_DIR, "private/process_scheduler.txt", "# Process Scheduler\nServer agents run batch processes.\n")
+    write(orag.DOCS_DIR, "peopletools/broker.html",
+          "<html><body><h1>Integration Broker</h1><p>Gateway setup.</p>"
+          "<h2>Queues</h2><p>Queue partitioning for payroll messages.</p></body></html>")
+    write(orag.DOCS_DIR, "integration/ib_setup.txt", "Configure the integration gateway URL and node passwords.\n")
+    write(orag.DOCS_DIR, "patches/bundle_42.json", json.dumps({"bundle": 42, "fixes": ["payroll rounding"]}))
+
+
+def normalized(index):
+    """Index contents independent of passage numbering: per file its passages, per category
+    every posting as (file, passage within file, positions, character offsets)"""
+    owner = {}
+    for rel, entry in index.manifest.items():
+        for n, pid in enumerate(range(*entry["pids"])):
+            owner[entry["category"], pid] = (rel, n)
+    files = {rel: index.passages(rel) for rel in index.manifest}
+    postings = {}
+    for category, shard in index.shards.items():
+        body = shard.body()
+        for term, (ids, ends, pos, starts) in body["postings"].items():
+            bounds = [0] + list(ends)
+            postings[category, term] = sorted((owner[category, pid], list(pos[bounds[i]:bounds[i + 1]]),
+                                               list(starts[bounds[i]:bounds[i + 1]])) for i, pid in enumerate(ids))
+        for term, ids in body["title_postings"].items():
+            postings[category, "title:" + term] = sorted(owner[category, pid] for pid in ids)
+    return files, postings, sorted((k, sorted(map(tuple, refs))) for k, refs in index.kb.items())
+
+
+# Persistent, incrementally refreshed index
+
+def test_restart_reuses_the_index_without_reading_sources(load_oracle, monkeypatch):
+    orag = load_oracle()
+    oracle_corpus(orag)
+    generation = orag.OracleRAG().index.generation
+    warm = load_oracle()
+    monkeypatch.setattr(warm.OracleRAG, "ingest", lambda *args: pytest.fail("re-ingested an unchanged file"))
+    monkeypatch.setattr(warm, "file_sha1", lambda path: pytest.fail(f"re-hashed {path}"))
+    rag = warm.OracleRAG()
+    assert rag.index.generation == generation and len(rag.index.manifest) == 6
+    assert rag.search("gateway URL", 1)[0]["doc"]["file"] == "ib_setup.txt"
+
+
+def test_touched_files_are_rehashed_but_not_reingested(load_oracle, monkeypatch):
+    orag = load_oracle()
+    oracle_corpus(orag)
+    generation = orag.OracleRAG().index.generation
+    path = orag.DOCS_DIR / "private" / "process_scheduler.txt"
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10**9))
+    warm = load_oracle()
+    monkeypatch.setattr(warm.OracleRAG, "ingest", lambda *args: pytest.fail("re-ingested a touched file"))
+    assert warm.OracleRAG().index.generation == generation
+    assert load_oracle().OracleRAG().index.manifest["private/process_scheduler.txt"]["mtime_ns"] == path.stat().st_mtime_ns
+
+
+def test_changed_and_deleted_files_are_reflected(load_oracle):
+    orag = load_oracle()
+    oracle_corpus(orag)
+    generation = orag.OracleRAG().index.generation
+    write(orag.DOCS_DIR, "integration/ib_setup.txt", "Rotate the keystore certificates yearly.\n")
+    (orag.DOCS_DIR / "patches" / "bundle_42.json").unlink()
+    rag = load_oracle().OracleRAG()
+    assert rag.index.generation == generation + 1
+    assert [r["doc"]["file"] for r in rag.search("keystore")] == ["ib_setup.txt"]
+    assert [r["doc"]["file"] for r in rag.search("gateway URL")] == ["broker.html"]
+    assert "patches/bundle_42.json" not in rag.index.manifest and "patches" not in rag.index.shards
+
+
+def test_pdf_without_text_is_recorded_and_not_retried(load_oracle, monkeypatch):
+    pytest.importorskip("fitz")
+    orag = load_oracle()
+    oracle_corpus(orag)
+    write(orag.DOCS_DIR, "peopletools/scanned.pdf", "not a pdf")
+    rag = orag.OracleRAG()
+    assert rag.index.manifest["peopletools/scanned.pdf"]["pids"] == [0, 0]
+    assert "scanned.pdf" not in rag.list_docs()
+    warm = load_oracle()
+    monkeypatch.setattr(warm, "load_pdf_pages", lambda *args: pytest.fail("retried an unreadable PDF"))
+    monkeypatch.setattr(warm.OracleIndex, "save", lambda self: pytest.fail("saved an unchanged index"))
+    assert warm.OracleRAG().index.generation == rag.index.generation
+
+
+def test_incremental_updates_match_a_full_rebuild(load_oracle):
+    orag = load_oracle()
+    oracle_corpus(orag)
+    # kept after the changed and deleted files of its shard, so its passages are renumbered
+    write(orag.DOCS_DIR, "private/security_roles.txt", "Permission lists grant page access to roles.\n")
+    orag.OracleRAG()
+    write(orag.DOCS_DIR, "private/KB1001_payroll_fix.txt", "KB1001\nPayroll retro calculation needs the new tax tables.\n")
+    write(orag.DOCS_DIR, "private/KB2002_queue.txt", "Doc ID: 2002.1\nQueue stuck in NEW status.\n")
+    (orag.DOCS_DIR / "private" / "process_scheduler.txt").unlink()
+    write(orag.DOCS_DIR, "public/hr_api.json", json.dumps(
+        {"info": {"title": "HR API v2"}, "paths": {"/jobs": {"post": {"summary": "Create job"}}}}))
+    incremental = load_oracle().OracleRAG()
+    rebuilt = load_oracle().OracleRAG(rebuild_index=True)
+
+    assert normalized(incremental.index) == normalized(rebuilt.index)
+    assert incremental.kb_articles == rebuilt.kb_articles
+    for query in ("payroll", "queue status", "tax tables", "gateway", "create job", "roles page access"):
+        results = lambda rag: sorted((r["score"], r["doc"]["file"], r["doc"]["passage"])
+                                     for r in rag.search(query, 50))
+        assert results(incremental) == results(rebuilt)
+
+
+# Hash index for MOS KB lookups
+
+@pytest.mark.parametrize("label, key", [
+    ("KB123", "123"), ("kb 0123", "123"), ("123", "123"), ("KB000", "0"),
+    ("Doc ID: 1234567.1", "1234567.1"), ("doc_id_1234567.1", "1234567.1"), ("1234567.2", "1234567.2"),
+    ("no id here", None),
+])
+def test_normalize_kb_id(load_oracle, label, key):
+    assert load_oracle().normalize_kb_id(label) == key
+
+
+def test_find_kb_ids_in_file_names_and_headers(load_oracle):
+    orag = load_oracle()
+    assert orag.find_kb_ids("KB123456_title.txt") == ["KB123456"]
+    assert orag.find_kb_ids("doc_id_1234567.1.txt", "Doc ID: 1234567.1\nbody") == ["doc_id_1234567.1"]
+    assert orag.find_kb_ids("notes_KB12_and_KB0012.txt", "See Doc ID 99.2") == ["KB12", "Doc ID 99.2"]
+    assert orag.find_kb_ids("guide_2024.txt", "no ids") == []
+
+
+def test_get_kb_finds_articles_by_any_id_form(load_oracle):
+    orag = load_oracle()
+    oracle_corpus(orag)
+    write(orag.DOCS_DIR, "private/doc_id_2001234.1.txt", "Doc ID: 2001234.1\nFirst revision text.\n")
+    write(orag.DOCS_DIR, "private/doc_id_2001234.2.txt", "Doc ID: 2001234.2\nSecond revision text.\n")
+    cold = orag.OracleRAG()
+    warm = load_oracle().OracleRAG()  # mapped shards must read the same text as freshly built ones
+    for rag in (cold, warm):
+        for kb_id in ("KB1001", "1001", "kb 01001"):
+            assert rag.get_kb(kb_id).startswith("## Kb1001 Payroll Fix\n\nFile: KB1001_payroll_fix.txt (KB1001)")
+        assert "Apply the payroll patch" in rag.get_kb("KB1001")
+        assert "Second revision" in rag.get_kb("Doc ID: 2001234.2")
+        assert "First revision" in rag.get_kb("2001234") and "First revision" in rag.get_kb("2001234.1")
+        assert rag.get_kb("KB9999").startswith("KB article 'KB9999' not found")
+    assert cold.kb_articles == {"KB1001": "KB1001_payroll_fix.txt", "doc_id_2001234.1": "doc_id_2001234.1.txt",
+                                "doc_id_2001234.2": "doc_id_2001234.2.txt"}
+
+
+def test_get_kb_returns_the_first_5000_characters_of_every_passage(load_oracle):
+    orag = load_oracle()
+    body = "KB4242 long article\n" + "".join(f"Step {i}: restart the application server domain.\n" for i in range(400))
+    write(orag.DOCS_DIR, "private/KB4242_long.txt", body)
+    orag.OracleRAG()
+    text = load_oracle().OracleRAG().get_kb("KB4242").split("\n\n", 2)[2]
+    assert text == body[:5000]
+
+
+# Category-sharded index
+
+def hits(results):
+    return [(r["score"], r["doc"]["category"], r["doc"]["file"], r["doc"]["passage"]) for r in results]
+
+
+def test_each_category_has_its_own_shard(load_oracle):
+    orag = load_oracle()
+    oracle_corpus(orag)
+    orag.OracleRAG()
+    names = sorted(p.name for p in orag.INDEX_DIR.glob("*.snap"))
+    assert names == ["integration.1.snap", "patches.1.snap", "peopletools.1.snap", "private.1.snap", "public.1.snap"]
+
+
+def test_category_search_only_opens_that_shard(load_oracle):
+    orag = load_oracle()
+    oracle_corpus(orag)
+    orag.OracleRAG()
+    rag = load_oracle().OracleRAG()
+    results = rag.search("payroll", 10, category="private")
+    assert results and {r["doc"]["category"] for r in results} == {"private"}
+    assert [c for c, shard in rag.index.shards.items() if shard._body is not None] == ["private"]
+    assert rag.search("payroll", category="no_such_category") == []
+
+
+def test_unfiltered_search_merges_the_category_results(load_oracle):
+    orag = load_oracle()
+    oracle_corpus(orag)
+    rag = orag.OracleRAG()
+    merged = hits(rag.search("payroll", 50))
+    per_category = [h for _, c in orag.CATEGORIES for h in hits(rag.search("payroll", 50, category=c))]
+    assert sorted(merged) == sorted(per_category)
+    assert [h[0] for h in merged] == sorted((h[0] for h in merged), reverse=True)
+    assert hits(rag.search("payroll", 2)) == merged[:2]
+
+
+def test_damaged_shard_only_reingests_its_category(load_oracle, monkeypatch):
+    orag = load_oracle()
+    oracle_corpus(orag)
+    orag.OracleRAG()
+    (orag.INDEX_DIR / "peopletools.1.snap").write_bytes(b"torn")
+    warm = load_oracle()
+    ingested = []
+    original = warm.OracleRAG.ingest
+    monkeypatch.setattr(warm.OracleRAG, "ingest", lambda self, f, *args: ingested.append(f.name) or original(self, f, *args))
+    rag = warm.OracleRAG()
+    assert ingested == ["broker.html"]
+    assert hits(rag.search("queue partitioning", 1))[0][1:3] == ("peopletools", "broker.html")
+
+
+# Positional postings for phrase bonuses and proximity
+
+def shard_with(orag, tmp_path, *passages):
+    """An in-memory shard of (title, content) passages, in order"""
+    shard = orag.IndexShard(tmp_path, "private")
+    shard.add([{"type": "text", "category": "private", "file": f"p{i}.txt", "title": title, "content": content,
+                "page": None, "section": None, "offset": 0, "passage": 0} for i, (title, content) in enumerate(passages)])
+    return shard
+
+
+def test_phrase_and_span_helpers(load_oracle):
+    orag = load_oracle()
+    positions = orag.token_positions("the broker and the integration broker".split())
+    assert positions == {"the": [0, 3], "broker": [1, 5], "and": [2], "integration": [4]}
+    assert orag.has_phrase(["integration", "broker"], positions)
+    assert not orag.has_phrase(["broker", "integration"], positions)
+    assert orag.min_span({"integration": [4], "and": [2]}) == 2
+    assert orag.min_span({"the": [0, 3], "broker": [1, 5]}) == 1
+
+
+def test_exact_phrase_outranks_scattered_terms(load_oracle, tmp_path):
+    orag = load_oracle()
+    shard = shard_with(orag, tmp_path, ("A", "broker for integration work"), ("B", "the integration broker gateway"))
+    assert [(-score, pid) for score, _, pid in shard.search("integration broker")] == [(12, 1), (2, 0)]
+    titled = shard_with(orag, tmp_path, ("Gateway", "gateway"), ("Broker Gateway Setup", "x"))
+    assert [(-score, pid) for score, _, pid in titled.search("broker gateway")] == [(11, 1), (4, 0)]
+
+
+def test_score_ties_rank_the_tightest_window_first(load_oracle, tmp_path):
+    orag = load_oracle()
+    shard = shard_with(orag, tmp_path,
+                       ("A", "queue " + "filler " * 20 + "restart node"),
+                       ("B", "restart the queue node"),
+                       ("Queue", "unrelated text"))  # same score from its title, but lacks terms in the content
+    results = shard.search("node queue restart", 3)
+    assert [pid for _, _, pid in results] == [1, 0, 2]
+    assert [span for _, span, _ in results] == [3, 22, float("inf")]
+
+
+def test_no_results_are_asked_for(load_oracle, tmp_path):
+    orag = load_oracle()
+    assert shard_with(orag, tmp_path, ("A", "restart the queue")).search("queue", 0) == []
+
+
+# Query-result cache
+
+def test_results_are_cached_until_the_index_generation_changes(load_oracle, monkeypatch):
+    monkeypatch.setenv("ORACLE_RAG_QUERY_CACHE", "1")
+    orag = load_oracle()
+    oracle_corpus(orag)
+    rag = orag.OracleRAG()
+    first = rag.search("payroll")
+    rag.cache.save()
+
+    warm = load_oracle().OracleRAG()
+    monkeypatch.setattr(warm.index, "search", lambda *args: pytest.fail("cache miss"))
+    assert warm.search("  PAYROLL ") == first
+    warm.cache.save()
+
+    write(orag.DOCS_DIR, "integration/payroll_feed.txt", "Payroll payroll payroll interface feed.\n")
+    changed = load_oracle().OracleRAG()
+    assert "payroll_feed.txt" in {r["doc"]["file"] for r in changed.search("payroll")}
+    assert changed.cache.stats()["invalidations"] == 1
+    changed.cache.save()
+
+
+# Streaming, structure-preserving HTML extraction
+
+PEOPLEBOOK_HTML = """<html><head><title>PeopleBook</title><style>h1 { color: red }</style>
+<script>var h2 = "<h2>not a heading</h2>";</script></head>
+<body><nav><a href="/">Home</a> | Contents</nav>
+<p>Preface &amp; conventions</p>
+<h1>Integration   Broker</h1><p>Overview of the broker.</p>
+<h2>Gateways</h2><p>Local and remote</p><p>gateways.</p>
+<h3>Connectors</h3><ul><li>HTTP target</li><li>JMS target</li></ul>
+<h2>Queues</h2><p>Partition queues by <b>EMPLID</b>.</p>
+<h1>Security</h1><p>Node passwords.</p>
+</body></html>"""
+
+EXPECTED_SECTIONS = [
+    ([], "PeopleBook\nPreface & conventions"),  # the <title> text leads the preface
+    (["Integration Broker"], "Integration Broker\nOverview of the broker."),
+    (["Integration Broker", "Gateways"], "Gateways\nLocal and remote\ngateways."),
+    (["Integration Broker", "Gateways", "Connectors"], "Connectors\nHTTP target\nJMS target"),
+    (["Integration Broker", "Queues"], "Queues\nPartition queues by EMPLID."),
+    (["Security"], "Security\nNode passwords."),
+]
+
+
+@pytest.mark.parametrize("chunk_chars", [1 << 16, 7])
+def test_html_sections_follow_the_heading_hierarchy(load_oracle, tmp_path, chunk_chars):
+    orag = load_oracle()
+    path = write(tmp_path, "peoplebook.html", PEOPLEBOOK_HTML)
+    sections = []
+    orag.extract_html_sections(path, lambda heads, text: sections.append((heads, text)), chunk_chars)
+    assert sections == EXPECTED_SECTIONS
+
+
+def test_html_passages_are_located_by_heading_path(load_oracle):
+    orag = load_oracle()
+    write(orag.DOCS_DIR, "peopletools/peoplebook.html", PEOPLEBOOK_HTML)
+    rag = orag.OracleRAG()
+    passages = rag.index.passages("peopletools/peoplebook.html")
+    assert [p["section"] for p in passages] == [" > ".join(h) or None for h, _ in EXPECTED_SECTIONS]
+    text = "\n".join(t for _, t in EXPECTED_SECTIONS).encode("utf-8")
+    assert all(text[p["offset"]:].startswith(p["content"].encode("utf-8")) for p in passages)
+    top = rag.search("partition queues", 1)[0]["doc"]
+    assert orag.locate(top) == "peoplebook.html (section: Integration Broker > Queues)"
+    assert not rag.search("color red") and not rag.search("Home Contents")
+
+
+# Memory-mapped shard snapshots
+
+def test_mapped_shards_answer_like_freshly_built_ones(load_oracle):
+    orag = load_oracle()
+    oracle_corpus(orag)
+    cold = orag.OracleRAG()
+    warm_module = load_oracle()
+    warm = warm_module.OracleRAG()
+    assert isinstance(warm.index.shards["private"].docs, warm_module.MappedPassages)
+    for query in ("payroll patch", "integration gateway", "queue", "employees"):
+        assert warm.search(query) == cold.search(query)
+    assert warm.docs == cold.docs
+    assert sorted(p.name for p in orag.INDEX_DIR.iterdir()) == sorted(
+        ["manifest.json"] + [f"{c}.1.snap" for c in ("public", "private", "peopletools", "integration", "patches")])
+
+
+def test_shard_out_of_step_with_the_manifest_is_not_opened(load_oracle):
+    orag = load_oracle()
+    oracle_corpus(orag)
+    orag.OracleRAG()
+    assert orag.IndexShard.open(orag.INDEX_DIR, "private", 1) is not None
+    assert orag.IndexShard.open(orag.INDEX_DIR, "private", 2) is None
+
+
+# Snippets located through the positional postings
+
+def test_oracle_snippets_mark_query_terms(load_oracle):
+    orag = load_oracle()
+    write(orag.DOCS_DIR, "integration/ib_guide.txt",
+          "Filler sentence. " * 60 + "Ping the gateway before activating the node. " + "More filler. " * 60)
+    orag.OracleRAG()
+    (result,) = load_oracle().OracleRAG().search("gateway node", 1)
+    assert "Ping the **gateway** before activating the **node**." in result["snippet"]
+    assert result["snippet"].endswith("...") and len(result["snippet"]) < orag.SNIPPET_CHARS + 20
+
+
+# MCP server over stdio
+
+def test_mcp_server_answers_tools_and_protocol_errors(load_oracle, monkeypatch):
+    orag = load_oracle()
+    oracle_corpus(orag)
+    monkeypatch.setattr(sys, "stdout", sys.stdout)  # serve_mcp points it at stderr
+    requests = [
+        {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {"protocolVersion": "2025-03-26"}},
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+        {"jsonrpc": "2.0", "id": 3, "method": "tools/call", "params": {"name": "search", "arguments": {"query": "payroll", "top_k": 1}}},
+        {"jsonrpc": "2.0", "id": 4, "method": "tools/call", "params": {"name": "get_kb", "arguments": {"kb_id": "KB1001"}}},
+        {"jsonrpc": "2.0", "id": 5, "method": "tools/call", "params": {"name": "get_kb", "arguments": {}}},
+        {"jsonrpc": "2.0", "id": 6, "method": "tools/call", "params": {"name": "drop_index"}},
+        {"jsonrpc": "2.0", "id": 7, "method": "resources/list"},
+        {"jsonrpc": "2.0", "id": 8, "method": "ping"},
+    ]
+    stdin = io.BytesIO(b"".join(json.dumps(r).encode() + b"\n" for r in requests) + b"{not json\n\n")
+    stdout = io.BytesIO()
+    orag.serve_mcp(stdin, stdout)
+    answers = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    by_id = {a["id"]: a for a in answers}
+    assert len(answers) == 9 and set(by_id) == {1, 2, 3, 4, 5, 6, 7, 8, None}
+
+    assert by_id[1]["result"]["protocolVersion"] == "2025-03-26"
+    assert [t["name"] for t in by_id[2]["result"]["tools"]] == ["search", "get_kb", "list_docs", "list_kb"]
+    assert by_id[3]["result"]["content"][0]["text"].startswith("## Results for: payroll\n\n### 1.")
+    assert "Apply the payroll patch" in by_id[4]["result"]["content"][0]["text"]
+    assert by_id[5]["result"] == {"content": [{"type": "text", "text": "get_kb failed: missing argument 'kb_id'"}],
+                                  "isError": True}
+    assert by_id[6]["error"] == {"code": -32602, "message": "Unknown tool: drop_index"}
+    assert by_id[7]["error"] == {"code": -32601, "message": "Method not found: resources/list"}
+    assert by_id[8]["result"] == {}
+    assert by_id[None]["error"]["code"] == -32700
+
+
+def test_mcp_messages_that_are_not_objects_are_invalid_requests(load_oracle, monkeypatch):
+    orag = load_oracle()
+    monkeypatch.setattr(sys, "stdout", sys.stdout)
+    stdin = io.BytesIO(b'[{"jsonrpc": "2.0", "id": 1, "method": "ping"}]\n42\n"ping"\n'
+                       b'{"jsonrpc": "2.0", "id": 2, "method": "ping"}\n')
+    stdout = io.BytesIO()
+    orag.serve_mcp(stdin, stdout)
+    answers = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert [a.get("error", {}).get("code") for a in answers] == [-32600, -32600, -32600, None]
+    assert answers[-1] == {"jsonrpc": "2.0", "id": 2, "result": {}}  # still serving
+
+
+def test_mcp_search_rejects_a_top_k_out_of_range(load_oracle, monkeypatch):
+    orag = load_oracle()
+    oracle_corpus(orag)
+    monkeypatch.setattr(sys, "stdout", sys.stdout)
+    calls = [{"jsonrpc": "2.0", "id": i, "method": "tools/call",
+              "params": {"name": "search", "arguments": {"query": "payroll", "top_k": top_k}}}
+             for i, top_k in enumerate([0, 51, "3", 2])]
+    stdout = io.BytesIO()
+    orag.serve_mcp(io.BytesIO(b"".join(json.dumps(c).encode() + b"\n" for c in calls)), stdout)
+    by_id = {a["id"]: a["result"] for a in map(json.loads, stdout.getvalue().splitlines())}
+    assert [by_id[i].get("isError") for i in range(4)] == [True, True, True, None]
+    assert by_id[0]["content"][0]["text"] == "search failed: top_k must be an integer from 1 to 50, got 0"
+    assert by_id[3]["content"][0]["text"].count("\n### ") == 2
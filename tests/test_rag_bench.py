@@ -0,0 +1,66 @@
+"""tools/rag-bench.py: corpus generation and one benchmark run per engine"""
+
+import json
+
+import pytest
+
+from conftest import REPO, load_module
+
+
+@pytest.fixture
+def bench():
+    return load_module(REPO / "tools" / "rag-bench.py")
+
+
+def tree(root):
+    return {p.relative_to(root).as_posix(): p.read_bytes() for p in sorted(root.rglob("*")) if p.is_file()}
+
+
+# Reproducible retrieval benchmark
+
+def test_corpus_is_reproducible_from_its_seed(bench, tmp_path):
+    meta = bench.generate(tmp_path / "a", docs=12, words=120, queries=3, seed=11)
+    bench.generate(tmp_path / "b", docs=12, words=120, queries=3, seed=11)
+    bench.generate(tmp_path / "c", docs=12, words=120, queries=3, seed=12)
+    assert meta == {"version": bench.CORPUS_VERSION, "docs": 12, "words": 120, "queries": 3, "seed": 11}
+    assert tree(tmp_path / "a") == tree(tmp_path / "b") != tree(tmp_path / "c")
+
+
+def test_queries_list_their_topic_files_per_engine(bench, tmp_path):
+    bench.generate(tmp_path, docs=20, words=200, queries=4, seed=3)
+    queries = json.loads((tmp_path / "queries.json").read_text())["queries"]
+    assert len(queries) == 4
+    files = {engine: {p.name for p in (tmp_path / engine).rglob("*.*")} for engine in ("oracle", "workday")}
+    for entry in queries:
+        assert len(entry["query"].split()) == 2
+        for engine, relevant in entry["relevant"].items():
+            assert 1 <= len(relevant) <= 4 and set(relevant) <= files[engine]
+    texts = [p.read_text() for p in (tmp_path / "oracle" / "private").glob("*.txt")]
+    assert all(t.startswith("# Document ") for t in texts)
+
+
+def test_generated_pdf_is_readable(bench, tmp_path):
+    fitz = pytest.importorskip("fitz")
+    bench.write_pdf(tmp_path / "doc.pdf", [["first line", "second line"], ["page two"]])
+    with fitz.open(str(tmp_path / "doc.pdf")) as doc:
+        assert [page.get_text().splitlines() for page in doc] == [["first line", "second line"], ["page two"]]
+
+
+def test_percentile(bench):
+    assert bench.percentile([], 50) == 0.0
+    assert bench.percentile([5, 1, 3, 2, 4], 50) == 3
+    assert bench.percentile([5, 1, 3, 2, 4], 95) == 5
+
+
+@pytest.mark.parametrize("engine", ["oracle", "workday"])
+def test_cold_and_warm_runs_report_latency_and_recall(bench, tmp_path, engine):
+    pytest.importorskip("fitz")
+    bench.generate(tmp_path, docs=8, words=300, queries=2, seed=5)
+    cold = bench.run(engine, tmp_path, "cold", repeat=1, mode="keyword")
+    warm = bench.run(engine, tmp_path, "warm", repeat=1, mode="keyword")
+    for report in (cold, warm):
+        assert report["queries"] == 2 and report["passages"] > 0
+        assert set(report["latency_ms"]) == {"p50", "p95", "mean"}
+        assert all(0.0 <= r <= 1.0 for r in report["recall"].values())
+    assert warm["passages"] == cold["passages"] and warm["recall"] == cold["recall"]
+    assert cold["recall"]["@10"] == 1.0
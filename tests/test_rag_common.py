@@ -0,0 +1,219 @@
+"""Behavior of rag_common.py, the helpers shared by both engines"""
+
+import json
+import re
+from array import array
+
+import pytest
+
+import rag_common
+
+
+def make_pdf(path, pages):
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    for text in pages:
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+# Parallel PDF extraction behind a page-level cache
+
+def test_pdf_pages_are_extracted_in_parallel_then_served_from_cache(tmp_path, monkeypatch):
+    files = [make_pdf(tmp_path / f"guide{i}.pdf", [f"guide {i} page one", f"guide {i} page two"]) for i in range(3)]
+    cache = tmp_path / "pdf_cache"
+    pages = rag_common.load_pdf_pages(files, cache, tmp_path, workers=2)
+    assert [p.strip() for p in pages[files[1]]] == ["guide 1 page one", "guide 1 page two"]
+    assert set(json.loads((cache / "files.json").read_text())) == {"guide0.pdf", "guide1.pdf", "guide2.pdf"}
+
+    monkeypatch.setattr(rag_common, "PDF_AVAILABLE", False)  # a cache hit never needs PyMuPDF
+    monkeypatch.setattr(rag_common, "extract_pdf_pages", lambda path: pytest.fail(f"re-extracted {path}"))
+    assert rag_common.load_pdf_pages(files, cache, tmp_path) == pages
+
+
+def test_renamed_pdf_reuses_pages_cached_by_content(tmp_path, monkeypatch):
+    original = make_pdf(tmp_path / "a.pdf", ["release notes"])
+    cache = tmp_path / "pdf_cache"
+    rag_common.load_pdf_pages([original], cache, tmp_path)
+    renamed = original.rename(tmp_path / "b.pdf")
+    monkeypatch.setattr(rag_common, "extract_pdf_pages", lambda path: pytest.fail(f"re-extracted {path}"))
+    assert [p.strip() for p in rag_common.load_pdf_pages([renamed], cache, tmp_path)[renamed]] == ["release notes"]
+    assert list(json.loads((cache / "files.json").read_text())) == ["b.pdf"]  # a.pdf no longer exists
+
+
+def test_pages_of_changed_and_deleted_pdfs_are_pruned(tmp_path):
+    kept, edited, deleted = (make_pdf(tmp_path / f"{name}.pdf", [name]) for name in ("kept", "edited", "deleted"))
+    cache = tmp_path / "pdf_cache"
+    rag_common.load_pdf_pages([kept, edited, deleted], cache, tmp_path)
+    make_pdf(edited, ["edited again"])
+    deleted.unlink()
+    rag_common.load_pdf_pages([edited], cache, tmp_path)  # kept.pdf is not passed, but still exists
+    stat = json.loads((cache / "files.json").read_text())
+    assert sorted(p.name for p in cache.iterdir()) == sorted(["files.json"] + [f"{e['sha1']}.json" for e in stat.values()])
+    assert sorted(stat) == ["edited.pdf", "kept.pdf"]
+
+
+def test_unreadable_pdf_is_skipped(tmp_path):
+    good = make_pdf(tmp_path / "good.pdf", ["readable"])
+    bad = tmp_path / "bad.pdf"
+    bad.write_bytes(b"not a pdf")
+    pages = rag_common.load_pdf_pages([good, bad], tmp_path / "pdf_cache", tmp_path, workers=1)
+    assert list(pages) == [good]
+
+
+# Passage-level chunking with offsets
+
+GUIDE = ("Intro line about the guide.\n"
+         "# Installation\n" + "Install the kit on every node. " * 40 + "\n"
+         "## Überprüfung\nCheck the log for errors.\n" + "x" * 2500 + "\n")
+
+
+def test_split_passages_covers_text_in_bounded_heading_aligned_pieces():
+    passages = rag_common.split_passages(GUIDE, size=1000)
+    assert passages[0][0] == 0 and passages[-1][1] == len(GUIDE)
+    assert all(a[1] == b[0] for a, b in zip(passages, passages[1:]))  # contiguous, no overlap
+    assert all(end - start <= 1000 for start, end, _ in passages)
+    starts = {GUIDE[start:].split("\n", 1)[0]: section for start, _, section in passages}
+    assert starts["# Installation"] == "Installation" and starts["## Überprüfung"] == "Überprüfung"
+    assert passages[0][2] is None and passages[-1][2] == "Überprüfung"
+
+
+def test_make_passages_record_utf8_byte_offsets():
+    base = {"type": "text", "file": "guide.txt", "title": "Guide"}
+    records = rag_common.make_passages(base, GUIDE, page=3, section="Fallback", offset=100)
+    data = GUIDE.encode("utf-8")
+    for i, r in enumerate(records):
+        blob = r["content"].encode("utf-8")
+        assert data[r["offset"] - 100:r["offset"] - 100 + len(blob)] == blob
+        assert (r["passage"], r["page"], r["file"]) == (i, 3, "guide.txt")
+    assert records[0]["section"] == "Fallback"  # no heading of its own yet
+    assert "".join(r["content"] for r in records) == GUIDE
+
+
+def test_empty_text_is_one_empty_passage():
+    assert rag_common.split_passages("") == [(0, 0, None)]
+
+
+def test_locate_names_page_section_or_offset():
+    assert rag_common.locate({"file": "guide.pdf", "page": 12, "section": None}) == "guide.pdf (page 12)"
+    assert rag_common.locate({"file": "a.txt", "section": "Setup", "offset": 40}) == "a.txt (section: Setup)"
+    assert rag_common.locate({"file": "a.txt", "offset": 40}) == "a.txt (byte 40)"
+    assert rag_common.locate({"file": "a.txt", "offset": 0}) == "a.txt"
+
+
+# Query-result cache with generation invalidation
+
+def test_query_cache_is_an_lru_bound_to_one_generation():
+    cache = rag_common.QueryCache(size=2)
+    key = rag_common.QueryCache.key
+    assert key("  Payroll   TAX ", None, 5) == ("payroll tax", None, 5)
+    assert cache.get(key("a"), 1) is None
+    cache.put(key("a"), 1, "A")
+    cache.put(key("b"), 1, "B")
+    assert cache.get(key("a"), 1) == "A"  # now most recent
+    cache.put(key("c"), 1, "C")
+    assert cache.get(key("b"), 1) is None and cache.get(key("a"), 1) == "A"
+    cache.put(key("stale"), 0, "S")  # computed against an older generation: ignored
+    assert cache.get(key("stale"), 1) is None
+    assert cache.get(key("a"), 2) is None  # a new generation drops every entry
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"], stats["entries"]) == (2, 4, 1, 0)
+
+
+def test_query_cache_persists_entries_and_counters(tmp_path):
+    path = tmp_path / "query_cache.pkl"
+    cache = rag_common.QueryCache(path=path, version=2)
+    cache.get(("q",), "g1")
+    cache.put(("q",), "g1", [1, 2])
+    cache.save()
+    reloaded = rag_common.QueryCache(path=path, version=2)
+    assert reloaded.get(("q",), "g1") == [1, 2]
+    assert (reloaded.stats()["hits"], reloaded.stats()["misses"]) == (1, 1)
+    assert rag_common.QueryCache(path=path, version=3).get(("q",), "g1") is None  # other result format
+    assert list(tmp_path.iterdir()) == [path]  # written through a temp file that was replaced
+
+
+def test_query_cache_is_only_written_after_entries_change(tmp_path):
+    path = tmp_path / "cache" / "query_cache.pkl"  # the directory is created on save
+    cache = rag_common.QueryCache(path=path)
+    cache.get(("q",), "g1")
+    cache.put(("q",), "g1", "A")
+    cache.save()
+    reloaded = rag_common.QueryCache(path=path)
+    assert reloaded.get(("q",), "g1") == "A" and not reloaded.dirty  # a hit leaves nothing to write
+    reloaded.get(("q",), "g2")
+    assert reloaded.dirty  # invalidated
+
+
+def test_query_cache_that_cannot_be_written_is_not_persisted(tmp_path):
+    (tmp_path / "file").write_text("")
+    cache = rag_common.QueryCache(path=tmp_path / "file" / "query_cache.pkl")
+    cache.get(("q",), 1)
+    cache.put(("q",), 1, "A")
+    cache.save()  # no error at exit
+    assert cache.get(("q",), 1) == "A"
+
+
+# Memory-mapped snapshots written atomically
+
+def test_snapshot_round_trips_aligned_sections(tmp_path):
+    path = tmp_path / "index.snap"
+    sections = {"ids": array("I", [3, 1, 4, 1, 5]), "offsets": array("Q", [0, 2**40]), "odd": b"xyz",
+                "names": json.dumps(["a", "b"]).encode(), "content": "naïve text".encode("utf-8")}
+    rag_common.write_snapshot(path, b"TESTSNAP", {"version": 3}, sections)
+    snap = rag_common.Snapshot(path, b"TESTSNAP")
+    assert snap.meta == {"version": 3}
+    assert list(snap.section("ids")) == [3, 1, 4, 1, 5] and list(snap.section("offsets")) == [0, 2**40]
+    assert bytes(snap.section("odd")) == b"xyz" and snap.json("names") == ["a", "b"]
+    assert snap.text(0, len("naïve".encode("utf-8"))) == "naïve"
+    assert snap.base % 8 == 0 and all(offset % 8 == 0 for offset, _, _ in snap.layout.values())
+    assert list(tmp_path.iterdir()) == [path]
+    with pytest.raises(ValueError):
+        rag_common.Snapshot(path, b"OTHERMAG")
+
+
+def test_atomic_write_keeps_the_old_file_on_failure(tmp_path):
+    path = tmp_path / "manifest.json"
+    path.write_text("old")
+    with pytest.raises(RuntimeError):
+        with rag_common.atomic_write(path, "w") as f:
+            f.write("partial")
+            raise RuntimeError("killed mid-write")
+    assert path.read_text() == "old" and list(tmp_path.iterdir()) == [path]
+    with rag_common.atomic_write(path, "w") as f:
+        f.write("new")
+    assert path.read_text() == "new" and list(tmp_path.iterdir()) == [path]
+
+
+def test_concurrent_writers_get_their_own_temp_files(tmp_path):
+    path = tmp_path / "files.json"
+    first, second = rag_common.temp_path(path), rag_common.temp_path(path)
+    assert first != second and first.parent == second.parent == tmp_path
+    assert first.name.startswith("files.json.") and first.suffix == ".tmp"
+
+
+def test_replaced_files_get_the_usual_permissions(tmp_path):
+    with rag_common.atomic_write(tmp_path / "manifest.json", "w") as f:
+        f.write("{}")
+    assert (tmp_path / "manifest.json").stat().st_mode & 0o777 == 0o666 & ~rag_common.UMASK
+
+
+# Keyword-in-context snippets from index positions
+
+def spans(text, *terms):
+    return [(m.start(), m.end(), m.group()) for m in re.finditer("|".join(terms), text)]
+
+
+def test_kwic_shows_the_window_with_the_most_distinct_terms():
+    text = "alpha " * 30 + "the payroll run and tax tables " + "beta " * 40 + "payroll only here " + "gamma " * 10
+    snippet = rag_common.kwic(text, spans(text, "payroll", "tax"), 60)
+    assert snippet == "...alpha alpha the **payroll** run and **tax** tables beta beta..."
+    assert len(snippet.replace("**", "").strip(".")) <= 60
+
+
+def test_kwic_without_hits_or_truncation():
+    assert rag_common.kwic("short text without hits at all", [], 10) == "short..."
+    assert rag_common.kwic("abc payroll", [(4, 11, "payroll")], 100) == "abc **payroll**"
+    assert rag_common.kwic("line one\n\n  line   two", [], 100) == "line one line two"
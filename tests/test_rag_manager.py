@@ -0,0 +1,267 @@
+"""tools/rag-manager.py against collection directories under a temporary RAG_ROOT"""
+
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from conftest import REPO, load_module
+
+COLLECTIONS = "projects/erpa/AGUPGRADE/rag-collections"
+
+
+@pytest.fixture
+def rm(tmp_path, monkeypatch):
+    """rag-manager bound to an empty workspace; .manager() opens it like a new CLI process"""
+    root = tmp_path / "root"
+    (root / COLLECTIONS).mkdir(parents=True)
+    monkeypatch.setenv("RAG_ROOT", str(root))
+    module = load_module(REPO / "tools" / "rag-manager.py")
+    claude = tmp_path / ".claude"
+    module.manager = lambda: module.RAGManager(str(claude / "rag-metadata.json"), str(claude / "rag-registry.json"))
+    return module
+
+
+def collection(rm, name, files=None):
+    """Create a collection directory with {relative path: text} files"""
+    directory = rm.RAG_ROOT / COLLECTIONS / name
+    for rel, text in (files or {"index.md": "docs"}).items():
+        (directory / rel).parent.mkdir(parents=True, exist_ok=True)
+        (directory / rel).write_text(text)
+    return directory
+
+
+def chroma_store(directory, rows):
+    with sqlite3.connect(directory / "chroma.sqlite3") as db:
+        db.execute("CREATE TABLE embeddings (id INTEGER PRIMARY KEY)")
+        db.executemany("INSERT INTO embeddings VALUES (?)", [(i,) for i in range(rows)])
+
+
+# Disk-derived collection registry
+
+def test_collection_facts_come_from_disk(rm):
+    collection(rm, "tailwind", {"a.md": "12345", "guides/b.md": "1234567890"})
+    chroma_store(collection(rm, "nextjs"), rows=3)
+    manager = rm.manager()
+    tailwind = manager.collections["tailwind"]
+    assert (tailwind["chunks"], tailwind["files"], tailwind["bytes"], tailwind["status"]) == (2, 2, 15, "operational")
+    assert manager.collections["nextjs"]["chunks"] == 3  # rows of the Chroma store, not files
+    assert (manager.collections["zustand"]["status"], manager.collections["zustand"]["chunks"]) == ("missing", 0)
+    assert not manager.is_rag_fresh("zustand")
+    assert manager.recommend_action("zustand")["reasoning"] == "RAG collection 'zustand' is registered but missing on disk"
+
+
+def test_refresh_only_rescans_collections_that_changed(rm):
+    collection(rm, "tailwind")
+    directory = collection(rm, "shadcn")
+    assert sorted(rm.manager().rescanned) == ["shadcn", "tailwind"]
+    assert rm.manager().rescanned == []
+
+    (directory / "new.md").write_text("added")
+    os.utime(directory, ns=(directory.stat().st_atime_ns, directory.stat().st_mtime_ns + 10**9))
+    manager = rm.manager()
+    assert manager.rescanned == ["shadcn"] and manager.collections["shadcn"]["files"] == 2
+    assert sorted(manager.refresh(force=True)) == ["shadcn", "tailwind"]
+
+
+def test_unregistered_directories_are_discovered(rm):
+    collection(rm, "htmx")
+    manager = rm.manager()
+    assert manager.collections["htmx"]["source"] == "discovered"
+    assert manager.has_rag_for_technology("htmx") == (True, "htmx")
+
+
+# Append-only, lock-safe usage log
+
+def test_usage_is_appended_and_seen_by_other_processes(rm):
+    collection(rm, "nextjs")
+    manager = rm.manager()
+    manager.record_usage("nextjs", tokens_saved=100)
+    manager.record_usage("nextjs", tokens_saved=50)
+    manager.record_usage("not-a-collection")
+    assert len(manager.usage_log.read_text().splitlines()) == 2
+    assert manager.collections["nextjs"]["usage_count"] == 2
+
+    other = rm.manager()
+    assert other.collections["nextjs"]["usage_count"] == 2
+    stats = other.get_statistics()
+    assert (stats["total_queries"], stats["total_tokens_saved"], stats["avg_tokens_saved_per_query"]) == (2, 150, 75)
+
+
+def test_compaction_folds_the_log_and_skips_a_torn_line(rm):
+    collection(rm, "nextjs")
+    manager = rm.manager()
+    manager.record_usage("nextjs", tokens_saved=10)
+    with open(manager.usage_log, "a") as f:
+        f.write('{"rag": "nextjs", "tok')  # writer killed mid-line
+    assert manager.compact() == 1
+    assert manager.usage_log.read_text() == ""
+    assert rm.manager().get_statistics()["total_queries"] == 1
+    assert manager.compact() == 0
+
+
+def test_concurrent_writers_lose_no_events(rm, monkeypatch):
+    collection(rm, "nextjs")
+    monkeypatch.setattr(rm, "USAGE_COMPACT_BYTES", 600)  # compact every few events, racing the appends
+    managers = [rm.manager() for _ in range(4)]
+    threads = [threading.Thread(target=lambda m=m: [m.record_usage("nextjs", tokens_saved=1) for _ in range(25)])
+               for m in managers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = rm.manager().get_statistics()
+    assert (stats["total_queries"], stats["total_tokens_saved"]) == (100, 100)
+
+
+# Technology name resolution
+
+NAMES = ["nextjs", "tanstack-query", "tailwind", "forms-validation", "react-hook-form", "shadcn", "aws-cognito"]
+
+
+@pytest.fixture
+def resolver(rm):
+    return rm.TechResolver(NAMES, rm.TECH_ALIASES)
+
+
+def test_normalize(rm):
+    normalize = rm.TechResolver.normalize
+    assert [normalize(t) for t in ("Next.js", "Tanstack Query", "shadcn/ui", " C++ ")] == \
+        ["nextjs", "tanstack-query", "shadcn-ui", "c++"]
+
+
+def test_names_and_aliases_resolve_exactly(resolver):
+    assert resolver.resolve("Next.js")[0] == ("nextjs", 1.0)
+    assert resolver.resolve("react-query")[0] == ("tanstack-query", 1.0)
+    assert resolver.resolve("Tanstack Query")[0] == ("tanstack-query", 1.0)
+    assert resolver.resolve("shadcn/ui")[0] == ("shadcn", 1.0)
+
+
+def test_prefix_and_typo_resolution(rm, resolver):
+    assert resolver.resolve("nextjs 15")[0] == ("nextjs", 0.9)
+    name, score = resolver.resolve("tailwnd")[0]
+    assert name == "tailwind" and rm.TechResolver.ACCEPT <= score < 0.9
+    assert resolver.resolve("tialwind")[0][0] == "tailwind"
+    assert resolver.resolve("nxt") == []  # too short to tolerate a typo
+
+
+def test_partial_names_are_only_suggestions(rm, resolver):
+    suggestions = dict(resolver.resolve("react"))  # completes the react-query and react-hook-form keys
+    assert set(suggestions) == {"tanstack-query", "react-hook-form", "forms-validation"}
+    assert max(suggestions.values()) < 0.5 < rm.TechResolver.ACCEPT
+
+
+def test_mentions_in_free_text(resolver):
+    assert resolver.mentions("how do I use zod with next.js") == ["forms-validation", "nextjs"]
+    assert resolver.mentions("React Hook Form with TanStack Query") == \
+        ["forms-validation", "react-hook-form", "tanstack-query"]  # react-hook-form is also an alias
+    assert resolver.mentions("nothing relevant here") == []
+
+
+def test_workspace_aliases(rm, tmp_path):
+    collection(rm, "payments")
+    collection(rm, "tailwind")
+    (tmp_path / ".claude").mkdir(exist_ok=True)
+    (tmp_path / ".claude" / "rag-aliases.json").write_text('{"Stripe": "payments", "ghost": "no-such-collection"}')
+    manager = rm.manager()
+    assert manager.has_rag_for_technology("stripe") == (True, "payments")
+    assert manager.has_rag_for_technology("ghost") == (False, None)
+    assert manager.has_rag_for_technology("Tailwind CSS") == (True, "tailwind")
+    assert manager.has_rag_for_technology("react") == (False, None)
+
+
+# Federated search across collections
+
+class FakeStore:
+    """Stands in for a Chroma collection: fixed (text, distance) rows, optional query latency"""
+
+    def __init__(self, rows, space="cosine", delay=0.0):
+        self.rows, self.metadata, self.delay = rows, {"hnsw:space": space}, delay
+
+    def query(self, query_embeddings, n_results, include):
+        time.sleep(self.delay)
+        rows = sorted(self.rows, key=lambda r: r[1])[:n_results]
+        return {"documents": [[text for text, _ in rows]],
+                "metadatas": [[{"source": f"{text}.md"} for text, _ in rows]],
+                "distances": [[distance for _, distance in rows]]}
+
+
+@pytest.fixture
+def searcher(rm):
+    """A manager whose stores are FakeStores: searcher(stores={name: [FakeStore]}, open_delay={name: seconds})"""
+    def make(stores, open_delay=None, broken=()):
+        for name in stores:
+            chroma_store(collection(rm, name), rows=1)
+        manager = rm.manager()
+        manager._embed = lambda question: [1.0]
+
+        opened = set()
+
+        def open_store(name):  # slow the first time only, as the real one caches clients
+            if name not in opened:
+                time.sleep((open_delay or {}).get(name, 0.0))
+                opened.add(name)
+            if name in broken:
+                raise RuntimeError("corrupt")
+            return stores[name]
+        manager._open_store = open_store
+        return manager
+    return make
+
+
+def test_similarity_by_distance_space(rm):
+    assert rm.RAGManager._similarity(0.5, "l2") == 0.75
+    assert rm.RAGManager._similarity(0.25, "cosine") == 0.75
+    assert rm.RAGManager._similarity(0.25, "ip") == 0.75
+
+
+def test_hits_merge_across_collections_by_similarity(searcher):
+    manager = searcher({
+        "nextjs": [FakeStore([("routing", 0.1), ("caching", 0.4)], space="cosine")],
+        "tailwind": [FakeStore([("utilities", 0.4), ("themes", 1.2)], space="l2"),
+                     FakeStore([("plugins", 0.05)], space="cosine")],
+    })
+    found = manager.search("anything", collections=["nextjs", "tailwind"], k=3)
+    assert [(h["collection"], h["text"], h["score"]) for h in found["results"]] == \
+        [("tailwind", "plugins", 0.95), ("nextjs", "routing", 0.9), ("tailwind", "utilities", 0.8)]
+    assert found["results"][0]["source"] == "plugins.md"
+    assert found["collections"] == {"nextjs": "2 hits", "tailwind": "3 hits"}
+
+
+def test_collections_default_to_those_the_question_names(searcher):
+    manager = searcher({"nextjs": [FakeStore([("routing", 0.1)])], "tailwind": [FakeStore([("themes", 0.1)])]})
+    assert list(manager.search("app router in Next.js")["collections"]) == ["nextjs"]
+    status = manager.search("something else")["collections"]  # every known collection
+    assert set(status) == set(manager.collections)
+    assert {name for name, s in status.items() if s != "no vector store"} == {"nextjs", "tailwind"}
+
+
+def test_unavailable_collections_are_reported(rm, searcher):
+    manager = searcher({"nextjs": [FakeStore([("routing", 0.1)])], "tailwind": []}, broken={"tailwind"})
+    collection(rm, "shadcn")  # on disk, never indexed
+    manager.refresh(force=True)
+    found = manager.search("q", collections=["nextjs", "tailwind", "shadcn", "nope"])
+    assert found["collections"] == {"nextjs": "1 hits", "tailwind": "error: corrupt",
+                                    "shadcn": "no vector store", "nope": "unknown collection"}
+    assert [h["text"] for h in found["results"]] == ["routing"]
+
+
+def test_slow_collections_time_out_without_holding_up_the_rest(searcher):
+    manager = searcher({"nextjs": [FakeStore([("routing", 0.1)], delay=0.1)],
+                        "tailwind": [FakeStore([("themes", 0.0)], delay=5)]}, open_delay={"nextjs": 0.1})
+    start = time.perf_counter()
+    found = manager.search("q", collections=["nextjs", "tailwind"], timeout=0.5)
+    assert time.perf_counter() - start < 2
+    assert found["collections"] == {"nextjs": "1 hits", "tailwind": "timeout"}
+    assert [h["text"] for h in found["results"]] == ["routing"]
+
+
+def test_a_stalled_store_open_counts_against_the_deadline(searcher):
+    manager = searcher({"nextjs": [FakeStore([("routing", 0.1)])], "tailwind": [FakeStore([("themes", 0.0)])]},
+                       open_delay={"tailwind": 5})
+    start = time.perf_counter()
+    found = manager.search("q", collections=["nextjs", "tailwind"], timeout=0.3)
+    assert time.perf_counter() - start < 2
+    assert found["collections"] == {"nextjs": "1 hits", "tailwind": "timeout"}
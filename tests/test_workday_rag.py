@@ -0,0 +1,468 @@
+"""Behavior of workday_docs/workday_rag.py against small generated corpora"""
+
+import json
+import math
+import pickle
+import re
+
+import pytest
+
+
+def write(docs_dir, relpath, text):
+    path = docs_dir / relpath
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def text_corpus(wr):
+    """Three private/ text docs with known term counts"""
+    write(wr.PRIVATE_DIR, "payroll_guide.txt", "Payroll results are calculated per pay group. Payroll audit.\n")
+    write(wr.PRIVATE_DIR, "benefits.txt", "Benefit plans and benefit elections for workers.\n")
+    write(wr.PRIVATE_DIR, "worker_data.txt", "Worker data, worker history and payroll inputs.\n")
+
+
+# Persistent BM25 inverted index
+
+def okapi(docs, query, k1=1.5, b=0.75):
+    """Reference BM25 scores computed straight from the texts"""
+    tokenized = [re.findall(r"[a-z0-9]+", d["content"].lower()) for d in docs]
+    avgdl = sum(map(len, tokenized)) / len(tokenized)
+    scores = {}
+    for term in set(query.lower().split()):
+        df = sum(term in tokens for tokens in tokenized)
+        if not df:
+            continue
+        idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+        for doc_id, tokens in enumerate(tokenized):
+            tf = tokens.count(term)
+            if tf:
+                norm = k1 * (1 - b + b * len(tokens) / avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+    return scores
+
+
+def test_bm25_scores_match_okapi_formula(load_workday):
+    wr = load_workday()
+    docs = [{"file": f"d{i}.txt", "content": text} for i, text in enumerate([
+        "payroll payroll calculation", "benefit plans", "payroll audit of benefit plans and more words here"])]
+    index = wr.BM25Index.build(docs)
+    expected = okapi(docs, "payroll benefit")
+    assert index.scores({"payroll", "benefit"}) == pytest.approx(expected)
+    assert [doc_id for doc_id, _ in index.top("payroll benefit", 3)] == sorted(expected, key=lambda d: -expected[d])
+
+
+def test_bm25_ties_rank_by_doc_id(load_workday):
+    wr = load_workday()
+    docs = [{"file": f"d{i}.txt", "content": "same words"} for i in range(4)]
+    assert [doc_id for doc_id, _ in wr.BM25Index.build(docs).top("words", 3)] == [0, 1, 2]
+
+
+def test_signature_changes_with_any_doc(load_workday):
+    wr = load_workday()
+    docs = [{"file": "a.txt", "content": "alpha"}, {"file": "b.txt", "content": "beta"}]
+    signature = wr.BM25Index.signature_for(docs)
+    assert signature == wr.BM25Index.signature_for([dict(d) for d in docs])
+    assert signature != wr.BM25Index.signature_for(docs[:1])
+    assert signature != wr.BM25Index.signature_for([docs[0], dict(docs[1], content="gamma")])
+
+
+def test_persisted_index_is_reused_until_sources_change(load_workday):
+    wr = load_workday()
+    text_corpus(wr)
+    cold = wr.WorkdayRAG()
+    signature = cold.index.signature
+    assert [r["doc"]["file"] for r in cold.search("audit")] == ["payroll_guide.txt"]
+
+    warm_module = load_workday()
+    warm_module.BM25Index.build = lambda *args: pytest.fail("warm start rebuilt the index")
+    warm = warm_module.WorkdayRAG()
+    assert warm.index.signature == signature
+    ranked = lambda rag: [(r["id"], r["score"]) for r in rag.search("payroll")]
+    assert ranked(warm) == ranked(cold)
+
+    write(wr.PRIVATE_DIR, "benefits.txt", "Benefit plans, elections and an open enrollment audit.\n")
+    changed = load_workday().WorkdayRAG()
+    assert changed.index.signature != signature
+    assert {r["doc"]["file"] for r in changed.search("enrollment")} == {"benefits.txt"}
+
+
+# Streaming, cached WSDL ingestion
+
+HUMAN_RESOURCES_WSDL = """<?xml version="1.0" encoding="UTF-8"?>
+<wsdl:definitions name="Human_Resources" xmlns:wsdl="http://schemas.xmlsoap.org/wsdl/"
+    xmlns:xsd="http://www.w3.org/2001/XMLSchema" xmlns:wd="urn:com.workday/bsvc">
+  <wsdl:documentation>Worker and organization data</wsdl:documentation>
+  <wsdl:types>
+    <xsd:schema>
+      <xsd:element name="Get_Workers_Request" type="wd:Get_Workers_RequestType"/>
+      <xsd:element name="Get_Workers_Response" type="wd:Get_Workers_ResponseType"/>
+      <xsd:element name="Put_Location_Request" type="wd:Put_Location_RequestType"/>
+      <xsd:element name="Put_Location_Response" type="wd:Put_Location_ResponseType"/>
+      <xsd:complexType name="Get_Workers_RequestType">
+        <xsd:sequence>
+          <xsd:element name="Request_References" type="wd:Worker_ReferenceType"/>
+          <xsd:element name="Response_Filter" type="wd:Response_FilterType"/>
+        </xsd:sequence>
+      </xsd:complexType>
+      <xsd:complexType name="Get_Workers_ResponseType">
+        <xsd:sequence><xsd:element name="Worker" type="wd:WorkerType"/></xsd:sequence>
+      </xsd:complexType>
+      <xsd:complexType name="WorkerType">
+        <xsd:sequence>
+          <xsd:element name="Worker_Reference" type="wd:Worker_ReferenceType"/>
+          <xsd:element name="Personal_Data" type="wd:Personal_DataType"/>
+        </xsd:sequence>
+      </xsd:complexType>
+      <xsd:complexType name="Personal_DataType">
+        <xsd:sequence>
+          <xsd:element name="Legal_Name" type="xsd:string"/>
+          <xsd:element name="Manager" type="wd:WorkerType"/>
+        </xsd:sequence>
+      </xsd:complexType>
+      <xsd:complexType name="Worker_ReferenceType">
+        <xsd:sequence><xsd:element name="Employee_ID" type="xsd:string"/></xsd:sequence>
+      </xsd:complexType>
+      <xsd:complexType name="Response_FilterType">
+        <xsd:sequence><xsd:element name="As_Of_Effective_Date" type="xsd:date"/></xsd:sequence>
+      </xsd:complexType>
+      <xsd:complexType name="Location_DataType">
+        <xsd:sequence><xsd:element name="Location_Name" type="xsd:string"/></xsd:sequence>
+      </xsd:complexType>
+      <xsd:complexType name="Put_Location_RequestType">
+        <xsd:complexContent>
+          <xsd:extension base="wd:Location_DataType">
+            <xsd:sequence><xsd:element name="Time_Profile" type="xsd:string"/></xsd:sequence>
+          </xsd:extension>
+        </xsd:complexContent>
+      </xsd:complexType>
+      <xsd:complexType name="Put_Location_ResponseType">
+        <xsd:sequence><xsd:element name="Location_Reference" type="xsd:string"/></xsd:sequence>
+      </xsd:complexType>
+    </xsd:schema>
+  </wsdl:types>
+  <wsdl:message name="Get_Workers_RequestMsg"><wsdl:part name="body" element="wd:Get_Workers_Request"/></wsdl:message>
+  <wsdl:message name="Get_Workers_ResponseMsg"><wsdl:part name="body" element="wd:Get_Workers_Response"/></wsdl:message>
+  <wsdl:message name="Put_Location_RequestMsg"><wsdl:part name="body" element="wd:Put_Location_Request"/></wsdl:message>
+  <wsdl:message name="Put_Location_ResponseMsg"><wsdl:part name="body" element="wd:Put_Location_Response"/></wsdl:message>
+  <wsdl:portType name="Human_ResourcesPort">
+    <wsdl:operation name="Get_Workers">
+      <wsdl:documentation>Returns worker data</wsdl:documentation>
+      <wsdl:input message="wd:Get_Workers_RequestMsg"/>
+      <wsdl:output message="wd:Get_Workers_ResponseMsg"/>
+    </wsdl:operation>
+    <wsdl:operation name="Put_Location">
+      <wsdl:documentation>Adds or updates a location</wsdl:documentation>
+      <wsdl:input message="wd:Put_Location_RequestMsg"/>
+      <wsdl:output message="wd:Put_Location_ResponseMsg"/>
+    </wsdl:operation>
+  </wsdl:portType>
+</wsdl:definitions>
+"""
+
+
+def test_parse_file_reads_service_and_operations(load_workday):
+    wr = load_workday()
+    parsed = wr.WSDLParser.parse_file(write(wr.WSDL_DIR, "Human_Resources.wsdl", HUMAN_RESOURCES_WSDL))
+    assert (parsed["name"], parsed["file"], parsed["description"]) == \
+        ("Human_Resources", "Human_Resources.wsdl", "Worker and organization data")
+    ops = {op["name"]: op for op in parsed["operations"]}
+    assert list(ops) == ["Get_Workers", "Put_Location"]
+    assert ops["Get_Workers"]["description"] == "Returns worker data"
+    assert (ops["Get_Workers"]["input"], ops["Get_Workers"]["output"]) == ("Get_Workers_Request", "Get_Workers_Response")
+
+
+def test_parse_file_rejects_malformed_xml(load_workday):
+    wr = load_workday()
+    assert wr.WSDLParser.parse_file(write(wr.WSDL_DIR, "Broken.wsdl", HUMAN_RESOURCES_WSDL[:500])) is None
+
+
+def test_wsdl_cache_only_reparses_changed_files(load_workday):
+    wr = load_workday()
+    first = write(wr.WSDL_DIR, "Human_Resources.wsdl", HUMAN_RESOURCES_WSDL)
+    second = write(wr.WSDL_DIR, "Staffing.wsdl", HUMAN_RESOURCES_WSDL.replace('name="Human_Resources"', 'name="Staffing"'))
+    files = sorted(wr.WSDL_DIR.glob("*.wsdl"))
+
+    results, parsed = wr.WSDLParser.load_cached(files, wr.WSDL_CACHE)
+    assert parsed == 2 and [r["name"] for r in results] == ["Human_Resources", "Staffing"]
+    cached, parsed = wr.WSDLParser.load_cached(files, wr.WSDL_CACHE)
+    assert parsed == 0 and cached == results
+
+    write(wr.WSDL_DIR, "Staffing.wsdl", HUMAN_RESOURCES_WSDL.replace('name="Human_Resources"', 'name="Staffing_v2"'))
+    results, parsed = wr.WSDLParser.load_cached(files, wr.WSDL_CACHE)
+    assert parsed == 1 and results[1]["name"] == "Staffing_v2"
+
+    second.unlink()
+    results, parsed = wr.WSDLParser.load_cached([first], wr.WSDL_CACHE)
+    assert parsed == 0 and len(results) == 1
+    with open(wr.WSDL_CACHE, "rb") as f:
+        assert list(pickle.load(f)["files"]) == ["Human_Resources.wsdl"]
+
+
+# PDF passages from the page cache
+
+def test_pdf_passages_carry_page_numbers_and_page_limit(load_workday):
+    fitz = pytest.importorskip("fitz")
+    wr = load_workday()
+    doc = fitz.open()
+    for text in ("Open enrollment overview", "Benefit election deadlines"):
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(str(wr.PRIVATE_DIR / "benefits_guide.pdf"))
+    doc.close()
+
+    passages = [d for d in wr.WorkdayRAG(pdf_page_chars=15).docs if d["type"] == "pdf"]
+    assert [(p["page"], p["content"]) for p in passages] == [(1, "Open enrollment"), (2, "Benefit electio")]
+    assert {p["title"] for p in passages} == {"Benefits Guide"}
+    assert list(wr.PDF_CACHE_DIR.glob("*.json"))  # full page text cached for the next start
+
+
+# Batched search_many
+
+QUERIES = ["payroll", "benefit plans", "worker payroll audit", "payroll", "nothing matches", "", "WORKER data"]
+
+
+def ranked(results):
+    return [(r["id"], r["score"]) for r in results]
+
+
+def test_search_many_matches_search(load_workday):
+    wr = load_workday()
+    text_corpus(wr)
+    batched = wr.WorkdayRAG().search_many(QUERIES, top_k=2)
+    single = wr.WorkdayRAG()
+    assert [ranked(hits) for hits in batched] == [ranked(single.search(q, top_k=2)) for q in QUERIES]
+
+
+def test_search_many_serves_repeats_from_the_query_cache(load_workday):
+    wr = load_workday()
+    text_corpus(wr)
+    rag = wr.WorkdayRAG()
+    rag.search("payroll")
+    rag.index.top_many = lambda queries, top_k: pytest.fail(f"rescored {queries}")
+    assert ranked(rag.search_many(["Payroll", "  payroll "])[1]) == ranked(rag.search("payroll"))
+
+
+def test_sparse_top_many_equals_top(load_workday):
+    pytest.importorskip("scipy.sparse")
+    wr = load_workday()
+    docs = [{"file": f"d{i}.txt", "content": text} for i, text in enumerate(
+        ["alpha beta", "beta gamma", "alpha beta", "gamma gamma delta", "beta", "alpha beta"])]
+    index = wr.BM25Index.build(docs)
+    queries = ["alpha beta", "beta", "gamma", "delta alpha", "zeta"]
+    assert index.top_many(queries, 2) == [index.top(q, 2) for q in queries]
+
+
+# Chunk embeddings cache
+
+def test_hashing_embeddings_are_unit_length_and_deterministic(load_workday):
+    np = pytest.importorskip("numpy")
+    wr = load_workday()
+    vectors = wr.HashingEmbedder().encode(["payroll results", "payroll result", "benefit elections", ""])
+    assert np.allclose(np.linalg.norm(vectors[:3], axis=1), 1.0) and not vectors[3].any()
+    assert np.array_equal(vectors, wr.HashingEmbedder().encode(["payroll results", "payroll result", "benefit elections", ""]))
+    assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+
+
+def test_embedding_store_only_embeds_changed_docs(load_workday):
+    np = pytest.importorskip("numpy")
+    wr = load_workday()
+    docs = [{"file": f"d{i}.txt", "content": f"document {i} " + "filler words " * 150} for i in range(4)]
+    store = wr.EmbeddingStore(wr.HashingEmbedder())
+    assert store.sync(docs) == (0, 4)
+    before = {wr.doc_key(d): np.array(store.vectors[store.row_doc == i]) for i, d in enumerate(docs)}
+    assert all(len(rows) == len(wr.chunk_spans(d["content"])) for d, rows in zip(docs, before.values()))
+
+    assert wr.EmbeddingStore(wr.HashingEmbedder()).sync(docs) == (4, 0)
+    docs[2] = dict(docs[2], content="a rewritten document")
+    store = wr.EmbeddingStore(wr.HashingEmbedder())
+    assert store.sync(docs[1:]) == (2, 1)  # d0 dropped, d2 re-embedded
+    for i, d in enumerate(docs[1:]):
+        if d["file"] != "d2.txt":
+            assert np.array_equal(store.vectors[store.row_doc == i], before[wr.doc_key(d)])
+    assert store.sync(docs[1:], rebuild=True) == (0, 3)
+
+
+def test_semantic_and_hybrid_search(load_workday):
+    pytest.importorskip("numpy")
+    wr = load_workday()
+    text_corpus(wr)
+    rag = wr.WorkdayRAG()
+    assert rag.search("benefit elections", 1, mode="semantic")[0]["doc"]["file"] == "benefits.txt"
+    hybrid = rag.search("payroll audit", 2, mode="hybrid")
+    assert hybrid[0]["doc"]["file"] == "payroll_guide.txt" and hybrid[0]["score"] >= hybrid[1]["score"]
+    assert rag.embeddings().embedder.name == "hashing-256"
+
+
+def test_unknown_search_mode_is_rejected(load_workday):
+    wr = load_workday()
+    text_corpus(wr)
+    rag = wr.WorkdayRAG()
+    with pytest.raises(ValueError, match="Unknown search mode 'semantc'"):
+        rag.search("payroll", mode="semantc")
+    with pytest.raises(ValueError):
+        rag.rank("payroll", mode="")
+
+
+# Passages with offsets
+
+def test_workday_passages_locate_their_source(load_workday):
+    wr = load_workday()
+    write(wr.PRIVATE_DIR, "time_tracking.txt", "Overview\n# Time Off\nRequest time off in advance.\n")
+    rag = wr.WorkdayRAG()
+    hit = rag.search("advance", 1)[0]["doc"]
+    assert (hit["section"], hit["passage"], hit["offset"]) == ("Time Off", 1, len("Overview\n"))
+    assert wr.locate(hit) == "time_tracking.txt (section: Time Off)"
+    assert wr.locate({"file": "guide.pdf", "page": 12}) == "guide.pdf (page 12)"
+
+
+# Operation-granular WSDL index
+
+def test_operations_resolve_request_and_response_fields(load_workday):
+    wr = load_workday()
+    write(wr.WSDL_DIR, "Human_Resources.wsdl", HUMAN_RESOURCES_WSDL)
+    rag = wr.WorkdayRAG()
+    (get_workers,) = rag.get_operation("  get_WORKERS ")
+    assert get_workers["service"] == "Human_Resources"
+    assert get_workers["request_fields"] == ["Request_References", "Response_Filter", "Employee_ID", "As_Of_Effective_Date"]
+    # three levels deep, and the recursive Manager -> WorkerType reference is not followed again
+    assert get_workers["response_fields"] == ["Worker", "Worker_Reference", "Personal_Data", "Employee_ID", "Legal_Name", "Manager"]
+    (put_location,) = rag.get_operation("Put_Location")
+    assert put_location["request_fields"] == ["Time_Profile", "Location_Name"]  # own fields, then the extension base's
+    assert rag.get_operation("Missing_Op") == [] and rag.describe_operation("Missing_Op") == "Operation 'Missing_Op' not found."
+
+
+def test_field_lookup_reports_operations_and_direction(load_workday):
+    wr = load_workday()
+    write(wr.WSDL_DIR, "Human_Resources.wsdl", HUMAN_RESOURCES_WSDL)
+    rag = wr.WorkdayRAG()
+    assert [(op["name"], direction) for op, direction in rag.operations_by_field("employee_id")] == \
+        [("Get_Workers", "request"), ("Get_Workers", "response")]
+    assert "Human_Resources.Put_Location (request)" in rag.describe_field("Location_Name")
+    rag.load_wsdls()  # a reload rebuilds the tables instead of appending to them
+    assert len(rag.operations_by_field("Employee_ID")) == 2 and len(rag.get_operation("Get_Workers")) == 1
+
+
+def test_operations_are_searchable_records(load_workday):
+    wr = load_workday()
+    write(wr.WSDL_DIR, "Human_Resources.wsdl", HUMAN_RESOURCES_WSDL)
+    top = wr.WorkdayRAG().search("Location_Name time profile", 1)[0]["doc"]
+    assert (top["type"], top["operation"], top["wsdl_name"]) == ("wsdl_operation", "Put_Location", "Human_Resources")
+    assert "Request fields: Time_Profile, Location_Name" in top["content"]
+
+
+# Compact, memory-mapped passage records
+
+def openapi_spec(wr):
+    spec = {"info": {"title": "Staffing API"}, "paths": {"/workers": {"get": {"summary": "List workers"}}}}
+    write(wr.PUBLIC_DIR, "staffing.json", json.dumps(spec))
+    return spec
+
+
+def test_mapped_passages_equal_the_source_records(load_workday):
+    wr = load_workday()
+    text_corpus(wr)
+    openapi_spec(wr)
+    write(wr.WSDL_DIR, "Human_Resources.wsdl", HUMAN_RESOURCES_WSDL)
+    rag = wr.WorkdayRAG()
+    fresh = wr.WorkdayRAG()
+    expected = [p for kind in fresh.SOURCES for p in fresh.load_source(kind)]
+    assert isinstance(rag.docs, wr.MappedPassages) and len(rag.docs) == len(expected)
+    for doc, source in zip(rag.docs, expected):
+        assert {k: doc[k] for k in source} == source
+        assert doc.digest == wr.content_digest(source)
+    assert rag.docs[-1]["title"] == expected[-1]["title"]
+    assert [d["file"] for d in rag.docs[1:3]] == [d["file"] for d in expected[1:3]]
+
+
+def test_passage_supports_dict_access(load_workday):
+    wr = load_workday()
+    spec = openapi_spec(wr)
+    (doc,) = wr.WorkdayRAG().docs
+    assert doc["type"] == "openapi" and doc.get("page") is None and doc.get("page", 7) == 7
+    assert "title" in doc and "wsdl_name" not in doc
+    with pytest.raises(KeyError):
+        doc["no_such_field"]
+    assert doc["raw"] == spec  # the spec itself is only parsed on request
+
+
+# Lazy, per-source loading
+
+def test_wsdl_commands_never_load_the_document_sources(load_workday, monkeypatch, capsys):
+    wr = load_workday()
+    text_corpus(wr)
+    write(wr.WSDL_DIR, "Human_Resources.wsdl", HUMAN_RESOURCES_WSDL)
+    monkeypatch.setattr(wr.WorkdayRAG, "load_source", lambda self, kind: pytest.fail(f"loaded {kind}"))
+    rag = wr.WorkdayRAG()
+    assert rag._docs is None and rag._wsdl_data is None  # construction loads nothing
+    assert "Human_Resources: 2 operations" in rag.list_wsdl_operations()
+    assert "Legal_Name" in rag.describe_operation("Get_Workers")
+    assert rag._docs is None and not wr.SNAPSHOT_DIR.exists()
+
+    monkeypatch.setattr("sys.argv", ["workday_rag.py", "--field", "Location_Name"])
+    wr.main()
+    assert "Human_Resources.Put_Location (request)" in capsys.readouterr().out
+    assert not wr.SNAPSHOT_DIR.exists()
+
+
+def test_search_loads_every_source_once(load_workday, monkeypatch):
+    wr = load_workday()
+    text_corpus(wr)
+    write(wr.WSDL_DIR, "Human_Resources.wsdl", HUMAN_RESOURCES_WSDL)
+    loaded = []
+    original = wr.WorkdayRAG.load_source
+    monkeypatch.setattr(wr.WorkdayRAG, "load_source", lambda self, kind: loaded.append(kind) or original(self, kind))
+    rag = wr.WorkdayRAG()
+    assert rag.search("payroll") and rag.search("Get_Workers")
+    assert loaded == list(wr.WorkdayRAG.SOURCES)
+
+
+# Query-result cache
+
+def test_rankings_are_cached_per_mode_until_the_signature_changes(load_workday, monkeypatch):
+    wr = load_workday()
+    text_corpus(wr)
+    rag = wr.WorkdayRAG()
+    keyword = ranked(rag.search("payroll audit"))
+    semantic = ranked(rag.search("payroll audit", mode="semantic"))
+    monkeypatch.setattr(rag, "rank", lambda *args: pytest.fail("cache miss"))
+    assert ranked(rag.search("Payroll  Audit")) == keyword
+    assert ranked(rag.search("payroll audit", mode="semantic")) == semantic
+    assert rag.cache.stats()["hits"] == 2
+
+    monkeypatch.undo()
+    write(wr.PRIVATE_DIR, "audit.txt", "Audit audit audit payroll.\n")
+    restarted = wr.WorkdayRAG()
+    restarted.cache = rag.cache
+    assert restarted.search("payroll audit")[0]["doc"]["file"] == "audit.txt"
+    assert rag.cache.stats()["invalidations"] == 1
+
+
+# Warm-start snapshot
+
+def test_snapshots_are_named_by_content_and_replaced(load_workday):
+    wr = load_workday()
+    text_corpus(wr)
+    wr.WorkdayRAG().index
+    (first,) = wr.SNAPSHOT_DIR.iterdir()
+    wr.WorkdayRAG(rebuild_index=True).index  # same sources and settings: the same file is reused
+    assert list(wr.SNAPSHOT_DIR.iterdir()) == [first]
+
+    write(wr.PRIVATE_DIR, "benefits.txt", "Benefit plans changed.\n")
+    wr.WorkdayRAG().index
+    (second,) = wr.SNAPSHOT_DIR.iterdir()  # the outdated snapshot is removed once a newer one maps
+    assert second != first and second.name.startswith("snapshot-") and second.suffix == ".snap"
+    assert wr.WorkdayRAG(pdf_page_chars=10).open_snapshot() is False  # other settings never reuse it
+
+
+# Snippets located through the index
+
+def test_snippets_come_from_the_postings(load_workday):
+    wr = load_workday()
+    write(wr.PRIVATE_DIR, "payroll_guide.txt", "Intro. " * 80 + "Run payroll, then audit the payroll results. " + "Outro. " * 80)
+    rag = wr.WorkdayRAG()
+    hit = rag.search("audit payroll", 1)[0]
+    snippet = rag.index.snippet(hit["id"], hit["doc"]["content"], "audit payroll")
+    assert "Run **payroll**, then **audit** the **payroll** results." in snippet
+    assert snippet.startswith("...") and snippet.endswith("...")
+    built = wr.BM25Index.build(list(rag.docs))
+    assert built.snippet(hit["id"], hit["doc"]["content"], "audit payroll") == snippet
+    assert f"> {snippet}" in rag.query("audit payroll")
@@ -0,0 +1,117 @@
+"""workday_rag_client.py against a workday_rag daemon serving a temporary corpus"""
+
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import REPO, load_module
+from test_workday_rag import HUMAN_RESOURCES_WSDL, text_corpus, write
+
+
+def load_client(monkeypatch, url):
+    monkeypatch.setenv("WORKDAY_RAG_URL", url)
+    return load_module(REPO / "workday_docs" / "workday_rag_client.py")
+
+
+@pytest.fixture
+def daemon(load_workday, monkeypatch):
+    """(module, rag, url) of a daemon started on a free port, shut down after the test"""
+    wr = load_workday()
+    text_corpus(wr)
+    write(wr.WSDL_DIR, "Human_Resources.wsdl", HUMAN_RESOURCES_WSDL)
+    servers, started = [], threading.Event()
+
+    class Server(wr.ThreadingHTTPServer):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            servers.append(self)
+            started.set()
+
+    monkeypatch.setattr(wr, "ThreadingHTTPServer", Server)
+    rag = wr.WorkdayRAG()
+    threading.Thread(target=wr.serve, args=(rag,), kwargs={"port": 0}, daemon=True).start()
+    assert started.wait(30)
+    yield wr, rag, f"http://127.0.0.1:{servers[0].server_address[1]}"
+    servers[0].shutdown()
+
+
+def free_url():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"  # nothing listens once closed
+
+
+# Resident daemon with a lightweight client
+
+def test_client_answers_like_the_engine(daemon, monkeypatch):
+    wr, rag, url = daemon
+    client = load_client(monkeypatch, url)
+    assert client.server_available()
+    assert client.query("payroll audit") == rag.query("payroll audit")
+    assert client.search("payroll", top_k=2) == [
+        {"title": r["doc"]["title"], "file": r["doc"]["file"], "type": r["doc"]["type"], "score": r["score"]}
+        for r in rag.search("payroll", 2)]
+    assert client.search_many(["payroll", "benefit plans"]) == [
+        [{"title": r["doc"]["title"], "file": r["doc"]["file"], "type": r["doc"]["type"], "score": r["score"]} for r in hits]
+        for hits in rag.search_many(["payroll", "benefit plans"])]
+    assert client.list_wsdl_operations() == rag.list_wsdl_operations()
+    assert client.list_wsdl_operations("human") == rag.list_wsdl_operations("human")
+    assert client.describe_operation("get_workers") == rag.describe_operation("get_workers")
+    assert client.describe_field("Legal_Name") == rag.describe_field("Legal_Name")
+
+
+def test_large_batches_are_posted(daemon, monkeypatch):
+    wr, rag, url = daemon
+    client = load_client(monkeypatch, url)
+    queries = [f"payroll audit worker {i} " * 20 for i in range(300)]  # about 150 KB: too long for a request line
+    monkeypatch.setattr(client, "_local", lambda: pytest.fail("fell back to an in-process load"))
+    assert [[r["file"] for r in hits] for hits in client.search_many(queries)] == \
+        [[r["doc"]["file"] for r in hits] for hits in rag.search_many(queries)]
+    with pytest.raises(client.ServerError, match="HTTP 400: bad request body"):
+        client._post("/search_many", {"queries": "payroll"})
+
+
+def test_daemon_loads_everything_before_serving(daemon, monkeypatch):
+    wr, rag, url = daemon
+    assert rag._docs is not None and rag._wsdl_data is not None
+    client = load_client(monkeypatch, url)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        answers = list(pool.map(lambda _: client.describe_operation("Put_Location"), range(16)))
+    assert answers == [rag.describe_operation("Put_Location")] * 16
+
+
+def test_server_errors_are_surfaced_not_retried_locally(daemon, monkeypatch, capsys):
+    wr, rag, url = daemon
+    client = load_client(monkeypatch, url)
+    monkeypatch.setattr(rag, "query", lambda q, mode="keyword": 1 / 0)
+    monkeypatch.setattr(client, "_local", lambda: pytest.fail("fell back to an in-process load"))
+    with pytest.raises(client.ServerError, match="HTTP 500: division by zero"):
+        client.query("payroll")
+    assert client.server_available()
+
+    monkeypatch.setattr("sys.argv", ["workday_rag_client.py", "payroll"])
+    with pytest.raises(SystemExit) as exited:
+        client.main()
+    assert exited.value.code == 1 and "HTTP 500" in capsys.readouterr().err
+
+
+def test_unknown_search_mode_is_a_bad_request(daemon, monkeypatch):
+    wr, rag, url = daemon
+    client = load_client(monkeypatch, url)
+    with pytest.raises(client.ServerError, match="HTTP 400: Unknown search mode 'bogus'"):
+        client.search("payroll", mode="bogus")
+
+
+def test_client_falls_back_in_process_without_daemon(load_workday, monkeypatch):
+    wr = load_workday()
+    text_corpus(wr)
+    rag = wr.WorkdayRAG()
+    client = load_client(monkeypatch, free_url())
+    monkeypatch.setattr(client, "_local_rag", rag)
+    assert not client.server_available()
+    assert client.query("benefit") == rag.query("benefit")
+    assert client.search_many(["benefit", "worker"]) == [
+        [{"title": r["doc"]["title"], "file": r["doc"]["file"], "type": r["doc"]["type"], "score": r["score"]} for r in hits]
+        for hits in rag.search_many(["benefit", "worker"])]
@@ -6,9 +6,14 @@ Standalone script to index markdown files for semantic search
 
 import sys
 import os
+import json
+import hashlib
 from pathlib import Path
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # rag_common.py at the repository root
+from rag_common import atomic_write
+
 # Fix Windows encoding
 if sys.platform == 'win32':
     import io
@@ -25,136 +30,192 @@ from langchain.docstore.document import Document
 BASE_PATH = Path("C:/Users/SainathreddyDadiredd/OneDrive - ERPA/Claude")
 VECTOR_STORE_PATH = BASE_PATH / "unified-memory/vector-store/global"
 DOCUMENTS_PATH = BASE_PATH / "documents"
+# Per-source manifest (content hash + chunk ids) kept next to the store for incremental runs
+MANIFEST_PATH = VECTOR_STORE_PATH / "index-manifest.json"
+MANIFEST_VERSION = 1
+
+EMBED_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 100
+INDEX_SETTINGS = {"model": EMBED_MODEL, "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP}
+BATCH_SIZE = 1000  # chunks per Chroma add/delete call
 
 def get_embeddings():
     """Get FREE HuggingFace embeddings"""
     print("🔄 Loading HuggingFace embeddings (FREE)...")
     embeddings = HuggingFaceEmbeddings(
-        model_name='sentence-transformers/all-MiniLM-L6-v2',
+        model_name=EMBED_MODEL,
         model_kwargs={'device': 'cpu'},
         encode_kwargs={'normalize_embeddings': True}
     )
     print("✅ Embeddings loaded successfully (384 dimensions)")
     return embeddings
 
-def load_documents_from_folder(folder_path: Path):
-    """Load all markdown and text files from a folder"""
-    print(f"\n📂 Loading documents from: {folder_path}")
-
-    documents = []
-
-    # Load markdown files
-    md_files = list(folder_path.glob("*.md"))
-    for md_file in md_files:
-        try:
-            with open(md_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                doc = Document(
-                    page_content=content,
-                    metadata={
-                        'source': str(md_file),
-                        'filename': md_file.name,
-                        'type': 'markdown',
-                        'folder': folder_path.name
-                    }
-                )
-                documents.append(doc)
-                print(f"  ✅ Loaded: {md_file.name}")
-        except Exception as e:
-            print(f"  ❌ Error loading {md_file.name}: {e}")
-
-    # Load text files
-    txt_files = list(folder_path.glob("*.txt"))
-    for txt_file in txt_files:
-        try:
-            with open(txt_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                doc = Document(
-                    page_content=content,
-                    metadata={
-                        'source': str(txt_file),
-                        'filename': txt_file.name,
-                        'type': 'text',
-                        'folder': folder_path.name
-                    }
-                )
-                documents.append(doc)
-                print(f"  ✅ Loaded: {txt_file.name}")
-        except Exception as e:
-            print(f"  ❌ Error loading {txt_file.name}: {e}")
-
-    print(f"📊 Total documents loaded: {len(documents)}")
-    return documents
-
-def chunk_documents(documents):
-    """Split documents into chunks for embedding"""
-    print(f"\n✂️  Chunking {len(documents)} documents...")
-
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=500,
-        chunk_overlap=100,
+def scan_folder(folder_path: Path):
+    """(path, type) of the markdown and text files in a folder"""
+    print(f"\n📂 Scanning: {folder_path}")
+    files = [(f, 'markdown') for f in sorted(folder_path.glob("*.md"))]
+    files += [(f, 'text') for f in sorted(folder_path.glob("*.txt"))]
+    print(f"  📄 {len(files)} files")
+    return files
+
+def load_document(path: Path, doc_type: str, content: str):
+    """A LangChain Document for one source file"""
+    return Document(
+        page_content=content,
+        metadata={
+            'source': str(path),
+            'filename': path.name,
+            'type': doc_type,
+            'folder': path.parent.name
+        }
+    )
+
+def get_text_splitter():
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
         length_function=len,
         separators=["\n\n", "\n", ". ", " ", ""]
     )
 
-    chunks = text_splitter.split_documents(documents)
-    print(f"✅ Created {len(chunks)} chunks")
-    return chunks
+def load_manifest(full=False):
+    """Per-source manifest: path -> size, mtime_ns, sha1 and the ids of its chunks in the store.
 
-def index_documents(folders_to_index):
-    """Index documents from specified folders"""
+    Returns None when there is none. With full=True, or when chunking or the embedding
+    model changed, every entry is invalidated so its chunks are replaced.
+    """
+    try:
+        with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        files = manifest["files"]
+    except (OSError, ValueError, KeyError):
+        return None
+    if not full and manifest.get("version") == MANIFEST_VERSION and manifest.get("settings") == INDEX_SETTINGS:
+        return files
+    if not full:
+        print("⚠️  Chunking/model settings changed - re-embedding everything")
+    for entry in files.values():
+        entry.update(size=-1, sha1=None)
+    return files
+
+def save_manifest(files):
+    """Write the manifest through a temp file of its own, so concurrent runs never share one"""
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_write(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump({"version": MANIFEST_VERSION, "settings": INDEX_SETTINGS, "files": files}, f, indent=1)
+
+def plan_changes(folders_to_index, manifest):
+    """Compare the folders with the manifest.
+
+    Files whose size and mtime match are trusted without being read; otherwise the
+    content hash decides. Returns (new, changed, removed, unchanged, contents) where
+    contents maps each new/changed path to (type, text, sha1, stat).
+    """
+    new, changed, unchanged, contents = [], [], [], {}
+    seen = set()
+    for folder in folders_to_index:
+        for path, doc_type in scan_folder(folder):
+            key = str(path)
+            seen.add(key)
+            entry = manifest.get(key)
+            st = path.stat()
+            if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+                unchanged.append(key)
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except Exception as e:
+                print(f"  ❌ Error loading {path.name}: {e}")
+                continue
+            sha1 = hashlib.sha1(content.encode('utf-8')).hexdigest()
+            if entry and entry["sha1"] == sha1:  # touched, not modified
+                entry.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+                unchanged.append(key)
+                continue
+            (changed if entry else new).append(key)
+            contents[key] = (doc_type, content, sha1, st)
+    removed = [key for key in manifest if key not in seen]
+    return new, changed, removed, unchanged, contents
+
+def chunk_ids(source: str, sha1: str, count: int):
+    """Stable ids for the chunks of one version of a file"""
+    prefix = hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]
+    return [f"{prefix}:{sha1[:12]}:{i}" for i in range(count)]
+
+def open_vector_store(embeddings=None):
+    VECTOR_STORE_PATH.mkdir(parents=True, exist_ok=True)
+    return Chroma(persist_directory=str(VECTOR_STORE_PATH), embedding_function=embeddings)
+
+def index_documents(folders_to_index, full=False):
+    """Bring the vector store in line with the folders.
+
+    Only new or changed files are chunked and embedded. The chunks of changed
+    and removed files are deleted by the ids recorded in the manifest. A new file
+    also has any chunks stored under its path before the manifest existed deleted,
+    so a store built by older versions of this script is not duplicated. On an
+    unchanged tree nothing is embedded and the embedding model is never loaded.
+    Returns the vector store if it was opened.
+    """
     print("="*60)
     print("📚 DOCUMENT INDEXING")
     print("="*60)
     print(f"Vector Store: {VECTOR_STORE_PATH}")
     print(f"Folders to index: {', '.join([f.name for f in folders_to_index])}")
 
-    # Load embeddings
-    embeddings = get_embeddings()
-
-    # Collect all documents
-    all_documents = []
-    for folder in folders_to_index:
-        docs = load_documents_from_folder(folder)
-        all_documents.extend(docs)
-
-    if not all_documents:
-        print("\n⚠️  No documents found to index")
-        return
-
-    print(f"\n📊 Total documents to process: {len(all_documents)}")
-
-    # Chunk documents
-    chunks = chunk_documents(all_documents)
-
-    # Create or load vector store
-    print(f"\n🔄 Creating vector store at: {VECTOR_STORE_PATH}")
-    VECTOR_STORE_PATH.mkdir(parents=True, exist_ok=True)
-
-    # Check if vector store already exists
-    if (VECTOR_STORE_PATH / "chroma.sqlite3").exists():
-        print("📂 Existing vector store found - adding new documents...")
-        vector_store = Chroma(
-            persist_directory=str(VECTOR_STORE_PATH),
-            embedding_function=embeddings
-        )
-        vector_store.add_documents(chunks)
-    else:
-        print("📂 Creating new vector store...")
-        vector_store = Chroma.from_documents(
-            documents=chunks,
-            embedding=embeddings,
-            persist_directory=str(VECTOR_STORE_PATH)
-        )
-
-    print("✅ Vector store created/updated successfully")
+    manifest = load_manifest(full)
+    legacy = manifest is None and (VECTOR_STORE_PATH / "chroma.sqlite3").exists()
+    if legacy:
+        print("⚠️  No manifest for existing store - replacing chunks by source path")
+    manifest = manifest or {}
+    new, changed, removed, unchanged, contents = plan_changes(folders_to_index, manifest)
+
+    print(f"\n📊 New: {len(new)}  Changed: {len(changed)}  Removed: {len(removed)}  Unchanged: {len(unchanged)}")
+    for label, keys in (("➕", new), ("✏️ ", changed), ("➖", removed)):
+        for key in keys:
+            print(f"  {label} {Path(key).name}")
+
+    if not (new or changed or removed):
+        save_manifest(manifest)  # keeps refreshed mtimes of touched files
+        print("\n✅ Index is up to date - nothing to embed")
+        return None
+
+    vector_store = open_vector_store(get_embeddings() if new or changed else None)
+
+    # Drop the chunks of changed and removed files (and legacy chunks of "new" ones)
+    stale = [cid for key in changed + removed for cid in manifest[key]["chunk_ids"]]
+    if legacy:
+        for key in new:
+            stale.extend(vector_store.get(where={"source": key}, include=[])["ids"])
+    for i in range(0, len(stale), BATCH_SIZE):
+        vector_store.delete(ids=stale[i:i + BATCH_SIZE])
+    for key in removed:
+        del manifest[key]
+
+    # Embed new and changed files
+    text_splitter = get_text_splitter()
+    chunks, ids = [], []
+    for key in new + changed:
+        doc_type, content, sha1, st = contents[key]
+        file_chunks = text_splitter.split_documents([load_document(Path(key), doc_type, content)])
+        file_ids = chunk_ids(key, sha1, len(file_chunks))
+        chunks.extend(file_chunks)
+        ids.extend(file_ids)
+        manifest[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": sha1, "chunk_ids": file_ids}
+    print(f"\n✂️  Embedding {len(chunks)} chunks from {len(new) + len(changed)} files...")
+    for i in range(0, len(chunks), BATCH_SIZE):
+        vector_store.add_documents(chunks[i:i + BATCH_SIZE], ids=ids[i:i + BATCH_SIZE])
+    save_manifest(manifest)
+
+    print("✅ Vector store updated successfully")
 
     # Summary
     print("\n" + "="*60)
     print("📊 INDEXING SUMMARY")
     print("="*60)
-    print(f"Documents processed: {len(all_documents)}")
-    print(f"Chunks created: {len(chunks)}")
+    print(f"Files: {len(new)} new, {len(changed)} changed, {len(removed)} removed, {len(unchanged)} unchanged")
+    print(f"Chunks: {len(chunks)} embedded, {len(stale)} deleted")
     print(f"Vector store location: {VECTOR_STORE_PATH}")
     print(f"Status: ✅ Ready for semantic search")
 
@@ -183,6 +244,7 @@ def main():
     parser = argparse.ArgumentParser(description='Index documentation for semantic search')
     parser.add_argument('--test', action='store_true', help='Test search after indexing')
     parser.add_argument('--query', type=str, default='Claude Desktop setup', help='Test query')
+    parser.add_argument('--full', action='store_true', help='Re-embed every file, ignoring the manifest')
     args = parser.parse_args()
 
     try:
@@ -201,11 +263,11 @@ def main():
             return
 
         # Index documents
-        vector_store = index_documents(folders_to_index)
+        vector_store = index_documents(folders_to_index, full=args.full)
 
         # Test search if requested
-        if args.test and vector_store:
-            test_search(vector_store, args.query)
+        if args.test:
+            test_search(vector_store or open_vector_store(get_embeddings()), args.query)
 
         print("\n✅ Indexing complete!")
         print("\n💡 Your documents are now searchable via Claude Desktop:")
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+RAG Benchmark
+Reproducible ingestion/latency/quality benchmark for oracle_rag and workday_rag.
+
+Generates a synthetic corpus (TXT, PDF, OpenAPI and, for Workday, WSDL) from a
+seed, with a fixed query set whose relevant files are known by construction,
+then runs each engine twice in a fresh process against it: cold (no index or
+caches) and warm (reusing what the cold run wrote). Every run reports load
+time, p50/p95 query latency, throughput, peak RSS and recall@k.
+
+Usage:
+  python tools/rag-bench.py                          # both engines, default scale
+  python tools/rag-bench.py --engine oracle --docs 1000 --json bench.json
+  python tools/rag-bench.py --dir bench_corpus --keep  # reuse a corpus between runs
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+ENGINES = {
+    # engine -> (module directory, module, docs dir env var, caches removed before a cold run)
+    "oracle": (REPO / "oracle_docs", "oracle_rag", "ORACLE_RAG_DOCS_DIR", ["index", "pdf_cache"]),
+    "workday": (REPO / "workday_docs", "workday_rag", "WORKDAY_RAG_DOCS_DIR",
+                ["snapshot", "pdf_cache", "wsdl_cache.pkl", "query_cache.pkl", "embeddings.pkl", "embeddings.npy"]),
+}
+CORPUS_VERSION = 1
+RECALL_AT = (1, 5, 10)
+SYLLABLES = [c + v for c in "bdfgklmnprstvz" for v in "aeiou"]
+
+def pseudo_words(rng, count, taken):
+    """count distinct made-up words not in taken (so topic terms never collide with filler)"""
+    words = []
+    while len(words) < count:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if word not in taken:
+            taken.add(word)
+            words.append(word)
+    return words
+
+def write_pdf(path, pages):
+    """Minimal uncompressed PDF, one text line per row, readable by PyMuPDF"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        text = " ".join(f"({line}) Tj T*" for line in lines)
+        stream = f"BT /F1 10 Tf 12 TL 40 800 Td {text} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    path.write_bytes(out)
+
+def write_openapi(path, title, sentences):
+    paths = {f"/{title.lower()}/r{i}": {"get": {"summary": s}, "post": {"summary": s}} for i, s in enumerate(sentences)}
+    path.write_text(json.dumps({"openapi": "3.0.0", "info": {"title": title}, "paths": paths}, indent=1), encoding="utf-8")
+
+def write_wsdl(path, service, operations):
+    """operations: [(name, documentation)]"""
+    ops, messages, elements = [], [], []
+    for name, doc in operations:
+        for direction in ("Request", "Response"):
+            messages.append(f'<wsdl:message name="{name}_{direction}"><wsdl:part name="body" element="wd:{name}_{direction}"/></wsdl:message>')
+            elements.append(f'<xsd:element name="{name}_{direction}" type="wd:{name}_{direction}Type"/>'
+                            f'<xsd:complexType name="{name}_{direction}Type"><xsd:sequence>'
+                            f'<xsd:element name="{name}_Reference" type="xsd:string"/></xsd:sequence></xsd:complexType>')
+        ops.append(f'<wsdl:operation name="{name}"><wsdl:documentation>{doc}</wsdl:documentation>'
+                   f'<wsdl:input message="wd:{name}_Request"/><wsdl:output message="wd:{name}_Response"/></wsdl:operation>')
+    path.write_text(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<wsdl:definitions name="{service}" xmlns:wsdl="http://schemas.xmlsoap.org/wsdl/" '
+        'xmlns:xsd="http://www.w3.org/2001/XMLSchema" xmlns:wd="urn:com.workday/bsvc">\n'
+        f'<wsdl:documentation>{service} service</wsdl:documentation>\n'
+        f'<wsdl:types><xsd:schema>{"".join(elements)}</xsd:schema></wsdl:types>\n'
+        f'{"".join(messages)}\n<wsdl:portType name="{service}Port">{"".join(ops)}</wsdl:portType>\n'
+        '</wsdl:definitions>\n', encoding="utf-8")
+
+def generate(root, docs=200, words=600, queries=50, seed=7):
+    """Write oracle/ and workday/ source trees plus queries.json under root.
+
+    Documents are grouped into topics of up to four files. Each topic has three
+    terms of its own, mixed into its documents' filler text; each query pairs two
+    terms of one topic, so its relevant files are exactly that topic's files.
+    A quarter of the filler slots repeat a random other topic's term as noise.
+    """
+    rng = random.Random(seed)
+    taken = set()
+    filler = pseudo_words(rng, 2000, taken)
+    topic_count = max(1, docs // 4)
+    topics = [pseudo_words(rng, 3, taken) for _ in range(topic_count)]
+
+    def text(topic, n):
+        out = []
+        for i in range(n):
+            roll = rng.random()
+            if roll < 0.04:
+                out.append(rng.choice(topics[topic]))
+            elif roll < 0.05:
+                out.append(rng.choice(rng.choice(topics)))
+            else:
+                out.append(rng.choice(filler))
+            if i % 12 == 11:
+                out[-1] += "."
+        return " ".join(out)
+
+    def lines(s, width=90):
+        rows, row = [], ""
+        for w in s.split():
+            if len(row) + len(w) >= width:
+                rows.append(row)
+                row = ""
+            row = f"{row} {w}".strip()
+        return rows + [row] if row else rows
+
+    layouts = {
+        "oracle": [("txt", "private"), ("pdf", "peopletools"), ("openapi", "public"), ("txt", "integration"), ("pdf", "patches")],
+        "workday": [("txt", "private"), ("pdf", "private"), ("openapi", "public"), ("wsdl", "wsdl")],
+    }
+    relevant = {engine: {} for engine in layouts}
+    for engine, layout in layouts.items():
+        for i in range(docs):
+            topic = i % topic_count
+            kind, folder = layout[i % len(layout)]
+            target = root / engine / folder
+            target.mkdir(parents=True, exist_ok=True)
+            stem = f"doc_{i:05d}"
+            if kind == "txt":
+                name = f"{stem}.txt"
+                (target / name).write_text(f"# Document {i}\n\n{text(topic, words)}\n", encoding="utf-8")
+            elif kind == "pdf":
+                name = f"{stem}.pdf"
+                rows = lines(text(topic, words))
+                write_pdf(target / name, [rows[j:j + 60] for j in range(0, len(rows), 60)])
+            elif kind == "openapi":
+                name = f"{stem}.json"
+                write_openapi(target / name, f"Service{i}", [text(topic, 20) for _ in range(max(1, words // 40))])
+            else:
+                name = f"Service_{i:05d}.wsdl"
+                write_wsdl(target / name, f"Service_{i:05d}", [(f"Op_{i:05d}_{j}", text(topic, 30)) for j in range(max(1, words // 60))])
+            relevant[engine].setdefault(topic, []).append(name)
+
+    query_set = []
+    for topic in rng.sample(range(topic_count), min(queries, topic_count)):
+        a, b = rng.sample(topics[topic], 2)
+        query_set.append({"query": f"{a} {b}", "relevant": {e: sorted(r[topic]) for e, r in relevant.items()}})
+    meta = {"version": CORPUS_VERSION, "docs": docs, "words": words, "queries": queries, "seed": seed}
+    (root / "queries.json").write_text(json.dumps({"corpus": meta, "queries": query_set}, indent=1), encoding="utf-8")
+    return meta
+
+def peak_rss():
+    """Peak resident set size of this process in bytes (None if unavailable)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + \
+                       [(f, ctypes.c_size_t) for f in ("PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                                                       "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage",
+                                                       "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+        counters = Counters(cb=ctypes.sizeof(Counters))
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                 ctypes.byref(counters), counters.cb)
+        return counters.PeakWorkingSetSize
+    except Exception:
+        return None
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] if ordered else 0.0
+
+def worker(engine, queries_file, repeat, mode):
+    """Load one engine (its docs dir comes from the environment), run the query set and
+    print one JSON line. Engine output goes to stderr."""
+    directory, module, _, _ = ENGINES[engine]
+    sys.path.insert(0, str(directory))
+    query_set = json.load(open(queries_file, encoding="utf-8"))["queries"]
+    k = max(RECALL_AT)
+    with contextlib.redirect_stdout(sys.stderr):
+        start = time.perf_counter()
+        rag_module = __import__(module)
+        if engine == "oracle":
+            rag = rag_module.OracleRAG()
+            passages = rag.index.passage_count
+            # the index directly, so repeats measure retrieval rather than the query cache
+            search = lambda q: [doc["file"] for _, doc, _ in rag.index.search(q, k)]
+        else:
+            rag = rag_module.WorkdayRAG()
+            passages = len(rag.index.doc_lens)
+            search = lambda q: [rag.docs[doc_id]["file"] for doc_id, _ in rag.rank(q, k, mode)]
+        load = time.perf_counter() - start
+
+        latencies, recall = [], {n: [] for n in RECALL_AT}
+        for _ in range(repeat):
+            for entry in query_set:
+                t = time.perf_counter()
+                files = search(entry["query"])
+                latencies.append(time.perf_counter() - t)
+                ranked = list(dict.fromkeys(files))
+                relevant = set(entry["relevant"][engine])
+                for n in RECALL_AT:
+                    recall[n].append(len(relevant & set(ranked[:n])) / min(len(relevant), n))
+    total = sum(latencies)
+    print(json.dumps({
+        "load_s": round(load, 4),
+        "passages": passages,
+        "queries": len(latencies),
+        "latency_ms": {"p50": round(percentile(latencies, 50) * 1000, 3), "p95": round(percentile(latencies, 95) * 1000, 3),
+                       "mean": round(total / len(latencies) * 1000, 3) if latencies else 0.0},
+        "throughput_qps": round(len(latencies) / total, 1) if total else 0.0,
+        "peak_rss_mb": round(peak_rss() / 2**20, 1) if peak_rss() else None,
+        "recall": {f"@{n}": round(sum(v) / len(v), 4) if v else 0.0 for n, v in recall.items()},
+    }))
+
+def run(engine, root, phase, repeat, mode, verbose=False):
+    """One benchmark process for engine against root/<engine>; a cold run first removes its caches"""
+    _, _, env_var, caches = ENGINES[engine]
+    docs_dir = root / engine
+    if phase == "cold":
+        for name in caches:
+            path = docs_dir / name
+            if path.is_dir():
+                shutil.rmtree(path)
+            elif path.exists():
+                path.unlink()
+    env = dict(os.environ, **{env_var: str(docs_dir), "PYTHONIOENCODING": "utf-8"})
+    cmd = [sys.executable, __file__, "--worker", engine, "--queries-file", str(root / "queries.json"),
+           "--repeat", str(repeat), "--mode", mode]
+    proc = subprocess.run(cmd, env=env, stdout=subprocess.PIPE, stderr=None if verbose else subprocess.DEVNULL,
+                          text=True, encoding="utf-8")
+    if proc.returncode:
+        raise SystemExit(f"{engine} {phase} run failed (exit {proc.returncode}); rerun with --verbose")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO, capture_output=True,
+                              text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark oracle_rag and workday_rag on a synthetic corpus")
+    parser.add_argument("--engine", nargs="+", choices=sorted(ENGINES), default=sorted(ENGINES))
+    parser.add_argument("--docs", type=int, default=200, help="source files per engine")
+    parser.add_argument("--words", type=int, default=600, help="words per source file")
+    parser.add_argument("--queries", type=int, default=50, help="size of the judged query set")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the query set per run")
+    parser.add_argument("--mode", choices=["keyword", "semantic", "hybrid"], default="keyword", help="workday search mode")
+    parser.add_argument("--dir", type=Path, help="corpus directory (default: a temporary one)")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary corpus")
+    parser.add_argument("--json", type=Path, help="write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="show engine output")
+    parser.add_argument("--worker", choices=sorted(ENGINES), help=argparse.SUPPRESS)
+    parser.add_argument("--queries-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.queries_file, args.repeat, args.mode)
+        return
+
+    root = args.dir or Path(tempfile.mkdtemp(prefix="rag-bench-"))
+    meta = {"version": CORPUS_VERSION, "docs": args.docs, "words": args.words, "queries": args.queries, "seed": args.seed}
+    try:
+        existing = json.load(open(root / "queries.json", encoding="utf-8"))["corpus"]
+    except Exception:
+        existing = None
+    start = time.perf_counter()
+    if existing != meta:
+        for engine in ENGINES:
+            shutil.rmtree(root / engine, ignore_errors=True)
+        root.mkdir(parents=True, exist_ok=True)
+        generate(root, args.docs, args.words, args.queries, args.seed)
+        print(f"Generated corpus in {root} ({time.perf_counter() - start:.1f}s)")
+    else:
+        print(f"Reusing corpus in {root}")
+
+    report = {"commit": git_commit(), "date": datetime.now().isoformat(timespec="seconds"),
+              "python": sys.version.split()[0], "platform": sys.platform, "corpus": meta, "repeat": args.repeat,
+              "engines": {}}
+    try:
+        for engine in args.engine:
+            report["engines"][engine] = {phase: run(engine, root, phase, args.repeat, args.mode, args.verbose)
+                                         for phase in ("cold", "warm")}
+    finally:
+        if not args.dir and not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+    print(f"\n{'engine':<8} {'run':<5} {'load s':>8} {'p50 ms':>8} {'p95 ms':>8} {'q/s':>8} {'RSS MB':>8} "
+          + " ".join(f"{'R' + k:>6}" for k in (f"@{n}" for n in RECALL_AT)))
+    for engine, runs in report["engines"].items():
+        for phase, r in runs.items():
+            print(f"{engine:<8} {phase:<5} {r['load_s']:>8.3f} {r['latency_ms']['p50']:>8.3f} {r['latency_ms']['p95']:>8.3f} "
+                  f"{r['throughput_qps']:>8.1f} {r['peak_rss_mb'] or 0:>8.1f} "
+                  + " ".join(f"{r['recall'][f'@{n}']:>6.3f}" for n in RECALL_AT))
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nReport written to {args.json}")
+
+if __name__ == "__main__":
+    main()
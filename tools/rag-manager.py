@@ -4,13 +4,70 @@ RAG Collection Manager
 Helps Claude decide when to scrape, update, or use existing RAG collections
 """
 
+import contextlib
+import hashlib
+import heapq
+import itertools
 import json
 import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import Future, wait
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
-# Available RAG collections
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # rag_common.py at the repository root
+from rag_common import atomic_write
+
+# Root that collection_path entries are relative to (the Claude workspace)
+RAG_ROOT = Path(os.environ.get("RAG_ROOT") or Path(__file__).resolve().parent.parent)
+
+# The usage log is folded into rag-metadata.json once it grows past this many bytes
+USAGE_COMPACT_BYTES = int(os.environ.get("RAG_USAGE_COMPACT_BYTES", str(64 * 1024)))
+
+# Federated search (RAGManager.search): the embedding model the collections were indexed
+# with (see tools/index-documents.py) and how long one collection may take to answer
+EMBED_MODEL = os.environ.get("RAG_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+SEARCH_TIMEOUT = float(os.environ.get("RAG_SEARCH_TIMEOUT", "10"))
+
+if sys.platform == "win32":
+    import msvcrt
+
+    @contextlib.contextmanager
+    def file_lock(path: Path):
+        """Exclusive advisory lock on a lock file, held for the with block"""
+        with open(path, "a+b") as f:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10s; keep waiting
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    @contextlib.contextmanager
+    def file_lock(path: Path):
+        """Exclusive advisory lock on a lock file, held for the with block"""
+        with open(path, "a+b") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+# Known RAG collections. chunks/last_updated are only fallbacks: the registry
+# (CollectionRegistry) derives them from each collection_path on disk.
 AVAILABLE_RAGS = {
     "nextjs": {
         "chunks": 1187,
@@ -123,52 +180,385 @@ AVAILABLE_RAGS = {
 }
 
 
+# Alternative names for collections (normalized like TechResolver.normalize). Extend per
+# workspace in .claude/rag-aliases.json ({"alias": "collection"}) or an "aliases" list
+# on a collection's metadata entry.
+TECH_ALIASES = {
+    "next.js": "nextjs",
+    "react-query": "tanstack-query",
+    "tanstack": "tanstack-query",
+    "shadcn/ui": "shadcn",
+    "shadcn-ui": "shadcn",
+    "tailwindcss": "tailwind",
+    "tailwind-css": "tailwind",
+    "react-hook-form": "forms-validation",
+    "zod": "forms-validation",
+    "cognito": "aws-cognito",
+    "api-gateway": "aws-api-gateway",
+    "apigateway": "aws-api-gateway",
+    "ecs": "aws-ecs-fargate",
+    "fargate": "aws-ecs-fargate",
+    "web-vitals": "web-performance",
+    "core-web-vitals": "web-performance",
+    "agupgrade": "agupgrade-backend",
+}
+
+
+class TechResolver:
+    """Maps a technology name to ranked collection candidates.
+
+    Built once from collection names and aliases into a prefix trie of normalized
+    keys. A lookup walks the trie along the query, then (only if nothing matched
+    exactly) does a bounded edit-distance walk of the same trie, so its cost
+    depends on the query length, not the number of collections. Scores:
+      1.0  exact name or alias
+      0.9  a key that starts the query at a word boundary ("nextjs 15" -> nextjs)
+      <0.9 a typo within MAX_EDITS of a key ("tailwnd" -> tailwind)
+      <0.5 completions of a query that is a prefix of a key: listed as
+           suggestions but below ACCEPT, so "react" never resolves to
+           "react-hook-form"
+    """
+    ACCEPT = 0.7
+    END = ""
+
+    def __init__(self, names: List[str], aliases: Dict[str, str]):
+        self.root = {}
+        for name in names:
+            self.add(name, name)
+        for alias, name in aliases.items():
+            if name in names:
+                self.add(alias, name)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """'Next.js' -> 'nextjs', 'Tanstack Query' -> 'tanstack-query', 'shadcn/ui' -> 'shadcn-ui'"""
+        text = text.lower().strip().replace(".", "")
+        return re.sub(r"[^a-z0-9+#]+", "-", text).strip("-")
+
+    @staticmethod
+    def max_edits(length: int) -> int:
+        """Typos tolerated in a key of this length"""
+        return 0 if length < 4 else 1 if length < 8 else 2
+
+    def add(self, key: str, name: str):
+        node = self.root
+        for ch in self.normalize(key):
+            node = node.setdefault(ch, {})
+        node.setdefault(self.END, set()).add(name)
+
+    def mentions(self, text: str) -> List[str]:
+        """Collections named outright (name or alias) anywhere in free text, e.g. a question"""
+        words = self.normalize(text).split("-")
+        found = []
+        for i in range(len(words)):
+            node = self.root
+            for j, word in enumerate(words[i:i + 4]):  # keys of up to four words
+                for ch in ("-" if j else "") + word:
+                    node = node.get(ch)
+                    if node is None:
+                        break
+                if node is None:
+                    break
+                found.extend(n for n in sorted(node.get(self.END, ())) if n not in found)
+        return found
+
+    def resolve(self, technology: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """[(collection, score)] best first"""
+        query = self.normalize(technology)
+        best = {}
+
+        def offer(names, score):
+            for name in names:
+                if score > best.get(name, 0):
+                    best[name] = score
+
+        node = self.root
+        for i, ch in enumerate(query):
+            if ch == "-" and self.END in node:  # a key ends at a word boundary of the query
+                offer(node[self.END], 0.9)
+            node = node.get(ch)
+            if node is None:
+                break
+        else:
+            if self.END in node:
+                offer(node[self.END], 1.0)
+            elif len(query) >= 3:
+                stack = [(node, len(query))]
+                while stack:  # completions, scored by how much of the key was typed
+                    child, depth = stack.pop()
+                    for ch, sub in child.items():
+                        if ch == self.END:
+                            offer(sub, 0.45 * len(query) / depth)
+                        else:
+                            stack.append((sub, depth + 1))
+
+        if 1.0 not in best.values() and self.max_edits(len(query)):
+            self._fuzzy(query, offer)
+        return sorted(best.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
+
+    def _fuzzy(self, query: str, offer):
+        """Keys within max_edits of query (Levenshtein rows computed once per trie node)"""
+        bound = self.max_edits(len(query))
+        stack = [(self.root, 0, list(range(len(query) + 1)))]
+        while stack:
+            node, depth, row = stack.pop()
+            if self.END in node and 0 < row[-1] <= min(bound, self.max_edits(depth)):
+                offer(node[self.END], 0.9 * (1 - row[-1] / max(depth, len(query))))
+            for ch, child in node.items():
+                if ch == self.END:
+                    continue
+                next_row = [row[0] + 1]
+                for j, qc in enumerate(query, 1):
+                    next_row.append(min(next_row[j - 1] + 1, row[j] + 1, row[j - 1] + (qc != ch)))
+                if min(next_row) <= bound:
+                    stack.append((child, depth + 1, next_row))
+
+
+class CollectionRegistry:
+    """Disk-derived facts about each collection, cached in a JSON manifest.
+
+    For every collection_path the manifest records chunk count (rows of a Chroma
+    store, else the number of files), byte size, a content hash and the newest
+    file mtime, plus a stamp: the newest mtime of the directory and its direct
+    entries. refresh() compares stamps with one scandir per collection and only
+    rescans collections whose stamp moved, so reads stay cheap with hundreds of
+    collections. Edits deep inside a collection that leave its top level untouched
+    need refresh(force=True).
+    """
+    VERSION = 1
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.entries = {}  # collection path -> manifest entry
+        self.dirty = False
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                self.entries = data["collections"]
+        except (OSError, ValueError):
+            pass
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_write(self.path, 'w') as f:
+            json.dump({"version": self.VERSION, "collections": self.entries}, f, indent=1)
+        self.dirty = False
+
+    @staticmethod
+    def stamp(directory: Path) -> Optional[int]:
+        """Newest mtime (ns) of the directory and its direct entries; None if missing"""
+        try:
+            newest = directory.stat().st_mtime_ns
+            with os.scandir(directory) as it:
+                for entry in it:
+                    newest = max(newest, entry.stat(follow_symlinks=False).st_mtime_ns)
+            return newest
+        except OSError:
+            return None
+
+    @staticmethod
+    def count_chunks(directory: Path) -> Optional[int]:
+        """Rows in the collection's Chroma store, if it has one"""
+        store = directory / "chroma.sqlite3"
+        if not store.exists():
+            return None
+        try:
+            with sqlite3.connect(f"file:{store.as_posix()}?mode=ro", uri=True) as db:
+                return db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        except sqlite3.Error:
+            return None
+
+    @classmethod
+    def scan(cls, directory: Path, stamp: int) -> Dict:
+        """Walk one collection: file count, bytes, content hash and newest mtime"""
+        digest = hashlib.sha1()
+        files = size = newest = 0
+        for path in sorted(p for p in directory.rglob("*") if p.is_file()):
+            st = path.stat()
+            files += 1
+            size += st.st_size
+            newest = max(newest, st.st_mtime_ns)
+            digest.update(path.relative_to(directory).as_posix().encode("utf-8") + b"\0")
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+        chunks = cls.count_chunks(directory)
+        return {
+            "stamp": stamp,
+            "status": "operational",
+            "chunks": files if chunks is None else chunks,
+            "files": files,
+            "bytes": size,
+            "content_hash": digest.hexdigest(),
+            "newest_mtime": newest,
+            "last_updated": datetime.fromtimestamp(newest / 1e9).strftime("%Y-%m-%d") if newest else None,
+            "scanned_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+    def refresh(self, paths: List[str], force: bool = False) -> List[str]:
+        """Bring the manifest up to date for these collection paths; returns the ones rescanned"""
+        rescanned = []
+        for rel in paths:
+            directory = RAG_ROOT / rel
+            stamp = self.stamp(directory)
+            entry = self.entries.get(rel)
+            if stamp is None:
+                if not entry or entry["status"] != "missing":
+                    self.entries[rel] = {"stamp": None, "status": "missing", "chunks": 0, "files": 0, "bytes": 0,
+                                         "content_hash": None, "newest_mtime": None, "last_updated": None}
+                    self.dirty = True
+                continue
+            if force or not entry or entry["stamp"] != stamp:
+                self.entries[rel] = self.scan(directory, stamp)
+                self.dirty = True
+                rescanned.append(rel)
+        for rel in set(self.entries) - set(paths):
+            del self.entries[rel]
+            self.dirty = True
+        self.save()
+        return rescanned
+
+
 class RAGManager:
     """Intelligent RAG collection manager"""
 
-    def __init__(self, metadata_file: str = ".claude/rag-metadata.json"):
+    def __init__(self, metadata_file: str = ".claude/rag-metadata.json",
+                 registry_file: str = ".claude/rag-registry.json"):
         self.metadata_file = metadata_file
+        # record_usage appends one event per line to usage_log; compact() folds them into metadata_file
+        self.usage_log = Path(metadata_file).with_name("rag-usage.jsonl")
+        self.lock_file = Path(metadata_file).with_name("rag-usage.lock")
         self.metadata = self._load_metadata()
+        self.registry = CollectionRegistry(registry_file)
+        self.aliases_file = Path(metadata_file).with_name("rag-aliases.json")
+        self.stores = {}  # collection name -> [chroma collections], opened once per process
+        self.stores_lock = threading.Lock()
+        self.embedder = None
+        self.collections = {}
+        self.rescanned = self.refresh()
 
     def _load_metadata(self) -> Dict:
-        """Load RAG metadata from file"""
+        """RAG metadata: the snapshot file plus the usage events logged since its last compaction"""
+        os.makedirs(os.path.dirname(self.metadata_file) or ".", exist_ok=True)
+        with file_lock(self.lock_file):
+            metadata = self._read_snapshot()
+            self._fold(metadata, self._read_log())
+        return metadata
+
+    def _read_snapshot(self) -> Dict:
         if os.path.exists(self.metadata_file):
             with open(self.metadata_file, 'r') as f:
                 return json.load(f)
-        return {"collections": AVAILABLE_RAGS, "statistics": {}}
+        return {"collections": {}, "statistics": {}}  # per-collection usage; facts come from the registry
+
+    def _read_log(self) -> List[Dict]:
+        """Usage events in the log; a torn last line (writer killed mid-write) is skipped"""
+        events = []
+        try:
+            with open(self.usage_log, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        pass
+        except FileNotFoundError:
+            pass
+        return events
+
+    @staticmethod
+    def _fold(metadata: Dict, events: List[Dict]):
+        """Apply usage events to per-collection counts and global statistics"""
+        stats = metadata.setdefault("statistics", {})
+        for event in events:
+            usage = metadata["collections"].setdefault(event["rag"], {})
+            usage.setdefault("collection_path", event["path"])
+            usage["usage_count"] = usage.get("usage_count", 0) + 1
+            usage["last_used"] = event["date"]
+            stats["total_queries"] = stats.get("total_queries", 0) + 1
+            stats["total_tokens_saved"] = stats.get("total_tokens_saved", 0) + event["tokens_saved"]
 
-    def _save_metadata(self):
-        """Save RAG metadata to file"""
-        os.makedirs(os.path.dirname(self.metadata_file), exist_ok=True)
-        with open(self.metadata_file, 'w') as f:
-            json.dump(self.metadata, f, indent=2)
+    def compact(self) -> int:
+        """Fold the usage log into the metadata snapshot and empty it; returns events folded.
+
+        Runs under the usage lock, so no event is lost or counted twice while
+        writers append and readers combine snapshot plus log.
+        """
+        with file_lock(self.lock_file):
+            events = self._read_log()
+            if not events:
+                return 0
+            metadata = self._read_snapshot()
+            self._fold(metadata, events)
+            self._save_metadata(metadata)
+            open(self.usage_log, 'w').close()
+        return len(events)
+
+    def _known_collections(self) -> Dict[str, Dict]:
+        """Configured collections plus any unregistered directories next to them"""
+        known = dict(AVAILABLE_RAGS)
+        for name, info in self.metadata["collections"].items():
+            known[name] = dict(known.get(name, {}), **info)
+        paths = {info["collection_path"] for info in known.values()}
+        for parent in sorted({str(Path(p).parent) for p in paths}):
+            try:
+                with os.scandir(RAG_ROOT / parent) as it:
+                    found = sorted(e.name for e in it if e.is_dir())
+            except OSError:
+                continue
+            for name in found:
+                rel = Path(parent, name).as_posix()
+                if rel not in paths and name not in known:
+                    known[name] = {"version": "unknown", "source": "discovered", "collection_path": rel}
+        return known
+
+    def refresh(self, force: bool = False) -> List[str]:
+        """Sync the registry with the collection directories; returns the names rescanned"""
+        known = self._known_collections()
+        rescanned = set(self.registry.refresh([info["collection_path"] for info in known.values()], force))
+        self.collections = {}
+        for name, info in known.items():
+            disk = self.registry.entries[info["collection_path"]]
+            self.collections[name] = dict(info, **{k: v for k, v in disk.items() if k != "stamp"},
+                                          usage_count=info.get("usage_count", 0))
+        aliases = dict(TECH_ALIASES)
+        try:
+            with open(self.aliases_file, 'r') as f:
+                aliases.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+        for name, info in self.collections.items():
+            aliases.update({alias: name for alias in info.get("aliases", [])})
+        self.resolver = TechResolver(list(self.collections), aliases)
+        return [name for name, info in known.items() if info["collection_path"] in rescanned]
+
+    def _save_metadata(self, metadata: Dict):
+        """Atomically replace the metadata snapshot (call with the usage lock held)"""
+        with atomic_write(Path(self.metadata_file), 'w') as f:
+            json.dump(metadata, f, indent=2)
 
     def has_rag_for_technology(self, technology: str) -> Tuple[bool, Optional[str]]:
         """
-        Check if we have RAG for this technology
+        Check if we have RAG for this technology (names, aliases and near-misses, see TechResolver)
 
         Returns:
             (exists, rag_name) tuple
         """
-        tech_lower = technology.lower()
-
-        # Direct match
-        if tech_lower in self.metadata["collections"]:
-            return True, tech_lower
-
-        # Partial match
-        for rag_name in self.metadata["collections"].keys():
-            if tech_lower in rag_name or rag_name in tech_lower:
-                return True, rag_name
-
+        candidates = self.resolver.resolve(technology, limit=1)
+        if candidates and candidates[0][1] >= TechResolver.ACCEPT:
+            return True, candidates[0][0]
         return False, None
 
     def is_rag_fresh(self, rag_name: str, max_age_days: int = 30) -> bool:
-        """Check if RAG is fresh enough"""
-        if rag_name not in self.metadata["collections"]:
+        """Check if RAG is fresh enough (newest file in the collection on disk)"""
+        if rag_name not in self.collections:
             return False
 
-        last_updated_str = self.metadata["collections"][rag_name]["last_updated"]
+        last_updated_str = self.collections[rag_name]["last_updated"]
+        if not last_updated_str:  # missing on disk
+            return False
         last_updated = datetime.strptime(last_updated_str, "%Y-%m-%d")
         age_days = (datetime.now() - last_updated).days
 
@@ -250,16 +640,18 @@ class RAGManager:
                     "reasoning": f"RAG collection '{rag_name}' exists and is fresh",
                     "token_cost": 800,
                     "token_savings": 24000,
-                    "chunks": self.metadata["collections"][rag_name]["chunks"]
+                    "chunks": self.collections[rag_name]["chunks"]
                 }
             else:
+                missing = self.collections[rag_name]["status"] == "missing"
                 return {
                     "action": "update_rag",
                     "rag_name": rag_name,
-                    "reasoning": f"RAG collection '{rag_name}' exists but is outdated",
+                    "reasoning": f"RAG collection '{rag_name}' "
+                                 + ("is registered but missing on disk" if missing else "exists but is outdated"),
                     "token_cost": 5000,
                     "token_savings": 20000,
-                    "chunks": self.metadata["collections"][rag_name]["chunks"]
+                    "chunks": self.collections[rag_name]["chunks"]
                 }
 
         # No RAG - calculate importance
@@ -294,21 +686,25 @@ class RAGManager:
             }
 
     def record_usage(self, rag_name: str, tokens_saved: int = 24000):
-        """Record RAG usage for statistics"""
-        if rag_name in self.metadata["collections"]:
-            self.metadata["collections"][rag_name]["usage_count"] += 1
-            self.metadata["collections"][rag_name]["last_used"] = datetime.now().strftime("%Y-%m-%d")
-
-            # Update global statistics
-            stats = self.metadata.setdefault("statistics", {})
-            stats["total_queries"] = stats.get("total_queries", 0) + 1
-            stats["total_tokens_saved"] = stats.get("total_tokens_saved", 0) + tokens_saved
-
-            self._save_metadata()
+        """Record RAG usage for statistics: one line appended to the usage log under the
+        lock, whatever the size of the history. The log is compacted once it grows
+        past USAGE_COMPACT_BYTES."""
+        if rag_name in self.collections:
+            event = {"rag": rag_name, "tokens_saved": tokens_saved, "date": datetime.now().strftime("%Y-%m-%d"),
+                     "path": self.collections[rag_name]["collection_path"]}
+            with file_lock(self.lock_file):
+                with open(self.usage_log, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(event) + "\n")
+                    size = f.tell()
+            self._fold(self.metadata, [event])
+            self.collections[rag_name].update(usage_count=self.metadata["collections"][rag_name]["usage_count"],
+                                              last_used=event["date"])
+            if size > USAGE_COMPACT_BYTES:
+                self.compact()
 
     def get_statistics(self) -> Dict:
-        """Get RAG usage statistics"""
-        stats = self.metadata.get("statistics", {})
+        """Get RAG usage statistics (snapshot plus the events logged since, from every writer)"""
+        stats = self._load_metadata().get("statistics", {})
         total_queries = stats.get("total_queries", 0)
         total_tokens_saved = stats.get("total_tokens_saved", 0)
 
@@ -316,20 +712,132 @@ class RAGManager:
             "total_queries": total_queries,
             "total_tokens_saved": total_tokens_saved,
             "avg_tokens_saved_per_query": total_tokens_saved // total_queries if total_queries > 0 else 0,
-            "total_collections": len(self.metadata["collections"]),
-            "total_chunks": sum(c["chunks"] for c in self.metadata["collections"].values()),
+            "total_collections": len(self.collections),
+            "total_chunks": sum(c["chunks"] for c in self.collections.values()),
+            "total_bytes": sum(c["bytes"] for c in self.collections.values()),
             "roi_percentage": 97 if total_queries > 0 else 0
         }
 
+    def _embed(self, text: str) -> List[float]:
+        """Unit-length query vector from EMBED_MODEL (loaded on first use)"""
+        if self.embedder is None:
+            from sentence_transformers import SentenceTransformer
+            self.embedder = SentenceTransformer(EMBED_MODEL, device="cpu")
+        return self.embedder.encode([text], normalize_embeddings=True)[0].tolist()
+
+    def _open_store(self, rag_name: str) -> List:
+        """The Chroma collections stored under a RAG collection's directory"""
+        with self.stores_lock:
+            if rag_name in self.stores:
+                return self.stores[rag_name]
+        import chromadb
+        client = chromadb.PersistentClient(path=str(RAG_ROOT / self.collections[rag_name]["collection_path"]))
+        stores = [client.get_collection(c if isinstance(c, str) else c.name) for c in client.list_collections()]
+        with self.stores_lock:
+            self.stores[rag_name] = stores
+        return stores
+
+    @staticmethod
+    def _similarity(distance: float, space: str) -> float:
+        """Cosine similarity from a Chroma distance (the vectors are unit length)"""
+        if space == "l2":  # squared euclidean = 2 - 2cos
+            return 1 - distance / 2
+        return 1 - distance  # cosine and ip distances are 1 - cos
+
+    @staticmethod
+    def _in_background(fn, *args) -> Future:
+        """Run fn(*args) on a daemon thread: a call still running when the caller gives up
+        on it never holds up interpreter exit (ThreadPoolExecutor workers are joined)"""
+        future = Future()
+
+        def run():
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args))
+                except BaseException as e:
+                    future.set_exception(e)
+
+        threading.Thread(target=run, daemon=True).start()
+        return future
+
+    def _search_collection(self, rag_name: str, vector: List[float], k: int) -> List[Dict]:
+        """Top k hits of one collection, best first"""
+        stores = self._open_store(rag_name)
+        hits = []
+        for store in stores:
+            space = (store.metadata or {}).get("hnsw:space", "l2")
+            found = store.query(query_embeddings=[vector], n_results=k, include=["documents", "metadatas", "distances"])
+            for text, meta, distance in zip(found["documents"][0], found["metadatas"][0], found["distances"][0]):
+                meta = meta or {}
+                hits.append({"collection": rag_name, "score": round(self._similarity(distance, space), 4),
+                             "source": meta.get("filename") or meta.get("source") or meta.get("url") or "",
+                             "text": text, "metadata": meta})
+        return sorted(hits, key=lambda h: -h["score"])[:k]
+
+    def search(self, question: str, collections: Optional[List[str]] = None, k: int = 5,
+               timeout: float = SEARCH_TIMEOUT) -> Dict:
+        """
+        Search several collections at once and merge their hits into one ranked list
+
+        Collections default to those the question names (see TechResolver.mentions),
+        else every collection present on disk. The query is embedded once while the
+        collections' stores are opened, all in parallel; each collection is queried on
+        its own thread as soon as its store is open. Hits carry cosine similarity, so
+        lists from different collections compare directly and are merged with a heap.
+        A collection whose store open and query have not finished within timeout
+        seconds of the opens starting is reported as "timeout" and left out, so the
+        call costs about the slowest collection's latency (or timeout), not the sum.
+
+        Returns:
+            {"results": [{collection, score, source, text, metadata}], "collections": {name: status},
+             "elapsed_ms": int}
+        """
+        start = time.perf_counter()
+        names = collections or self.resolver.mentions(question) or list(self.collections)
+        status = {}
+        targets = []
+        for name in names:
+            info = self.collections.get(name)
+            if info is None:
+                status[name] = "unknown collection"
+            elif not (RAG_ROOT / info["collection_path"] / "chroma.sqlite3").exists():
+                status[name] = "no vector store"
+            else:
+                targets.append(name)
+        ranked = []
+        if targets:
+            deadline = time.perf_counter() + timeout  # covers each collection's store open and query
+            query_vector = self._in_background(self._embed, question)
+            opened = {name: self._in_background(self._open_store, name) for name in targets}
+            vector = query_vector.result()  # model load errors (e.g. ImportError) reach the caller
+
+            def open_and_search(name):
+                opened[name].result()  # waits for this collection's store only; raises its open error
+                return self._search_collection(name, vector, k)
+
+            futures = {self._in_background(open_and_search, name): name for name in targets}
+            done, _ = wait(futures, timeout=max(0.0, deadline - time.perf_counter()))
+            for future, name in futures.items():
+                if future not in done:
+                    status[name] = "timeout"
+                elif future.exception():
+                    status[name] = f"error: {future.exception()}"
+                else:
+                    ranked.append(future.result())
+                    status[name] = f"{len(ranked[-1])} hits"
+        results = list(itertools.islice(heapq.merge(*ranked, key=lambda h: -h["score"]), k))
+        return {"results": results, "collections": status, "elapsed_ms": int((time.perf_counter() - start) * 1000)}
+
     def list_collections(self) -> List[Dict]:
         """List all RAG collections with stats"""
         collections = []
-        for name, info in self.metadata["collections"].items():
+        for name, info in self.collections.items():
             collections.append({
                 "name": name,
                 "chunks": info["chunks"],
+                "bytes": info["bytes"],
                 "last_updated": info["last_updated"],
-                "version": info["version"],
+                "version": info.get("version", "unknown"),
                 "usage_count": info.get("usage_count", 0),
                 "status": info["status"]
             })
@@ -342,10 +850,14 @@ if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="RAG Collection Manager")
-    parser.add_argument("command", choices=["check", "recommend", "list", "stats", "record"])
+    parser.add_argument("command", choices=["check", "recommend", "list", "stats", "record", "refresh", "compact", "resolve",
+                                            "search"])
     parser.add_argument("--tech", help="Technology name")
     parser.add_argument("--question", help="Question/query")
     parser.add_argument("--rag", help="RAG collection name")
+    parser.add_argument("--force", action="store_true", help="refresh: rescan every collection")
+    parser.add_argument("--k", type=int, default=5, help="search: number of hits")
+    parser.add_argument("--timeout", type=float, default=SEARCH_TIMEOUT, help="search: seconds per collection")
 
     args = parser.parse_args()
     manager = RAGManager()
@@ -358,14 +870,30 @@ if __name__ == "__main__":
         has_rag, rag_name = manager.has_rag_for_technology(args.tech)
         if has_rag:
             is_fresh = manager.is_rag_fresh(rag_name)
-            info = manager.metadata["collections"][rag_name]
+            info = manager.collections[rag_name]
             print(f"✅ RAG exists: {rag_name}")
             print(f"   Chunks: {info['chunks']}")
+            print(f"   Size: {info['bytes']:,} bytes")
             print(f"   Last updated: {info['last_updated']}")
             print(f"   Fresh: {'Yes' if is_fresh else 'No (>30 days old)'}")
             print(f"   Status: {info['status']}")
         else:
             print(f"❌ No RAG collection for: {args.tech}")
+            suggestions = manager.resolver.resolve(args.tech, limit=3)
+            if suggestions:
+                print(f"   Did you mean: {', '.join(name for name, _ in suggestions)}?")
+
+    elif args.command == "resolve":
+        if not args.tech:
+            print("Error: --tech required")
+            sys.exit(1)
+
+        candidates = manager.resolver.resolve(args.tech)
+        print(f"\n🔎 Candidates for '{args.tech}':")
+        for name, score in candidates:
+            print(f"   {name}: {score:.2f}{'' if score >= TechResolver.ACCEPT else ' (suggestion only)'}")
+        if not candidates:
+            print("   (none)")
 
     elif args.command == "recommend":
         if not args.tech:
@@ -387,8 +915,8 @@ if __name__ == "__main__":
         print("\n📚 RAG Collections:\n")
         for c in collections:
             print(f"  • {c['name']}")
-            print(f"    Chunks: {c['chunks']:,}")
-            print(f"    Updated: {c['last_updated']}")
+            print(f"    Chunks: {c['chunks']:,} ({c['bytes']:,} bytes)")
+            print(f"    Updated: {c['last_updated'] or 'n/a'}")
             print(f"    Usage: {c['usage_count']} queries")
             print(f"    Status: {c['status']}")
             print()
@@ -398,6 +926,7 @@ if __name__ == "__main__":
         print("\n📈 RAG System Statistics:\n")
         print(f"  Total collections: {stats['total_collections']}")
         print(f"  Total chunks: {stats['total_chunks']:,}")
+        print(f"  Total size: {stats['total_bytes']:,} bytes")
         print(f"  Total queries: {stats['total_queries']:,}")
         print(f"  Total tokens saved: {stats['total_tokens_saved']:,}")
         print(f"  Avg tokens saved/query: {stats['avg_tokens_saved_per_query']:,}")
@@ -410,3 +939,36 @@ if __name__ == "__main__":
 
         manager.record_usage(args.rag)
         print(f"✅ Recorded usage for: {args.rag}")
+
+    elif args.command == "search":
+        if not args.question:
+            print("Error: --question required")
+            sys.exit(1)
+
+        rags = [r.strip() for r in args.rag.split(",")] if args.rag else None
+        try:
+            found = manager.search(args.question, rags, args.k, args.timeout)
+        except ImportError as e:
+            print(f"Error: {e.name} is required for search (pip install chromadb sentence-transformers)")
+            sys.exit(1)
+        print(f"\n🔎 Results for '{args.question}' ({found['elapsed_ms']} ms):")
+        for name, state in found["collections"].items():
+            print(f"   {name}: {state}")
+        for i, hit in enumerate(found["results"], 1):
+            print(f"\n  {i}. [{hit['collection']}] {hit['source']} (score: {hit['score']:.3f})")
+            print(f"     {' '.join(hit['text'].split())[:300]}")
+        if not found["results"]:
+            print("\n   No results.")
+
+    elif args.command == "compact":
+        print(f"✅ Folded {manager.compact()} usage events into {manager.metadata_file}")
+
+    elif args.command == "refresh":
+        rescanned = manager.refresh(force=True) if args.force else manager.rescanned
+        print(f"🔄 Rescanned {len(rescanned)} of {len(manager.collections)} collections")
+        for name in rescanned:
+            info = manager.collections[name]
+            print(f"  • {name}: {info['chunks']:,} chunks, {info['bytes']:,} bytes, hash {info['content_hash'][:12]}")
+        missing = sorted(n for n, c in manager.collections.items() if c["status"] == "missing")
+        if missing:
+            print(f"  Missing on disk: {', '.join(missing)}")
@@ -7,11 +7,11 @@ Processes test files and enriches them with actual Workday task steps
 import os
 import re
 import sys
-import subprocess
 from pathlib import Path
 
-# Add parent directory to path for workday_rag import
+# Add parent directory to path for workday_rag / workday_rag_client imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
+import workday_rag_client
 
 ELECTRON_TESTS_DIR = Path(__file__).parent.parent
 WORKDAY_RAG_SCRIPT = ELECTRON_TESTS_DIR / "workday_rag.py"
@@ -26,13 +26,7 @@ def extract_task_name(content):
 def query_workday_rag(task_name):
     """Query the Workday RAG system for task information"""
     try:
-        result = subprocess.run(
-            [sys.executable, str(WORKDAY_RAG_SCRIPT), task_name],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        return result.stdout
+        return workday_rag_client.query(task_name)
     except Exception as e:
         print(f"  ERROR querying RAG: {e}")
         return None
@@ -35,12 +35,16 @@ def extract_task_name(content):
         return task
     return None
 
+_rag = None
+
 def query_workday_rag(task_name):
     """Query the Workday RAG system for task information"""
+    global _rag
     try:
-        # Call RAG search directly
-        rag = workday_rag.WorkdayRAG()
-        results = rag.search(task_name, top_k=5)
+        # Call RAG search directly; the corpus is loaded once per run, not per query
+        if _rag is None:
+            _rag = workday_rag.WorkdayRAG()
+        results = _rag.search(task_name, top_k=5)
         return results
     except Exception as e:
         print(f"  ERROR querying RAG: {e}")
@@ -1,6 +1,5 @@
 #!/usr/bin/env python3
 import pandas as pd
-import subprocess
 import sys
 from pathlib import Path
 
@@ -9,10 +8,13 @@ EXCEL_PATH = BASE_DIR / "WD_Test_Scenarios_Master.xlsx"
 OUTPUT_BASE = BASE_DIR / "Sourcing"
 RAG_SCRIPT = BASE_DIR.parent / "workday_rag.py"
 
+# Resident RAG client: uses `workday_rag.py --serve` if running, else loads the corpus once in-process
+sys.path.insert(0, str(RAG_SCRIPT.parent))
+import workday_rag_client
+
 def query_rag(search_term):
     try:
-        result = subprocess.run(['python', str(RAG_SCRIPT), search_term], capture_output=True, text=True, timeout=30, cwd=str(RAG_SCRIPT.parent))
-        return result.stdout
+        return workday_rag_client.query(search_term)
     except Exception as e:
         print(f"  WARNING RAG query failed: {e}", file=sys.stderr)
         return None
@@ -10,21 +10,16 @@ import json
 import os
 import sys
 import re
-import subprocess
 from pathlib import Path
 
+# Resident RAG client: uses `workday_rag.py --serve` if running, else loads the corpus once in-process
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import workday_rag_client
+
 def query_rag(task):
     """Query RAG system"""
     try:
-        rag_script = Path(__file__).parent.parent / 'workday_rag.py'
-        result = subprocess.run(
-            [sys.executable, str(rag_script), task],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-
-        output = result.stdout
+        output = workday_rag_client.query(task)
 
         # Extract confidence score
         score_match = re.search(r'score:\s*(\d+)', output, re.IGNORECASE)
@@ -7,7 +7,6 @@ Generates test scenarios from Excel with RAG-based enrichment
 import pandas as pd
 import os
 import re
-import subprocess
 import sys
 
 # Paths
@@ -15,6 +14,10 @@ EXCEL_PATH = r"C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs
 OUTPUT_DIR = r"C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs\electron_tests\Advanced_Compensation"
 RAG_SCRIPT = r"C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs\workday_rag.py"
 
+# Resident RAG client: uses `workday_rag.py --serve` if running, else loads the corpus once in-process
+sys.path.insert(0, os.path.dirname(RAG_SCRIPT))
+import workday_rag_client
+
 def sanitize_filename(name):
     """Sanitize scenario name for filename"""
     name = re.sub(r'[<>:"/\\|?*]', '_', name)
@@ -27,18 +30,12 @@ def query_rag(task_step):
         return None, "No Task/Step provided"
 
     try:
-        result = subprocess.run(
-            [sys.executable, RAG_SCRIPT, str(task_step)],
-            capture_output=True,
-            text=True,
-            timeout=30,
-            cwd=os.path.dirname(RAG_SCRIPT)
-        )
-
-        if result.returncode == 0 and result.stdout.strip():
-            return result.stdout.strip(), None
+        output = workday_rag_client.query(str(task_step)).strip()
+
+        if output:
+            return output, None
         else:
-            return None, f"RAG query failed: {result.stderr}"
+            return None, "RAG query failed: no output"
     except Exception as e:
         return None, f"RAG error: {str(e)}"
 
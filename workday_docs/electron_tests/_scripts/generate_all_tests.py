@@ -8,7 +8,6 @@ import pandas as pd
 import json
 import os
 import sys
-import subprocess
 from pathlib import Path
 
 # Configuration
@@ -16,6 +15,10 @@ EXCEL_PATH = Path("C:/Users/SainathreddyDadiredd/OneDrive - ERPA/Claude/workday_
 OUTPUT_BASE = Path("C:/Users/SainathreddyDadiredd/OneDrive - ERPA/Claude/workday_docs/electron_tests")
 RAG_SCRIPT = Path("C:/Users/SainathreddyDadiredd/OneDrive - ERPA/Claude/workday_docs/workday_rag.py")
 
+# Resident RAG client: uses `workday_rag.py --serve` if running, else loads the corpus once in-process
+sys.path.insert(0, str(RAG_SCRIPT.parent))
+import workday_rag_client
+
 # Functional area mappings
 AREA_MAPPING = {
     'Tax': 'tax',
@@ -26,13 +29,7 @@ AREA_MAPPING = {
 def query_rag(query):
     """Query Workday RAG for relevant documentation"""
     try:
-        result = subprocess.run(
-            ['python', str(RAG_SCRIPT), query],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        return result.stdout if result.returncode == 0 else ""
+        return workday_rag_client.query(query)
     except Exception as e:
         print(f"RAG query failed: {e}")
         return ""
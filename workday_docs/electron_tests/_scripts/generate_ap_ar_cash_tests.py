@@ -7,7 +7,6 @@ Generates test scenarios from Excel with RAG-based enrichment
 import pandas as pd
 import os
 import re
-import subprocess
 import sys
 from pathlib import Path
 
@@ -16,6 +15,10 @@ EXCEL_PATH = r"C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs
 BASE_OUTPUT_DIR = r"C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs\electron_tests"
 RAG_SCRIPT = r"C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs\workday_rag.py"
 
+# Resident RAG client: uses `workday_rag.py --serve` if running, else loads the corpus once in-process
+sys.path.insert(0, os.path.dirname(RAG_SCRIPT))
+import workday_rag_client
+
 # Module configurations
 MODULES = {
     "Accounts Payable": {
@@ -44,18 +47,12 @@ def query_rag(task_step):
         return None, "No Task/Step provided"
 
     try:
-        result = subprocess.run(
-            [sys.executable, RAG_SCRIPT, str(task_step)],
-            capture_output=True,
-            text=True,
-            timeout=30,
-            cwd=os.path.dirname(RAG_SCRIPT)
-        )
-
-        if result.returncode == 0 and result.stdout.strip():
-            return result.stdout.strip(), None
+        output = workday_rag_client.query(str(task_step)).strip()
+
+        if output:
+            return output, None
         else:
-            return None, f"RAG query failed: {result.stderr}"
+            return None, "RAG query failed: no output"
     except Exception as e:
         return None, f"RAG error: {str(e)}"
 
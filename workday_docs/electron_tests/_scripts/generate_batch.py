@@ -6,7 +6,6 @@ Generate Electron Test Scenarios in batches
 import pandas as pd
 import os
 import re
-import subprocess
 import sys
 from pathlib import Path
 
@@ -23,17 +22,14 @@ def sanitize_filename(text):
     text = re.sub(r'\s+', '_', text)
     return text[:100]
 
+# Resident RAG client: uses `workday_rag.py --serve` if running, else loads the corpus once in-process
+sys.path.insert(0, os.path.dirname(RAG_SCRIPT))
+import workday_rag_client
+
 def query_rag(task_step):
-    """Query workday_rag.py for task information"""
+    """Query workday_rag for task information"""
     try:
-        result = subprocess.run(
-            ['python', RAG_SCRIPT, task_step],
-            capture_output=True,
-            text=True,
-            timeout=30,
-            cwd=os.path.dirname(RAG_SCRIPT)
-        )
-        return result.stdout if result.returncode == 0 else ""
+        return workday_rag_client.query(task_step)
     except Exception as e:
         return f"RAG query failed: {str(e)}"
 
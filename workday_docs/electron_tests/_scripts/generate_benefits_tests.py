@@ -5,7 +5,7 @@ Queries Workday RAG for each scenario to generate accurate test steps
 """
 
 import pandas as pd
-import subprocess
+import sys
 import os
 import re
 from pathlib import Path
@@ -15,6 +15,10 @@ EXCEL_PATH = r"C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs
 OUTPUT_DIR = r"C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs\electron_tests\Benefits"
 RAG_SCRIPT = r"C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs\workday_rag.py"
 
+# Resident RAG client: uses `workday_rag.py --serve` if running, else loads the corpus once in-process
+sys.path.insert(0, os.path.dirname(RAG_SCRIPT))
+import workday_rag_client
+
 def sanitize_filename(name):
     """Sanitize scenario name for filename"""
     # Remove special characters, replace spaces with underscores
@@ -25,13 +29,8 @@ def sanitize_filename(name):
 def query_rag(task_step):
     """Query Workday RAG for task/step information"""
     try:
-        result = subprocess.run(
-            ['python', RAG_SCRIPT, task_step],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        return result.stdout.strip()
+        output = workday_rag_client.query(task_step)
+        return output.strip()
     except Exception as e:
         return f"RAG_ERROR: {str(e)}"
 
@@ -6,23 +6,17 @@ Uses RAG to find relevant SOAP operations and generates confidence scores
 import json
 import os
 import sys
-import subprocess
 from pathlib import Path
 from typing import Dict, List, Optional
 
-# Add parent directory to path for workday_rag
+# Add parent directory to path for workday_rag / workday_rag_client
 sys.path.insert(0, str(Path(__file__).parent.parent))
+import workday_rag_client
 
 def query_rag(query: str) -> str:
     """Query the Workday RAG system"""
     try:
-        result = subprocess.run(
-            ['python', '../workday_rag.py', query],
-            capture_output=True,
-            text=True,
-            cwd=Path(__file__).parent
-        )
-        return result.stdout
+        return workday_rag_client.query(query)
     except Exception as e:
         return f"RAG query failed: {e}"
 
@@ -5,7 +5,7 @@ Generate Electron tests for Endowments, Case Management, and Lease Accounting fr
 
 import pandas as pd
 import os
-import subprocess
+import sys
 import re
 from pathlib import Path
 
@@ -14,6 +14,10 @@ EXCEL_PATH = r"C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs
 RAG_SCRIPT = r"C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs\workday_rag.py"
 OUTPUT_BASE = r"C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs\electron_tests"
 
+# Resident RAG client: uses `workday_rag.py --serve` if running, else loads the corpus once in-process
+sys.path.insert(0, os.path.dirname(RAG_SCRIPT))
+import workday_rag_client
+
 # Functional areas to process
 AREAS = {
     "Endowments": "Endowments",
@@ -24,15 +28,7 @@ AREAS = {
 def query_rag(query_text):
     """Query the Workday RAG system."""
     try:
-        result = subprocess.run(
-            ["python", RAG_SCRIPT, query_text],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        if result.returncode == 0:
-            return result.stdout.strip()
-        return None
+        return workday_rag_client.query(query_text).strip()
     except Exception as e:
         print(f"RAG query failed: {e}")
         return None
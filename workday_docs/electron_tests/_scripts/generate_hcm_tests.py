@@ -5,7 +5,7 @@ Generates individual test files for each HCM scenario
 """
 
 import pandas as pd
-import subprocess
+import sys
 import re
 import os
 from pathlib import Path
@@ -15,6 +15,10 @@ EXCEL_PATH = "WD_Test_Scenarios_Master.xlsx"
 OUTPUT_DIR = "HCM"
 RAG_SCRIPT = "../workday_rag.py"
 
+# Resident RAG client: uses `workday_rag.py --serve` if running, else loads the corpus once in-process
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.path.dirname(RAG_SCRIPT)))
+import workday_rag_client
+
 def sanitize_filename(name):
     """Convert scenario name to safe filename"""
     # Remove special characters, keep alphanumeric, spaces, hyphens
@@ -31,18 +35,7 @@ def query_rag(task_step):
 
     try:
         # Run RAG query
-        result = subprocess.run(
-            ["python", RAG_SCRIPT, task_step],
-            capture_output=True,
-            text=True,
-            timeout=30,
-            cwd=os.path.dirname(os.path.abspath(__file__))
-        )
-
-        if result.returncode != 0:
-            return None, 0.0, "RAG_ERROR"
-
-        output = result.stdout
+        output = workday_rag_client.query(task_step)
 
         # Extract confidence score (looking for patterns like "Score: 8.5" or "Confidence: 8.5/10")
         confidence = 5.0  # Default medium confidence
@@ -52,8 +45,6 @@ def query_rag(task_step):
 
         return output, confidence, "RAG"
 
-    except subprocess.TimeoutExpired:
-        return None, 0.0, "TIMEOUT"
     except Exception as e:
         return None, 0.0, f"ERROR: {str(e)}"
 
@@ -5,7 +5,7 @@ Generates individual test files for Payroll Canada, UK, France, and Interface sc
 """
 
 import pandas as pd
-import subprocess
+import sys
 import re
 import os
 from pathlib import Path
@@ -14,6 +14,10 @@ from pathlib import Path
 EXCEL_PATH = "WD_Test_Scenarios_Master.xlsx"
 RAG_SCRIPT = "../workday_rag.py"
 
+# Resident RAG client: uses `workday_rag.py --serve` if running, else loads the corpus once in-process
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.path.dirname(RAG_SCRIPT)))
+import workday_rag_client
+
 # Functional areas to process with their output directories
 PAYROLL_AREAS = {
     'Payroll for Canada': 'Payroll_Canada',
@@ -38,18 +42,7 @@ def query_rag(task_step):
 
     try:
         # Run RAG query
-        result = subprocess.run(
-            ["python", RAG_SCRIPT, task_step],
-            capture_output=True,
-            text=True,
-            timeout=30,
-            cwd=os.path.dirname(os.path.abspath(__file__))
-        )
-
-        if result.returncode != 0:
-            return None, 0.0, "RAG_ERROR"
-
-        output = result.stdout
+        output = workday_rag_client.query(task_step)
 
         # Extract confidence score (looking for patterns like "Score: 8.5" or "Confidence: 8.5/10")
         confidence = 5.0  # Default medium confidence
@@ -59,8 +52,6 @@ def query_rag(task_step):
 
         return output, confidence, "RAG"
 
-    except subprocess.TimeoutExpired:
-        return None, 0.0, "TIMEOUT"
     except Exception as e:
         return None, 0.0, f"ERROR: {str(e)}"
 
@@ -3,7 +3,7 @@
 Generate Electron test files for Learning functional areas
 """
 import pandas as pd
-import subprocess
+import sys
 import json
 import re
 import os
@@ -14,6 +14,10 @@ EXCEL_PATH = "C:/Users/SainathreddyDadiredd/OneDrive - ERPA/Claude/workday_docs/
 RAG_SCRIPT = "C:/Users/SainathreddyDadiredd/OneDrive - ERPA/Claude/workday_docs/workday_rag.py"
 OUTPUT_BASE = "C:/Users/SainathreddyDadiredd/OneDrive - ERPA/Claude/workday_docs/electron_tests"
 
+# Resident RAG client: uses `workday_rag.py --serve` if running, else loads the corpus once in-process
+sys.path.insert(0, os.path.dirname(RAG_SCRIPT))
+import workday_rag_client
+
 def sanitize_filename(name):
     """Convert scenario name to safe filename"""
     # Remove special characters, replace spaces with underscores
@@ -24,13 +28,7 @@ def sanitize_filename(name):
 def query_rag(task_description):
     """Query Workday RAG for task information"""
     try:
-        result = subprocess.run(
-            ['python', RAG_SCRIPT, task_description],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        return result.stdout
+        return workday_rag_client.query(task_description)
     except Exception as e:
         return f"RAG Query Error: {str(e)}"
 
@@ -6,7 +6,7 @@ Generate Electron Test Scenarios for Payroll US
 import pandas as pd
 import os
 import re
-import subprocess
+import sys
 from pathlib import Path
 
 # Paths
@@ -14,6 +14,10 @@ EXCEL_PATH = r"C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs
 OUTPUT_DIR = r"C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs\electron_tests\Payroll_US"
 RAG_SCRIPT = r"C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs\workday_rag.py"
 
+# Resident RAG client: uses `workday_rag.py --serve` if running, else loads the corpus once in-process
+sys.path.insert(0, os.path.dirname(RAG_SCRIPT))
+import workday_rag_client
+
 def sanitize_filename(text):
     """Convert text to safe filename"""
     if pd.isna(text):
@@ -28,14 +32,7 @@ def sanitize_filename(text):
 def query_rag(task_step):
     """Query workday_rag.py for task information"""
     try:
-        result = subprocess.run(
-            ['python', RAG_SCRIPT, task_step],
-            capture_output=True,
-            text=True,
-            timeout=30,
-            cwd=os.path.dirname(RAG_SCRIPT)
-        )
-        return result.stdout if result.returncode == 0 else ""
+        return workday_rag_client.query(task_step)
     except Exception as e:
         return f"RAG query failed: {str(e)}"
 
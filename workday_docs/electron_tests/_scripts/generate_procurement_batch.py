@@ -1,9 +1,12 @@
 import pandas as pd
-import subprocess
 import re
 from pathlib import Path
 import sys
 
+# Resident RAG client: uses `workday_rag.py --serve` if running, else loads the corpus once in-process
+sys.path.insert(0, str(Path('..').resolve()))
+import workday_rag_client
+
 # Read scenarios
 df = pd.read_excel('WD_Test_Scenarios_Master.xlsx')
 proc = df[df['Functional Area'] == 'Procurement'].copy()
@@ -30,21 +33,13 @@ def query_rag(task_step):
 
     try:
         # Run RAG query
-        result = subprocess.run(
-            ['python', '../workday_rag.py', str(task_step)],
-            capture_output=True,
-            text=True,
-            timeout=10,
-            cwd=str(Path.cwd())
-        )
-
-        if result.returncode == 0 and result.stdout:
-            return result.stdout, "SUCCESS"
+        output = workday_rag_client.query(str(task_step))
+
+        if output:
+            return output, "SUCCESS"
         else:
-            return result.stderr if result.stderr else None, "NO_RESULTS"
+            return None, "NO_RESULTS"
 
-    except subprocess.TimeoutExpired:
-        return None, "TIMEOUT"
     except Exception as e:
         return None, f"ERROR"
 
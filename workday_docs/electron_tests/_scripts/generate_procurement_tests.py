@@ -1,10 +1,14 @@
 import pandas as pd
 import json
-import subprocess
+import sys
 import re
 import os
 from pathlib import Path
 
+# Resident RAG client: uses `workday_rag.py --serve` if running, else loads the corpus once in-process
+sys.path.insert(0, str(Path('..').resolve()))
+import workday_rag_client
+
 # Read scenarios
 df = pd.read_excel('WD_Test_Scenarios_Master.xlsx')
 proc = df[df['Functional Area'] == 'Procurement'].copy()
@@ -27,16 +31,8 @@ def query_rag(task_step):
         return None, "EMPTY"
 
     try:
-        result = subprocess.run(
-            ['python', '../workday_rag.py', str(task_step)],
-            capture_output=True,
-            text=True,
-            timeout=30,
-            cwd=str(Path.cwd())
-        )
-        return result.stdout, "SUCCESS"
-    except subprocess.TimeoutExpired:
-        return None, "TIMEOUT"
+        output = workday_rag_client.query(str(task_step))
+        return output, "SUCCESS"
     except Exception as e:
         return None, f"ERROR: {str(e)}"
 
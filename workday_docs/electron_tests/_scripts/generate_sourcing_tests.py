@@ -5,7 +5,7 @@ Processes: Sourcing (64), Sourcing - Contracts (44), Sourcing - Suppliers (31)
 """
 
 import pandas as pd
-import subprocess
+import sys
 import json
 import os
 from pathlib import Path
@@ -16,6 +16,10 @@ EXCEL_PATH = BASE_DIR / "WD_Test_Scenarios_Master.xlsx"
 OUTPUT_BASE = BASE_DIR / "Sourcing"
 RAG_SCRIPT = BASE_DIR.parent / "workday_rag.py"
 
+# Resident RAG client: uses `workday_rag.py --serve` if running, else loads the corpus once in-process
+sys.path.insert(0, str(RAG_SCRIPT.parent))
+import workday_rag_client
+
 # Sourcing-related task keywords for better matching
 SOURCING_KEYWORDS = {
     'supplier': ['supplier', 'vendors', 'contractor'],
@@ -28,14 +32,7 @@ SOURCING_KEYWORDS = {
 def query_rag(search_term):
     """Query the RAG system for automation steps"""
     try:
-        result = subprocess.run(
-            ['python', str(RAG_SCRIPT), search_term],
-            capture_output=True,
-            text=True,
-            timeout=30,
-            cwd=str(RAG_SCRIPT.parent)
-        )
-        return result.stdout
+        return workday_rag_client.query(search_term)
     except Exception as e:
         print(f"  ⚠️ RAG query failed: {e}")
         return None
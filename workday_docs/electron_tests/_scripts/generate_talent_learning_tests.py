@@ -7,7 +7,6 @@ Processes: Talent Optimization (203), Talent Acquisition (114), Learning (146),
 import pandas as pd
 import os
 import sys
-import subprocess
 import re
 from pathlib import Path
 
@@ -16,6 +15,10 @@ EXCEL_PATH = r'C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs
 OUTPUT_BASE = r'C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs\electron_tests'
 RAG_SCRIPT = r'C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs\workday_rag.py'
 
+# Resident RAG client: uses `workday_rag.py --serve` if running, else loads the corpus once in-process
+sys.path.insert(0, os.path.dirname(RAG_SCRIPT))
+import workday_rag_client
+
 TARGET_MODULES = {
     'Talent Optimization': 'Talent_Optimization',
     'Talent Acquisition': 'Talent_Acquisition',
@@ -26,13 +29,7 @@ TARGET_MODULES = {
 def query_rag(query_text):
     """Query Workday RAG for API/WSDL information"""
     try:
-        result = subprocess.run(
-            ['python', RAG_SCRIPT, query_text],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        return result.stdout if result.returncode == 0 else f"RAG query failed: {result.stderr}"
+        return workday_rag_client.query(query_text)
     except Exception as e:
         return f"RAG error: {str(e)}"
 
@@ -6,7 +6,6 @@ Generate Electron test files for Talent Acquisition and Talent Optimization scen
 import json
 import os
 import re
-import subprocess
 import sys
 from pathlib import Path
 
@@ -15,6 +14,10 @@ BASE_DIR = Path("C:/Users/SainathreddyDadiredd/OneDrive - ERPA/Claude/workday_do
 RAG_SCRIPT = Path("C:/Users/SainathreddyDadiredd/OneDrive - ERPA/Claude/workday_docs/workday_rag.py")
 SCENARIOS_FILE = BASE_DIR / "talent_scenarios.json"
 
+# Resident RAG client: uses `workday_rag.py --serve` if running, else loads the corpus once in-process
+sys.path.insert(0, str(RAG_SCRIPT.parent))
+import workday_rag_client
+
 # Output directories
 OUTPUT_DIRS = {
     "Talent Acquisition": BASE_DIR / "Talent_Acquisition",
@@ -39,13 +42,7 @@ def sanitize_filename(text, max_length=50):
 def query_rag(query_text):
     """Query Workday RAG for information"""
     try:
-        result = subprocess.run(
-            ['python', str(RAG_SCRIPT), query_text],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        return result.stdout
+        return workday_rag_client.query(query_text)
     except Exception as e:
         return f"ERROR: {str(e)}"
 
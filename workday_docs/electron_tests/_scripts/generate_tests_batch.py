@@ -6,17 +6,20 @@ Optimized to minimize RAG queries and process efficiently.
 
 import pandas as pd
 import os
-import subprocess
+import sys
 import re
 from pathlib import Path
 import json
-import time
 
 # Paths
 EXCEL_PATH = r"C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs\electron_tests\WD_Test_Scenarios_Master.xlsx"
 RAG_SCRIPT = r"C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs\workday_rag.py"
 OUTPUT_BASE = r"C:\Users\SainathreddyDadiredd\OneDrive - ERPA\Claude\workday_docs\electron_tests"
 
+# Resident RAG client: uses `workday_rag.py --serve` if running, else loads the corpus once in-process
+sys.path.insert(0, os.path.dirname(RAG_SCRIPT))
+import workday_rag_client
+
 # Functional areas to process
 AREAS = {
     "Inventory": "Inventory",
@@ -39,18 +42,9 @@ def query_rag_cached(query_text):
         return rag_cache[query_key]
 
     try:
-        result = subprocess.run(
-            ["python", RAG_SCRIPT, query_text],
-            capture_output=True,
-            text=True,
-            timeout=30,
-            encoding='utf-8'
-        )
-        if result.returncode == 0:
-            response = result.stdout.strip()
-            rag_cache[query_key] = response
-            time.sleep(0.5)  # Rate limiting
-            return response
+        response = workday_rag_client.query(query_text).strip()
+        rag_cache[query_key] = response
+        return response
     except Exception as e:
         print(f"[RAG ERROR: {e}]", end=' ')
 
@@ -1,56 +1,379 @@
 #!/usr/bin/env python3
 """Workday RAG - Query Workday API documentation with WSDL support"""
 
-import os, json, sys, pickle, hashlib
+import os, json, sys, pickle, hashlib, math, heapq, bisect, functools, threading
 import xml.etree.ElementTree as ET
+from array import array
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
 from pathlib import Path
 from typing import List, Dict, Optional
 
-DOCS_DIR = Path(__file__).parent
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # rag_common.py at the repository root
+from rag_common import (PASSAGE_CHARS, TOKEN_RE, QueryCache, Snapshot, atomic_write, kwic, load_pdf_pages, locate,
+                        make_passages, module_available, temp_path, tokenize, write_snapshot)
+
+# Root of the source folders and caches; override to index another tree (e.g. a benchmark corpus)
+DOCS_DIR = Path(os.environ.get("WORKDAY_RAG_DOCS_DIR") or Path(__file__).parent)
 PUBLIC_DIR = DOCS_DIR / "public"
 PRIVATE_DIR = DOCS_DIR / "private"
 WSDL_DIR = DOCS_DIR / "wsdl"
-EMBEDDINGS_CACHE = DOCS_DIR / "embeddings.pkl"
+EMBEDDINGS_CACHE = DOCS_DIR / "embeddings.pkl"  # chunk id map for EMBEDDINGS_MATRIX
+EMBEDDINGS_MATRIX = DOCS_DIR / "embeddings.npy"  # float32 chunk vectors, memory-mapped
+WSDL_CACHE = DOCS_DIR / "wsdl_cache.pkl"
+# Warm-start snapshots (passages, text and BM25 postings), memory-mapped; see WorkdayRAG.docs.
+# Named by a hash of their header so processes still mapping an older one are never disturbed.
+SNAPSHOT_DIR = DOCS_DIR / "snapshot"
+SNAPSHOT_MAGIC = b"WRAGSNAP"
+SNAPSHOT_VERSION = 2
+PDF_CACHE_DIR = DOCS_DIR / "pdf_cache"
+QUERY_CACHE = DOCS_DIR / "query_cache.pkl"
 
-GEMINI_AVAILABLE = False
-PDF_AVAILABLE = False
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
-    pass
+# Characters kept from each PDF page (0 = no limit); cached pages are whole, so this never re-extracts
+PDF_PAGE_CHARS = int(os.environ.get("WORKDAY_RAG_PDF_PAGE_CHARS", "5000"))
+
+# Characters of passage text shown around the query terms in each query() result
+SNIPPET_CHARS = 300
+
+# Semantic retrieval: a local sentence-transformers model when installed, else feature hashing.
+# Set WORKDAY_RAG_EMBED_MODEL=hashing to force the dependency-free fallback.
+EMBED_MODEL = os.environ.get("WORKDAY_RAG_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBED_CHUNK_CHARS = PASSAGE_CHARS  # one vector per passage
+HYBRID_ALPHA = 0.5  # weight of the normalized BM25 score in hybrid mode
+HYBRID_CANDIDATES = 50
+SEARCH_MODES = ("keyword", "semantic", "hybrid")
+
+# Recent search results, reused until the index changes (WORKDAY_RAG_QUERY_CACHE=0: memory only)
+QUERY_CACHE_SIZE = int(os.environ.get("WORKDAY_RAG_QUERY_CACHE_SIZE", "256"))
+QUERY_CACHE_PERSIST = os.environ.get("WORKDAY_RAG_QUERY_CACHE", "1") != "0"
+
+# Resident query daemon (python workday_rag.py --serve); see workday_rag_client.py
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = int(os.environ.get("WORKDAY_RAG_PORT", "8765"))
+
+# Gemini and SciPy are only probed here and imported where used: they are slow
+# to import and most commands (WSDL listing, single searches) never touch them.
+GEMINI_AVAILABLE = module_available("google.generativeai")
+NUMPY_AVAILABLE = False
+SCIPY_AVAILABLE = False
 try:
-    import fitz  # PyMuPDF
-    PDF_AVAILABLE = True
+    import numpy as np
+    NUMPY_AVAILABLE = True
+    SCIPY_AVAILABLE = module_available("scipy.sparse")
 except ImportError:
     pass
 
+def content_digest(doc):
+    """md5 of a passage's text; compact Passage records carry it precomputed"""
+    return doc.get("digest") or hashlib.md5(doc["content"].encode("utf-8", "replace")).hexdigest()
+
+@functools.lru_cache(maxsize=8)
+def load_raw_spec(file):
+    """Parsed OpenAPI spec for a public/ file, loaded only when a caller asks for doc["raw"]"""
+    return json.load(open(PUBLIC_DIR / file, encoding="utf-8"))
+
+class Passage:
+    """Compact passage record: metadata in __slots__, text read from the mapped snapshot on demand.
+
+    Supports the dict-style access (doc["content"], doc.get("page")) that callers
+    used when passages were plain dicts.
+    """
+    __slots__ = ("store", "start", "length", "digest", "type", "file", "title", "page", "section",
+                 "offset", "passage", "wsdl_name", "operation")
+    FIELDS = ("type", "file", "title", "page", "section", "offset", "passage", "wsdl_name", "operation")
+
+    def __init__(self, store, start, length, digest, fields):
+        self.store = store
+        self.start = start
+        self.length = length
+        self.digest = digest
+        for name in self.FIELDS:
+            setattr(self, name, fields.get(name))
+
+    @property
+    def content(self):
+        return self.store.text(self.start, self.length)
+
+    @property
+    def raw(self):
+        return load_raw_spec(self.file) if self.type == "openapi" else None
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def __contains__(self, key):
+        return getattr(self, key, None) is not None
+
+    def __repr__(self):
+        return f"<Passage {self.file} #{self.passage} page={self.page}>"
+
+class MappedPassages:
+    """Passages of a snapshot as a read-only sequence of Passage records, built on access"""
+    STRINGS = ("type", "file", "title", "section", "wsdl_name", "operation")
+    NUMBERS = ("page", "offset", "passage")
+
+    def __init__(self, snap):
+        self.snap = snap
+        self.strings = [None] + snap.json("strings")
+        self.columns = {name: snap.section(name) for name in self.STRINGS + self.NUMBERS + ("start", "length")}
+        self.digests = snap.section("digest")
+
+    @staticmethod
+    def sections(docs):
+        """Snapshot sections for a list of dict passages"""
+        strings, string_ids = [], {}
+        columns = {name: array("I") for name in MappedPassages.STRINGS + ("page", "passage", "length")}
+        columns.update(offset=array("Q"), start=array("Q"))
+        content, digests = bytearray(), bytearray()
+        for doc in docs:
+            blob = doc["content"].encode("utf-8", "replace")
+            columns["start"].append(len(content))
+            columns["length"].append(len(blob))
+            content += blob
+            digests += hashlib.md5(blob).digest()
+            for name in MappedPassages.STRINGS:
+                value = doc.get(name)
+                if value is not None and value not in string_ids:
+                    strings.append(value)
+                    string_ids[value] = len(strings)
+                columns[name].append(0 if value is None else string_ids[value])
+            for name in MappedPassages.NUMBERS:
+                columns[name].append(doc.get(name) or 0)
+        return dict(columns, strings=json.dumps(strings).encode("utf-8"), content=content, digest=digests)
+
+    def __len__(self):
+        return len(self.columns["start"])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        c = self.columns
+        fields = {name: self.strings[c[name][i]] for name in self.STRINGS}
+        fields.update(page=c["page"][i] or None, offset=c["offset"][i], passage=c["passage"][i])
+        return Passage(self.snap, c["start"][i], c["length"][i], self.digests[16 * i:16 * i + 16].hex(), fields)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+class MappedSpans:
+    """term -> (bounds, character offsets) views over a snapshot, as in BM25Index.spans"""
+
+    def __init__(self, postings, snap):
+        self.postings = postings
+        self.bounds = snap.section("term_bounds")
+        self.starts = snap.section("term_starts")
+
+    def get(self, term, default=None):
+        i = self.postings.term_ids.get(term)
+        if i is None:
+            return default
+        return self.bounds[self.postings.offsets[i]:self.postings.offsets[i + 1] + 1], self.starts
+
+class MappedPostings:
+    """term -> (doc ids, term frequencies) views over a snapshot; the read-only side of the dict API"""
+
+    def __init__(self, snap):
+        self.term_ids = {t: i for i, t in enumerate(snap.json("terms"))}
+        self.offsets = snap.section("term_offsets")
+        self.ids = snap.section("term_docs")
+        self.tfs = snap.section("term_tfs")
+
+    def __len__(self):
+        return len(self.term_ids)
+
+    def __iter__(self):
+        return iter(self.term_ids)
+
+    def __contains__(self, term):
+        return term in self.term_ids
+
+    def __getitem__(self, term):
+        i = self.term_ids[term]
+        a, b = self.offsets[i], self.offsets[i + 1]
+        return self.ids[a:b], self.tfs[a:b]
+
+    def get(self, term, default=None):
+        return self[term] if term in self.term_ids else default
+
 class WSDLParser:
     WSDL_NS = {"wsdl": "http://schemas.xmlsoap.org/wsdl/"}
-    
+    CACHE_VERSION = 2
+    DEFINITIONS = "{http://schemas.xmlsoap.org/wsdl/}definitions"
+    DOCUMENTATION = "{http://schemas.xmlsoap.org/wsdl/}documentation"
+    PORT_TYPE = "{http://schemas.xmlsoap.org/wsdl/}portType"
+    OPERATION = "{http://schemas.xmlsoap.org/wsdl/}operation"
+    MESSAGE = "{http://schemas.xmlsoap.org/wsdl/}message"
+    PART = "{http://schemas.xmlsoap.org/wsdl/}part"
+    INPUT = "{http://schemas.xmlsoap.org/wsdl/}input"
+    OUTPUT = "{http://schemas.xmlsoap.org/wsdl/}output"
+    XSD_SCHEMA = "{http://www.w3.org/2001/XMLSchema}schema"
+    XSD_ELEMENT = "{http://www.w3.org/2001/XMLSchema}element"
+    XSD_COMPLEX_TYPE = "{http://www.w3.org/2001/XMLSchema}complexType"
+    XSD_EXTENSION = "{http://www.w3.org/2001/XMLSchema}extension"
+    FIELD_DEPTH = 3  # levels of nested XSD elements resolved into an operation's field list
+
+    @staticmethod
+    def local(qname):
+        return qname.rsplit(":", 1)[-1] if qname else ""
+
     @classmethod
     def parse_file(cls, wsdl_path):
+        """Stream the WSDL with iterparse, detaching every element once it ends.
+
+        Only the current element path is kept in memory, plus a name-only outline
+        of the XSD (complexType -> child element names/types), so peak memory does
+        not grow with the size of the embedded schema. Each portType operation is
+        returned with its input/output elements and their fields resolved through
+        that outline.
+        """
         try:
-            tree = ET.parse(wsdl_path)
-            root = tree.getroot()
-            name = root.attrib.get("name", wsdl_path.stem)
+            name = wsdl_path.stem
             service_doc = ""
-            for doc_elem in root.findall("wsdl:documentation", cls.WSDL_NS):
-                if doc_elem.text:
-                    service_doc = doc_elem.text.strip()
-                    break
             operations = []
-            for portType in root.findall("wsdl:portType", cls.WSDL_NS):
-                for op in portType.findall("wsdl:operation", cls.WSDL_NS):
-                    op_name = op.attrib.get("name", "")
-                    if op_name:
-                        doc_elem = op.find("wsdl:documentation", cls.WSDL_NS)
-                        op_doc = doc_elem.text.strip() if doc_elem is not None and doc_elem.text else ""
-                        operations.append({"name": op_name, "description": op_doc})
+            op = None
+            messages = {}   # message name -> part element
+            elements = {}   # top-level xsd:element name -> type
+            types = {}      # complexType name -> ([(field, type)], [base types])
+            type_stack = []
+            stack = []
+            for event, elem in ET.iterparse(str(wsdl_path), events=("start", "end")):
+                if event == "start":
+                    tag = elem.tag
+                    parent_tag = stack[-1].tag if stack else None
+                    if not stack:
+                        name = elem.attrib.get("name", name)
+                    elif tag == cls.OPERATION and parent_tag == cls.PORT_TYPE:
+                        op = {"name": elem.attrib.get("name", ""), "description": "", "input": "", "output": ""}
+                    elif tag in (cls.INPUT, cls.OUTPUT) and op is not None and parent_tag == cls.OPERATION:
+                        op["input" if tag == cls.INPUT else "output"] = cls.local(elem.attrib.get("message"))
+                    elif tag == cls.PART and parent_tag == cls.MESSAGE and elem.attrib.get("element"):
+                        messages[stack[-1].attrib.get("name", "")] = cls.local(elem.attrib["element"])
+                    elif tag == cls.XSD_COMPLEX_TYPE:
+                        type_name = elem.attrib.get("name")
+                        if type_name:
+                            types[type_name] = ([], [])
+                        type_stack.append(type_name or (type_stack[-1] if type_stack else None))
+                    elif tag == cls.XSD_ELEMENT:
+                        field = elem.attrib.get("name") or cls.local(elem.attrib.get("ref"))
+                        if parent_tag == cls.XSD_SCHEMA:
+                            elements[field] = cls.local(elem.attrib.get("type")) or field
+                        elif type_stack and type_stack[-1] and field:
+                            types[type_stack[-1]][0].append((field, cls.local(elem.attrib.get("type") or elem.attrib.get("ref"))))
+                    elif tag == cls.XSD_EXTENSION and type_stack and type_stack[-1]:
+                        types[type_stack[-1]][1].append(cls.local(elem.attrib.get("base")))
+                    stack.append(elem)
+                    continue
+                stack.pop()
+                if not stack:
+                    break
+                parent = stack[-1]
+                if elem.tag == cls.DOCUMENTATION and elem.text:
+                    if parent.tag == cls.DEFINITIONS and not service_doc:
+                        service_doc = elem.text.strip()
+                    elif parent.tag == cls.OPERATION and op is not None and len(stack) > 1 and stack[-2].tag == cls.PORT_TYPE and not op["description"]:
+                        op["description"] = elem.text.strip()
+                elif elem.tag == cls.OPERATION and parent.tag == cls.PORT_TYPE:
+                    if op and op["name"]:
+                        operations.append(op)
+                    op = None
+                elif elem.tag == cls.XSD_COMPLEX_TYPE:
+                    type_stack.pop()
+                elem.clear()
+                parent.remove(elem)
+            for op in operations:
+                for direction in ("input", "output"):
+                    element = messages.get(op[direction], "")
+                    op[direction] = element
+                    op["request_fields" if direction == "input" else "response_fields"] = cls.resolve_fields(
+                        elements.get(element, ""), types)
             return {"name": name, "file": wsdl_path.name, "description": service_doc, "operations": operations}
         except:
             return None
 
+    @classmethod
+    def resolve_fields(cls, type_name, types, depth=FIELD_DEPTH):
+        """Element names reachable from type_name, breadth-first, up to depth levels (cycle-safe)"""
+        fields, seen = [], set()
+        level = [type_name]
+        visited = set()
+        for _ in range(depth):
+            next_level = []
+            for t in level:
+                pending = [t]
+                while pending:  # a type's own fields plus those of its extension bases
+                    t = pending.pop()
+                    if not t or t in visited or t not in types:
+                        continue
+                    visited.add(t)
+                    own, bases = types[t]
+                    pending.extend(bases)
+                    for field, field_type in own:
+                        if field not in seen:
+                            seen.add(field)
+                            fields.append(field)
+                        next_level.append(field_type)
+            level = next_level
+        return fields
+
+    @classmethod
+    def load_cached(cls, wsdl_files, cache_path):
+        """Parse WSDLs through an on-disk cache keyed by file size and mtime.
+
+        Returns (parsed list, number of files actually parsed). Entries for
+        deleted files are dropped and the cache is rewritten only when it changed.
+        """
+        cache = {}
+        if cache_path.exists():
+            try:
+                with open(cache_path, "rb") as f:
+                    cache = pickle.load(f)
+                if cache.get("version") != cls.CACHE_VERSION:
+                    cache = {}
+            except Exception:
+                cache = {}
+        entries = cache.get("files", {})
+        fresh = {}
+        parsed = 0
+        results = []
+        for f in wsdl_files:
+            st = f.stat()
+            key = (st.st_size, st.st_mtime_ns)
+            entry = entries.get(f.name)
+            if entry is None or entry["key"] != key:
+                entry = {"key": key, "data": cls.parse_file(f)}
+                parsed += 1
+            fresh[f.name] = entry
+            results.append(entry["data"])
+        if parsed or set(fresh) != set(entries):
+            try:
+                with atomic_write(cache_path) as f:
+                    pickle.dump({"version": cls.CACHE_VERSION, "files": fresh}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            except OSError as e:
+                print(f"Could not save WSDL cache to {cache_path}: {e}")
+        return results, parsed
+
+    @classmethod
+    def format_operation(cls, service, op):
+        """Searchable text of one operation record"""
+        return "\n".join([
+            f"Operation: {op['name']}",
+            f"Service: {service}",
+            f"Description: {op['description']}",
+            f"Request: {op['input']}",
+            f"Request fields: {', '.join(op['request_fields'])}",
+            f"Response: {op['output']}",
+            f"Response fields: {', '.join(op['response_fields'])}",
+        ])
+
     @classmethod
     def format_operations(cls, wsdl_data):
         lines = [f"WSDL: {wsdl_data['name']}", f"Description: {wsdl_data['description']}", "Operations:"]
@@ -58,15 +381,473 @@ class WSDLParser:
             lines.append(f"  - {op['name']}: {op['description']}")
         return "\n".join(lines)
 
+class BM25Index:
+    """Inverted index with Okapi BM25 scoring, persisted in the warm-start snapshot"""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.signature = ""
+        self.doc_lens = array("I")
+        self.avgdl = 0.0
+        self.postings = {}  # term -> (array of doc ids, array of term frequencies)
+        # term -> (bounds, starts): character offsets of the term in doc ids[i] are starts[bounds[i]:bounds[i + 1]]
+        self.spans = {}
+
+    @staticmethod
+    def signature_for(docs):
+        """Content hash of the corpus, so any added/changed/removed doc invalidates the index"""
+        h = hashlib.md5()
+        for doc in docs:
+            h.update(doc["file"].encode("utf-8", "replace"))
+            h.update(content_digest(doc).encode("ascii"))
+        return h.hexdigest()
+
+    @classmethod
+    def build(cls, docs, signature=None):
+        index = cls()
+        index.signature = signature or cls.signature_for(docs)
+        postings, spans = {}, {}
+        for doc_id, doc in enumerate(docs):
+            occurrences = {}
+            for m in TOKEN_RE.finditer(doc["content"].lower()):
+                occurrences.setdefault(m.group(), []).append(m.start())
+            index.doc_lens.append(sum(map(len, occurrences.values())))
+            for t, starts in occurrences.items():
+                entry = postings.get(t)
+                if entry is None:
+                    entry = postings[t] = (array("I"), array("I"))
+                    spans[t] = (array("I", [0]), array("I"))
+                entry[0].append(doc_id)
+                entry[1].append(len(starts))
+                spans[t][1].extend(starts)
+                spans[t][0].append(len(spans[t][1]))
+        index.postings = postings
+        index.spans = spans
+        index.avgdl = (sum(index.doc_lens) / len(index.doc_lens)) if index.doc_lens else 0.0
+        return index
+
+    def sections(self):
+        """Snapshot sections holding doc lengths and postings (terms in sorted order)"""
+        terms = sorted(self.postings)
+        offsets, ids, tfs = array("Q", [0]), array("I"), array("I")
+        bounds, starts = array("Q", [0]), array("I")
+        for t in terms:
+            ids.extend(self.postings[t][0])
+            tfs.extend(self.postings[t][1])
+            offsets.append(len(ids))
+            t_bounds, t_starts = self.spans[t]
+            bounds.extend(len(starts) + b for b in t_bounds[1:])
+            starts.extend(t_starts)
+        return {"terms": json.dumps(terms).encode("utf-8"), "term_offsets": offsets, "term_docs": ids,
+                "term_tfs": tfs, "doc_lens": self.doc_lens, "term_bounds": bounds, "term_starts": starts}
+
+    @classmethod
+    def from_snapshot(cls, snap):
+        """Index whose postings and doc lengths are views into a memory-mapped snapshot"""
+        meta = snap.meta["bm25"]
+        index = cls(meta["k1"], meta["b"])
+        index.signature = meta["signature"]
+        index.avgdl = meta["avgdl"]
+        index.doc_lens = snap.section("doc_lens")
+        index.postings = MappedPostings(snap)
+        index.spans = MappedSpans(index.postings, snap)
+        return index
+
+    def snippet(self, doc_id, text, query):
+        """Keyword-in-context snippet of doc doc_id (whose content is text), located through the index"""
+        hits = []
+        for t in set(tokenize(query)):
+            ids = self.postings.get(t, ((),))[0]
+            i = bisect.bisect_left(ids, doc_id)
+            if i < len(ids) and ids[i] == doc_id:
+                bounds, starts = self.spans.get(t)
+                hits.extend((start, start + len(t), t) for start in starts[bounds[i]:bounds[i + 1]])
+        return kwic(text, hits, SNIPPET_CHARS)
+
+    def idf(self, df):
+        n = len(self.doc_lens)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def scores(self, terms):
+        """Accumulate BM25 scores by walking only the posting lists of the query terms.
+
+        Terms are visited in sorted order, the same order the sparse matrix in
+        top_many() sums columns in, so both paths produce bit-identical scores.
+        """
+        acc = {}
+        k1, b = self.k1, self.b
+        avgdl = self.avgdl or 1.0
+        lens = self.doc_lens
+        for t in sorted(terms):
+            entry = self.postings.get(t)
+            if entry is None:
+                continue
+            ids, tfs = entry
+            idf = self.idf(len(ids))
+            for doc_id, tf in zip(ids, tfs):
+                norm = k1 * (1 - b + b * lens[doc_id] / avgdl)
+                acc[doc_id] = acc.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+        return acc
+
+    def top(self, query, top_k=3):
+        """Return [(doc_id, score)] best first; ties broken by doc id"""
+        acc = self.scores(set(tokenize(query)))
+        return heapq.nsmallest(top_k, acc.items(), key=lambda kv: (-kv[1], kv[0]))
+
+    def matrix(self):
+        """Term x doc sparse matrix of BM25 weights (columns in sorted term order), built on first use"""
+        if getattr(self, "_matrix", None) is None:
+            from scipy import sparse
+            terms = sorted(self.postings)
+            lens = np.asarray(self.doc_lens, dtype=np.float64)
+            avgdl = self.avgdl or 1.0
+            indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+            ids, tfs, idfs = [], [], []
+            for i, t in enumerate(terms):
+                doc_ids, term_tfs = self.postings[t]
+                indptr[i + 1] = indptr[i] + len(doc_ids)
+                ids.append(np.frombuffer(doc_ids, dtype=np.uint32))
+                tfs.append(np.frombuffer(term_tfs, dtype=np.uint32))
+                idfs.append(np.full(len(doc_ids), self.idf(len(doc_ids))))
+            ids = np.concatenate(ids) if ids else np.zeros(0, dtype=np.uint32)
+            tf = np.concatenate(tfs).astype(np.float64) if tfs else np.zeros(0)
+            idf = np.concatenate(idfs) if idfs else np.zeros(0)
+            norm = self.k1 * (1 - self.b + self.b * lens[ids] / avgdl)
+            weights = idf * tf * (self.k1 + 1) / (tf + norm)
+            self._matrix = sparse.csr_matrix((weights, ids, indptr), shape=(len(terms), len(self.doc_lens)))
+            self._term_ids = {t: i for i, t in enumerate(terms)}
+        return self._matrix
+
+    def top_many(self, queries, top_k=3):
+        """Score a batch of queries with one sparse matrix product; same output as top() per query"""
+        if not SCIPY_AVAILABLE:
+            return [self.top(q, top_k) for q in queries]
+        from scipy import sparse
+        weights = self.matrix()
+        rows, cols = [], []
+        for qi, q in enumerate(queries):
+            term_ids = sorted({self._term_ids[t] for t in tokenize(q) if t in self._term_ids})
+            rows.extend([qi] * len(term_ids))
+            cols.extend(term_ids)
+        q_matrix = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(queries), weights.shape[0]))
+        scores = (q_matrix @ weights).tocsr()
+        results = []
+        for qi in range(len(queries)):
+            start, end = scores.indptr[qi], scores.indptr[qi + 1]
+            doc_ids, vals = scores.indices[start:end], scores.data[start:end]
+            if len(vals) > top_k:
+                # Keep everything tied with the k-th best score so the doc-id tie-break stays exact
+                kth = np.partition(vals, len(vals) - top_k)[len(vals) - top_k]
+                keep = vals >= kth
+                doc_ids, vals = doc_ids[keep], vals[keep]
+            order = np.lexsort((doc_ids, -vals))[:top_k]
+            results.append([(int(doc_ids[i]), float(vals[i])) for i in order])
+        return results
+
+def doc_key(doc):
+    """Stable identity of a doc's content: file name plus content hash"""
+    return f"{doc['file']}:{content_digest(doc)}"
+
+def chunk_spans(text, size=EMBED_CHUNK_CHARS):
+    """Split text into ~size character (start, end) spans, breaking on whitespace where possible"""
+    spans = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            cut = text.rfind(" ", start + size // 2, end)
+            if cut > start:
+                end = cut
+        spans.append((start, end))
+        start = end
+    return spans or [(0, 0)]
+
+class HashingEmbedder:
+    """Dependency-free fallback: signed feature hashing of words and their character trigrams"""
+    dim = 256
+    name = f"hashing-{dim}"
+
+    def __init__(self):
+        self._features = {}
+
+    def _token_features(self, token):
+        feats = self._features.get(token)
+        if feats is None:
+            padded = f"#{token}#"
+            grams = [(token, 1.0)] + [(padded[i:i + 3], 0.5) for i in range(len(padded) - 2)]
+            feats = []
+            for gram, weight in grams:
+                h = int.from_bytes(hashlib.md5(gram.encode("utf-8")).digest()[:8], "little")
+                feats.append((h % self.dim, weight if (h >> 63) else -weight))
+            self._features[token] = feats
+        return feats
+
+    def encode(self, texts):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            counts = {}
+            for t in tokenize(text):
+                counts[t] = counts.get(t, 0) + 1
+            row = out[i]
+            for t, n in counts.items():
+                tf = 1.0 + math.log(n)
+                for j, w in self._token_features(t):
+                    row[j] += w * tf
+            norm = np.linalg.norm(row)
+            if norm:
+                row /= norm
+        return out
+
+class SentenceEmbedder:
+    """Local CPU sentence-transformers model (only files already on disk; never downloads)"""
+
+    def __init__(self, model_name=EMBED_MODEL):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu", local_files_only=True)
+        self.name = model_name
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts):
+        return self.model.encode(list(texts), batch_size=64, normalize_embeddings=True,
+                                 convert_to_numpy=True, show_progress_bar=False).astype(np.float32)
+
+def load_embedder(model_name=EMBED_MODEL):
+    if model_name != "hashing":
+        try:
+            return SentenceEmbedder(model_name)
+        except Exception:
+            pass
+    return HashingEmbedder()
+
+class EmbeddingStore:
+    """Chunk vectors in a memory-mapped float32 .npy matrix with a pickled id map.
+
+    The id map records, per doc_key, which rows of the matrix hold its chunks, so
+    sync() only embeds docs whose content changed and copies every other row over.
+    """
+    VERSION = 1
+
+    def __init__(self, embedder, map_path=EMBEDDINGS_CACHE, matrix_path=EMBEDDINGS_MATRIX):
+        self.embedder = embedder
+        self.map_path = map_path
+        self.matrix_path = matrix_path
+        self.vectors = None
+        self.row_doc = None  # matrix row -> current doc id
+
+    def _load_map(self):
+        try:
+            with open(self.map_path, "rb") as f:
+                id_map = pickle.load(f)
+            if (id_map.get("version") == self.VERSION and id_map.get("model") == self.embedder.name
+                    and self.matrix_path.exists()):
+                return id_map
+        except Exception:
+            pass
+        return {"docs": {}}
+
+    def sync(self, docs, rebuild=False):
+        """Bring the store in line with docs; returns (reused docs, embedded docs)"""
+        keys = [doc_key(d) for d in docs]
+        old = {"docs": {}} if rebuild else self._load_map()
+        old_vectors = np.load(self.matrix_path, mmap_mode="r") if old["docs"] else None
+        spans, reuse, texts, fresh = {}, {}, [], []
+        for doc, key in zip(docs, keys):
+            if key in spans:
+                continue
+            if key in old["docs"]:
+                start, count = old["docs"][key]["rows"]
+                spans[key] = old["docs"][key]["spans"]
+                reuse[key] = (start, count)
+            else:
+                spans[key] = chunk_spans(doc["content"])
+                texts.extend(doc["content"][a:b] for a, b in spans[key])
+                fresh.append(key)
+        changed = bool(fresh) or set(spans) != set(old["docs"])
+        if changed:
+            new_vectors = self.embedder.encode(texts) if texts else np.zeros((0, self.embedder.dim), np.float32)
+            total = sum(len(v) for v in spans.values())
+            tmp = temp_path(self.matrix_path, ".tmp.npy")
+            out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=(total, self.embedder.dim))
+            id_docs, row, fresh_row = {}, 0, 0
+            for key, key_spans in spans.items():
+                count = len(key_spans)
+                if key in reuse:
+                    start = reuse[key][0]
+                    out[row:row + count] = old_vectors[start:start + count]
+                else:
+                    out[row:row + count] = new_vectors[fresh_row:fresh_row + count]
+                    fresh_row += count
+                id_docs[key] = {"rows": (row, count), "spans": key_spans}
+                row += count
+            out.flush()
+            del out, old_vectors  # release the mappings before replacing files (required on Windows)
+            self.vectors = None
+            os.replace(tmp, self.matrix_path)
+            with atomic_write(self.map_path) as f:
+                pickle.dump({"version": self.VERSION, "model": self.embedder.name, "docs": id_docs},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            old = {"docs": id_docs}
+        else:
+            del old_vectors
+        self.vectors = np.load(self.matrix_path, mmap_mode="r")
+        self.row_doc = np.full(len(self.vectors), -1, dtype=np.int64)
+        for doc_id, key in enumerate(keys):
+            start, count = old["docs"][key]["rows"]
+            self.row_doc[start:start + count] = doc_id
+        return len(docs) - len(fresh), len(fresh)
+
+    def top(self, query, top_k=3):
+        """[(doc_id, cosine)] best first; a doc scores as its best-matching chunk"""
+        if self.vectors is None or not len(self.vectors):
+            return []
+        sims = self.vectors @ self.embedder.encode([query])[0]
+        doc_scores = np.full(int(self.row_doc.max()) + 1, -np.inf, dtype=np.float32)
+        np.maximum.at(doc_scores, self.row_doc, sims)
+        k = min(top_k, len(doc_scores))
+        best = np.argpartition(-doc_scores, k - 1)[:k]
+        best = best[np.lexsort((best, -doc_scores[best]))]
+        return [(int(i), float(doc_scores[i])) for i in best if doc_scores[i] > 0]
+
+def check_mode(mode):
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode {mode!r} (expected {', '.join(SEARCH_MODES)})")
+
 class WorkdayRAG:
-    def __init__(self, rebuild_embeddings=False):
-        self.docs = []
-        self.wsdl_data = {}
-        self.load_docs()
-        self.load_wsdls()
-        print(f"Total: {len(self.docs)} documents")
+    """Workday docs search. Each source type is loaded on first use, so commands that
+    only need WSDL metadata never open the OpenAPI specs, text files or PDF cache.
+    The lazy loaders run under locks, so daemon threads can share one instance."""
+    SOURCES = ("openapi", "text", "pdf", "wsdl")
 
-    def load_docs(self):
+    def __init__(self, rebuild_embeddings=False, rebuild_index=False, pdf_page_chars=PDF_PAGE_CHARS):
+        self.pdf_page_chars = pdf_page_chars
+        self.rebuild_embeddings = rebuild_embeddings
+        self.rebuild_index = rebuild_index
+        self.embedding_store = None
+        self.sources = {}      # source type -> [passage dicts], filled on first use
+        self._docs = None
+        self._index = None
+        self._wsdl_data = None
+        self._operations = {}   # lowercased operation name -> [operation record]
+        self._field_index = {}  # lowercased XSD field name -> [(operation record, direction)]
+        self.snapshot = None
+        self.cache = QueryCache(QUERY_CACHE_SIZE, QUERY_CACHE if QUERY_CACHE_PERSIST else None)
+        self._docs_lock = threading.Lock()
+        self._wsdl_lock = threading.Lock()
+        self._embeddings_lock = threading.Lock()
+
+    def load_all(self):
+        """Eagerly load the passages, the index and the WSDL operation/field tables (used by
+        the resident daemon, so requests never pay for or race on a first load)"""
+        self.wsdl_data
+        return self.index
+
+    @property
+    def docs(self):
+        """All passages (Passage records), in source order.
+
+        Served from the newest snapshot when its recorded source sizes/mtimes and
+        settings still match; otherwise every source is loaded, indexed and written
+        to a new snapshot, which is then mapped like a warm start.
+        """
+        if self._docs is None:
+            with self._docs_lock:
+                if self._docs is None:
+                    if self.rebuild_index or not self.open_snapshot():
+                        passages = [p for kind in self.SOURCES for p in self.load_source(kind)]
+                        print(f"Total: {len(passages)} passages")
+                        self.write_snapshot(passages)
+                        self.sources = {}  # the dict passages now live in the snapshot
+                        self.open_snapshot()
+                    self.rebuild_index = False
+        return self._docs
+
+    @property
+    def index(self):
+        self.docs  # the index is mapped (or built) together with the passages
+        return self._index
+
+    @property
+    def wsdl_data(self):
+        if self._wsdl_data is None:
+            with self._wsdl_lock:
+                if self._wsdl_data is None:
+                    self.load_wsdls()
+        return self._wsdl_data
+
+    @property
+    def operations(self):
+        self.wsdl_data
+        return self._operations
+
+    @property
+    def field_index(self):
+        self.wsdl_data
+        return self._field_index
+
+    def load_index(self, rebuild=False):
+        """(Re)load passages and index; rebuild=True ignores any existing snapshot"""
+        with self._docs_lock:
+            self._docs = self._index = None
+            self.rebuild_index = rebuild
+        return self.index
+
+    def snapshot_meta(self):
+        """Settings and source file stats a snapshot must match to be reused"""
+        sources = {}
+        for folder, pattern in ((PUBLIC_DIR, "*.json"), (PRIVATE_DIR, "*.txt"), (PRIVATE_DIR, "*.pdf"), (WSDL_DIR, "*.wsdl")):
+            if folder.exists():
+                for f in folder.glob(pattern):
+                    st = f.stat()
+                    sources[f"{folder.name}/{f.name}"] = [st.st_size, st.st_mtime_ns]
+        return {"version": SNAPSHOT_VERSION, "passage_chars": PASSAGE_CHARS,
+                "pdf_page_chars": self.pdf_page_chars, "sources": sources}
+
+    def open_snapshot(self):
+        """Map the newest snapshot if it matches the current sources; True on success"""
+        paths = sorted(SNAPSHOT_DIR.glob("snapshot-*.snap"), key=lambda p: p.stat().st_mtime_ns, reverse=True) \
+            if SNAPSHOT_DIR.exists() else []
+        if not paths:
+            return False
+        try:
+            snap = Snapshot(paths[0], SNAPSHOT_MAGIC)
+        except (OSError, ValueError):
+            return False
+        meta = self.snapshot_meta()
+        if any(snap.meta.get(k) != v for k, v in meta.items()):
+            return False
+        self.snapshot = snap
+        self._index = BM25Index.from_snapshot(snap)
+        self._docs = MappedPassages(snap)  # set last: a non-None _docs means the index is ready
+        print(f"Loaded snapshot: {len(self._docs)} passages, {len(self._index.postings)} terms")
+        for old in paths[1:]:
+            try:
+                old.unlink()
+            except OSError:
+                pass  # still mapped by another process (Windows); removed on a later start
+        return True
+
+    def write_snapshot(self, passages):
+        index = BM25Index.build(passages)
+        print(f"Built BM25 index ({len(index.postings)} terms)")
+        meta = dict(self.snapshot_meta(), bm25={"signature": index.signature, "k1": index.k1,
+                                                "b": index.b, "avgdl": index.avgdl})
+        SNAPSHOT_DIR.mkdir(exist_ok=True)
+        name = hashlib.md5(json.dumps(meta, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        path = SNAPSHOT_DIR / f"snapshot-{name}.snap"
+        if path.exists():
+            os.utime(path)  # identical snapshot (possibly mapped elsewhere): just make it the newest
+        else:
+            write_snapshot(path, SNAPSHOT_MAGIC, meta, dict(MappedPassages.sections(passages), **index.sections()))
+
+    def load_source(self, kind):
+        """Passage dicts for one source type (openapi, text, pdf, wsdl), loaded once"""
+        if kind not in self.sources:
+            self.sources[kind] = getattr(self, f"load_{kind}")()
+        return self.sources[kind]
+
+    def load_openapi(self):
+        passages, files = [], 0
         if PUBLIC_DIR.exists():
             for f in PUBLIC_DIR.glob("*.json"):
                 try:
@@ -76,63 +857,177 @@ class WorkdayRAG:
                         for m, d in methods.items():
                             if m in ["get","post","put","patch","delete"]:
                                 content += f"{m.upper()} {path} - {d.get('summary','')}\n"
-                    self.docs.append({"type": "openapi", "file": f.name, "title": spec.get("info",{}).get("title",f.stem), "content": content, "raw": spec})
+                    passages.extend(make_passages({"type": "openapi", "file": f.name, "title": spec.get("info",{}).get("title",f.stem)}, content))
+                    files += 1
                 except: pass
+        print(f"Loaded {files} OpenAPI specs ({len(passages)} passages) from public/")
+        return passages
+
+    def load_text(self):
+        passages, files = [], 0
         if PRIVATE_DIR.exists():
             for f in PRIVATE_DIR.glob("*.txt"):
                 try:
-                    self.docs.append({"type": "text", "file": f.name, "title": f.stem.replace("_"," ").title(), "content": open(f, encoding="utf-8").read()})
+                    passages.extend(make_passages({"type": "text", "file": f.name, "title": f.stem.replace("_"," ").title()}, open(f, encoding="utf-8").read()))
+                    files += 1
                 except: pass
-            # Load PDFs if PyMuPDF available
-            if PDF_AVAILABLE:
-                for f in PRIVATE_DIR.glob("*.pdf"):
-                    try:
-                        doc = fitz.open(f)
-                        text = ""
-                        for page in doc:
-                            text += page.get_text()[:5000]
-                            if len(text) > 50000: break
-                        doc.close()
-                        title = f.stem.replace("-", " ").replace("_", " ").title()
-                        self.docs.append({"type": "pdf", "file": f.name, "title": title, "content": text[:50000]})
-                    except: pass
-        print(f"Loaded {len(self.docs)} docs from public/private")
+        print(f"Loaded {files} text docs ({len(passages)} passages) from private/")
+        return passages
+
+    def load_pdf(self):
+        """PDF passages from the page cache; PyMuPDF is only needed for new/changed files"""
+        passages, files = [], 0
+        if PRIVATE_DIR.exists():
+            for f, pages in load_pdf_pages(sorted(PRIVATE_DIR.glob("*.pdf")), PDF_CACHE_DIR, DOCS_DIR).items():
+                base = {"type": "pdf", "file": f.name, "title": f.stem.replace("-", " ").replace("_", " ").title()}
+                for page_no, page in enumerate(pages, 1):
+                    text = page[:self.pdf_page_chars] if self.pdf_page_chars else page
+                    if text.strip():
+                        passages.extend(make_passages(base, text, page_no))
+                files += 1
+        print(f"Loaded {files} PDFs ({len(passages)} passages) from private/")
+        return passages
+
+    def load_docs(self):
+        """Load the OpenAPI, text and PDF sources (kept for callers of the old eager API)"""
+        for kind in ("openapi", "text", "pdf"):
+            self.load_source(kind)
 
     def load_wsdls(self):
+        """Parse WSDL services (through the cache) and build the operation name/field lookup tables.
+
+        The tables are built fresh and published together, wsdl_data last, so a reload
+        never duplicates records and readers never see half-built tables."""
+        wsdl_data, operations, field_index = {}, {}, {}
         if not WSDL_DIR.exists():
             print("No wsdl/ directory")
+            self._operations, self._field_index, self._wsdl_data = operations, field_index, wsdl_data
             return
-        count = 0
-        for f in WSDL_DIR.glob("*.wsdl"):
-            p = WSDLParser.parse_file(f)
+        parsed_wsdls, reparsed = WSDLParser.load_cached(sorted(WSDL_DIR.glob("*.wsdl")), WSDL_CACHE)
+        for p in parsed_wsdls:
             if p:
-                self.wsdl_data[p["name"]] = p
-                self.docs.append({"type": "wsdl", "file": f.name, "title": f"WSDL: {p['name']}", "content": WSDLParser.format_operations(p), "wsdl_name": p["name"]})
-                count += 1
-        total_ops = sum(len(w["operations"]) for w in self.wsdl_data.values())
-        print(f"Loaded {count} WSDLs with {total_ops} operations")
-
-    def search(self, query, top_k=3):
-        terms = set(query.lower().split())
-        results = []
-        for doc in self.docs:
-            c = doc["content"].lower()
-            score = sum(1 for t in terms if t in c) + (5 if query.lower() in c else 0)
-            if score > 0:
-                results.append({"doc": doc, "score": score})
-        results.sort(key=lambda x: x["score"], reverse=True)
-        return results[:top_k]
-
-    def query(self, q):
-        results = self.search(q)
+                wsdl_data[p["name"]] = p
+                for op in p["operations"]:
+                    record = dict(op, service=p["name"], file=p["file"])
+                    operations.setdefault(op["name"].lower(), []).append(record)
+                    for direction, fields in (("request", op["request_fields"]), ("response", op["response_fields"])):
+                        for field in fields:
+                            field_index.setdefault(field.lower(), []).append((record, direction))
+        self._operations, self._field_index, self._wsdl_data = operations, field_index, wsdl_data
+        count = len(wsdl_data)
+        total_ops = sum(len(w["operations"]) for w in wsdl_data.values())
+        print(f"Loaded {count} WSDLs with {total_ops} operations ({reparsed} parsed, {count - reparsed} cached)")
+
+    def load_wsdl(self):
+        """WSDL service passages plus one record per operation"""
+        passages = []
+        for p in self.wsdl_data.values():
+            passages.extend(make_passages({"type": "wsdl", "file": p["file"], "title": f"WSDL: {p['name']}", "wsdl_name": p["name"]}, WSDLParser.format_operations(p)))
+            for op in p["operations"]:
+                passages.append({"type": "wsdl_operation", "file": p["file"], "title": f"Operation: {op['name']}",
+                                 "wsdl_name": p["name"], "operation": op["name"],
+                                 "content": WSDLParser.format_operation(p["name"], op),
+                                 "page": None, "section": p["name"], "offset": 0, "passage": 0})
+        return passages
+
+    def get_operation(self, name):
+        """Operation records (service, input/output, fields) for an exact, case-insensitive name"""
+        return self.operations.get(name.strip().lower(), [])
+
+    def operations_by_field(self, field):
+        """[(operation record, "request" | "response")] for every operation whose messages carry field"""
+        return self.field_index.get(field.strip().lower(), [])
+
+    def describe_operation(self, name):
+        ops = self.get_operation(name)
+        if not ops:
+            return f"Operation '{name}' not found."
+        out = []
+        for op in ops:
+            out.append(f"### Operation: {op['name']} ({op['service']})")
+            if op["description"]:
+                out.append(op["description"])
+            out.append(f"\nRequest: {op['input']}")
+            out.extend(f"  {f}" for f in op["request_fields"])
+            out.append(f"\nResponse: {op['output']}")
+            out.extend(f"  {f}" for f in op["response_fields"])
+            out.append("")
+        return "\n".join(out)
+
+    def describe_field(self, field):
+        hits = self.operations_by_field(field)
+        if not hits:
+            return f"No operations use field '{field}'."
+        out = [f"## Operations using {field}\n"]
+        for op, direction in hits:
+            out.append(f"  {op['service']}.{op['name']} ({direction})")
+        out.append(f"\nTotal: {len(hits)}")
+        return "\n".join(out)
+
+    def embeddings(self):
+        """Chunk embedding store, synced with the current docs on first use"""
+        if self.embedding_store is None:
+            with self._embeddings_lock:
+                if self.embedding_store is None:
+                    store = EmbeddingStore(load_embedder())
+                    reused, embedded = store.sync(self.docs, self.rebuild_embeddings)
+                    print(f"Embeddings ({store.embedder.name}): {len(store.vectors)} chunks, {embedded} docs embedded, {reused} reused")
+                    self.embedding_store = store
+        return self.embedding_store
+
+    def search(self, query, top_k=3, mode="keyword"):
+        """Rank docs for query. mode: keyword (BM25), semantic (chunk embeddings) or hybrid (both fused).
+        Rankings come from the query cache while the index signature is unchanged."""
+        check_mode(mode)
+        if not NUMPY_AVAILABLE:
+            mode = "keyword"
+        key = QueryCache.key(query, mode, top_k)
+        if mode != "keyword":
+            key += (self.embeddings().embedder.name,)
+        ranked = self.cache.get(key, self.index.signature)
+        if ranked is None:
+            ranked = self.rank(query, top_k, mode)
+            self.cache.put(key, self.index.signature, ranked)
+        return [{"id": doc_id, "doc": self.docs[doc_id], "score": score} for doc_id, score in ranked]
+
+    def rank(self, query, top_k=3, mode="keyword"):
+        """[(doc id, rounded score)] best first, computed without the cache"""
+        check_mode(mode)
+        if mode == "keyword":
+            return [(doc_id, round(score, 2)) for doc_id, score in self.index.top(query, top_k)]
+        semantic = self.embeddings().top(query, top_k if mode == "semantic" else HYBRID_CANDIDATES)
+        if mode == "semantic":
+            return [(doc_id, round(score, 3)) for doc_id, score in semantic]
+        keyword = self.index.top(query, HYBRID_CANDIDATES)
+        best = keyword[0][1] if keyword else 1.0
+        fused = {doc_id: HYBRID_ALPHA * score / best for doc_id, score in keyword}
+        for doc_id, score in semantic:
+            fused[doc_id] = fused.get(doc_id, 0.0) + (1 - HYBRID_ALPHA) * score
+        ranked = heapq.nsmallest(top_k, fused.items(), key=lambda kv: (-kv[1], kv[0]))
+        return [(doc_id, round(score, 3)) for doc_id, score in ranked]
+
+    def search_many(self, queries, top_k=3):
+        """Batch form of search(): one ranked list per query; cache misses are scored in a single sparse pass"""
+        queries = list(queries)
+        signature = self.index.signature
+        keys = [QueryCache.key(q, "keyword", top_k) for q in queries]
+        ranked = [self.cache.get(key, signature) for key in keys]
+        todo = [i for i, r in enumerate(ranked) if r is None]
+        if todo:
+            for i, hits in zip(todo, self.index.top_many([queries[i] for i in todo], top_k)):
+                ranked[i] = [(doc_id, round(score, 2)) for doc_id, score in hits]
+                self.cache.put(keys[i], signature, ranked[i])
+        return [[{"id": doc_id, "doc": self.docs[doc_id], "score": score} for doc_id, score in hits] for hits in ranked]
+
+    def query(self, q, mode="keyword"):
+        results = self.search(q, mode=mode)
         if not results:
             return "No results found."
         out = [f"## Results for: {q}\n"]
         for i, r in enumerate(results, 1):
             out.append(f"### {i}. {r['doc']['title']} (score: {r['score']})")
-            out.append(f"Source: {r['doc']['file']}")
-            snippet = r["doc"]["content"][:300] + "..." if len(r["doc"]["content"]) > 300 else r["doc"]["content"]
-            out.append(f"```\n{snippet}\n```\n")
+            out.append(f"Source: {locate(r['doc'])}")
+            out.append(f"> {self.index.snippet(r['id'], r['doc']['content'], q)}\n")
         return "\n".join(out)
 
     def list_wsdl_operations(self, name=None):
@@ -150,6 +1045,106 @@ class WorkdayRAG:
         lines.append(f"\nTotal: {len(self.wsdl_data)} WSDLs")
         return "\n".join(lines)
 
+def serve(rag, host=SERVER_HOST, port=SERVER_PORT):
+    """Answer queries over localhost HTTP with the corpus loaded once.
+
+    GET /query?q=...[&mode=]     -> {"output": <same text as the CLI>}
+    GET /search?q=...&top_k=3    -> {"results": [{title, file, type, score}]}
+                                    (mode: keyword | semantic | hybrid, default keyword; others: 400)
+    GET /search_many?q=..&q=..   -> {"results": [[{title, file, type, score}], ...]}
+    POST /search_many            -> the same for a JSON body {"queries": [...], "top_k": 3}
+                                    (batches too long for a URL)
+    GET /wsdl[?name=...]         -> {"output": <--list-wsdl / --wsdl text>}
+    GET /op?name=...             -> {"output": <--op text>, "operations": [operation records]}
+    GET /field?name=...          -> {"output": <--field text>, "operations": [{service, name, direction}]}
+    GET /stats                   -> query cache counters (entries, hits, misses, hit_rate, ...)
+    GET /health                  -> {"docs": N, "wsdls": N}
+    Passages, index and WSDL tables are loaded before the server starts (embeddings on the
+    first semantic request, under a lock) and searches only read them, so requests are
+    served on parallel threads.
+    """
+    def summaries(hits):
+        return [{"title": r["doc"]["title"], "file": r["doc"]["file"], "type": r["doc"]["type"], "score": r["score"]}
+                for r in hits]
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            mode = params.get("mode", "keyword")
+            try:
+                check_mode(mode)
+            except ValueError as e:
+                self.reply(400, {"error": str(e)})
+                return
+            try:
+                if url.path == "/query":
+                    body = {"output": rag.query(params.get("q", ""), mode)}
+                elif url.path == "/search":
+                    body = {"results": summaries(rag.search(params.get("q", ""), int(params.get("top_k", 3)), mode))}
+                elif url.path == "/search_many":
+                    batches = rag.search_many(parse_qs(url.query).get("q", []), int(params.get("top_k", 3)))
+                    body = {"results": [summaries(hits) for hits in batches]}
+                elif url.path == "/wsdl":
+                    body = {"output": rag.list_wsdl_operations(params.get("name"))}
+                elif url.path == "/op":
+                    body = {"output": rag.describe_operation(params.get("name", "")),
+                            "operations": rag.get_operation(params.get("name", ""))}
+                elif url.path == "/field":
+                    body = {"output": rag.describe_field(params.get("name", "")),
+                            "operations": [{"service": op["service"], "name": op["name"], "direction": d}
+                                           for op, d in rag.operations_by_field(params.get("name", ""))]}
+                elif url.path == "/stats":
+                    body = rag.cache.stats()
+                elif url.path == "/health":
+                    body = {"docs": len(rag.docs), "wsdls": len(rag.wsdl_data)}
+                else:
+                    self.send_error(404)
+                    return
+                status = 200
+            except Exception as e:
+                body, status = {"error": str(e)}, 500
+            self.reply(status, body)
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/search_many":
+                self.send_error(404)
+                return
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                queries, top_k = request["queries"], int(request.get("top_k", 3))
+                if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+                    raise ValueError("queries must be a list of strings")
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                self.reply(400, {"error": f"bad request body: {e}"})
+                return
+            try:
+                body, status = {"results": [summaries(hits) for hits in rag.search_many(queries, top_k)]}, 200
+            except Exception as e:
+                body, status = {"error": str(e)}, 500
+            self.reply(status, body)
+
+        def reply(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    rag.load_all()
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"Workday RAG serving on http://{host}:{port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
 def main():
     rag = WorkdayRAG()
     if len(sys.argv) < 2:
@@ -158,12 +1153,31 @@ def main():
         print("  python workday_rag.py 'query'")
         print("  python workday_rag.py --list-wsdl")
         print("  python workday_rag.py --wsdl <name>")
+        print("  python workday_rag.py --semantic 'query'  # embedding search")
+        print("  python workday_rag.py --hybrid 'query'    # keyword + embedding fused")
+        print("  python workday_rag.py --embed             # build/refresh embeddings")
+        print("  python workday_rag.py --op <Operation_Name>   # request/response fields")
+        print("  python workday_rag.py --field <Field_Name>     # operations using a field")
+        print("  python workday_rag.py --stats          # query cache hit/miss counters")
         print("  python workday_rag.py --interactive")
+        print("  python workday_rag.py --serve [port]   # resident daemon for workday_rag_client.py")
         return
     if sys.argv[1] == "--list-wsdl":
         print(rag.list_wsdl_operations())
     elif sys.argv[1] == "--wsdl":
         print(rag.list_wsdl_operations(sys.argv[2] if len(sys.argv) > 2 else None))
+    elif sys.argv[1] == "--op":
+        print(rag.describe_operation(sys.argv[2]) if len(sys.argv) > 2 else "Usage: workday_rag.py --op <Operation_Name>")
+    elif sys.argv[1] == "--field":
+        print(rag.describe_field(sys.argv[2]) if len(sys.argv) > 2 else "Usage: workday_rag.py --field <Field_Name>")
+    elif sys.argv[1] in ("--semantic", "--hybrid"):
+        print(rag.query(" ".join(sys.argv[2:]), mode=sys.argv[1][2:]))
+    elif sys.argv[1] == "--stats":
+        print(rag.cache.report())
+    elif sys.argv[1] == "--embed":
+        rag.embeddings()
+    elif sys.argv[1] == "--serve":
+        serve(rag, port=int(sys.argv[2]) if len(sys.argv) > 2 else SERVER_PORT)
     elif sys.argv[1] == "--interactive":
         print("Workday RAG Interactive (quit to exit)")
         while True:
@@ -171,7 +1185,9 @@ def main():
                 q = input("\n> ").strip()
                 if q.lower() in ["quit", "exit", "q"]:
                     break
-                if q:
+                if q == "--stats":
+                    print(rag.cache.report())
+                elif q:
                     print(rag.query(q))
             except (KeyboardInterrupt, EOFError):
                 break
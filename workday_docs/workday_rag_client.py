@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Workday RAG client - query a resident `workday_rag.py --serve` daemon
+
+Drop-in replacement for `python workday_rag.py <args>` in generators: prints the
+same query/WSDL output, but the corpus stays loaded in the daemon. If no daemon
+is running, it falls back to loading WorkdayRAG in-process (once per process);
+a daemon that answers with an error raises ServerError instead.
+"""
+
+import os, sys, json
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+from urllib.error import HTTPError, URLError
+
+SERVER_URL = os.environ.get("WORKDAY_RAG_URL", f"http://127.0.0.1:{os.environ.get('WORKDAY_RAG_PORT', '8765')}")
+TIMEOUT = 30
+
+_local_rag = None
+
+class ServerError(Exception):
+    """The daemon is up but answered a request with an HTTP error"""
+
+def _get(path, **params):
+    """JSON answer of the daemon; URLError/OSError only when it cannot be reached"""
+    query = urlencode({k: v for k, v in params.items() if v is not None}, doseq=True)
+    return _fetch(path, f"{SERVER_URL}{path}?{query}")
+
+def _post(path, body):
+    """Like _get, for a JSON request body (batches too long for a URL)"""
+    return _fetch(path, Request(f"{SERVER_URL}{path}", data=json.dumps(body).encode("utf-8"),
+                                headers={"Content-Type": "application/json"}))
+
+def _fetch(path, request):
+    try:
+        with urlopen(request, timeout=TIMEOUT) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+    except HTTPError as e:  # a URLError subclass, but the server did answer
+        try:
+            detail = json.loads(e.read().decode("utf-8"))["error"]
+        except Exception:
+            detail = e.reason
+        raise ServerError(f"{SERVER_URL}{path} failed with HTTP {e.code}: {detail}") from None
+
+def _local():
+    global _local_rag
+    if _local_rag is None:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        from workday_rag import WorkdayRAG
+        _local_rag = WorkdayRAG()
+    return _local_rag
+
+def server_available():
+    try:
+        _get("/health")
+    except ServerError:
+        pass  # up, if unwell
+    except (URLError, OSError):
+        return False
+    return True
+
+def query(q, mode="keyword"):
+    """Formatted results, identical to `python workday_rag.py <q>`"""
+    try:
+        return _get("/query", q=q, mode=mode)["output"]
+    except (URLError, OSError):
+        return _local().query(q, mode)
+
+def search(q, top_k=3, mode="keyword"):
+    """[{title, file, type, score}] best first"""
+    try:
+        return _get("/search", q=q, top_k=top_k, mode=mode)["results"]
+    except (URLError, OSError):
+        return [{"title": r["doc"]["title"], "file": r["doc"]["file"], "type": r["doc"]["type"], "score": r["score"]}
+                for r in _local().search(q, top_k, mode)]
+
+def search_many(queries, top_k=3):
+    """One [{title, file, type, score}] list per query, scored as a single batch"""
+    queries = list(queries)
+    try:
+        return _post("/search_many", {"queries": queries, "top_k": top_k})["results"]
+    except (URLError, OSError):
+        return [[{"title": r["doc"]["title"], "file": r["doc"]["file"], "type": r["doc"]["type"], "score": r["score"]}
+                 for r in hits] for hits in _local().search_many(queries, top_k)]
+
+def list_wsdl_operations(name=None):
+    try:
+        return _get("/wsdl", name=name)["output"]
+    except (URLError, OSError):
+        return _local().list_wsdl_operations(name)
+
+def describe_operation(name):
+    """Request/response fields of an operation, as `workday_rag.py --op`"""
+    try:
+        return _get("/op", name=name)["output"]
+    except (URLError, OSError):
+        return _local().describe_operation(name)
+
+def describe_field(field):
+    """Operations whose messages carry field, as `workday_rag.py --field`"""
+    try:
+        return _get("/field", name=field)["output"]
+    except (URLError, OSError):
+        return _local().describe_field(field)
+
+def main():
+    if len(sys.argv) < 2:
+        print("Workday RAG client - query a running `workday_rag.py --serve` daemon")
+        print("\nUsage:")
+        print("  python workday_rag_client.py 'query'")
+        print("  python workday_rag_client.py --list-wsdl")
+        print("  python workday_rag_client.py --wsdl <name>")
+        print("  python workday_rag_client.py --op <Operation_Name>")
+        print("  python workday_rag_client.py --field <Field_Name>")
+        print(f"\nServer: {SERVER_URL} ({'up' if server_available() else 'down - falls back to in-process load'})")
+        return
+    try:
+        if sys.argv[1] == "--list-wsdl":
+            print(list_wsdl_operations())
+        elif sys.argv[1] == "--wsdl":
+            print(list_wsdl_operations(sys.argv[2] if len(sys.argv) > 2 else None))
+        elif sys.argv[1] in ("--op", "--field") and len(sys.argv) > 2:
+            print((describe_operation if sys.argv[1] == "--op" else describe_field)(sys.argv[2]))
+        else:
+            print(query(" ".join(sys.argv[1:])))
+    except ServerError as e:
+        print(f"Workday RAG server error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()